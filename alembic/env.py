@@ -12,6 +12,7 @@ from backend.models.base import Base
 import backend.models.chunk  # noqa: F401
 import backend.models.context  # noqa: F401
 import backend.models.document  # noqa: F401
+import backend.models.embedding_cache  # noqa: F401
 
 config = context.config
 
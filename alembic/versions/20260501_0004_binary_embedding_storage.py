@@ -0,0 +1,118 @@
+"""binary embedding storage
+
+Revision ID: 20260501_0004
+Revises: 20260411_0003
+Create Date: 2026-05-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import json
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260501_0004"
+down_revision = "20260411_0003"
+branch_labels = None
+depends_on = None
+
+EMBEDDING_TABLES = ("documents", "document_chunks")
+BACKFILL_BATCH_SIZE = 500
+
+
+def _column_names(table_name: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _backfill(table_name: str) -> None:
+    """Pack legacy JSON embeddings into float32 blobs and clear the JSON copy."""
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Integer()),
+        sa.column("embedding", sa.Text()),
+        sa.column("embedding_vector", sa.LargeBinary()),
+        sa.column("embedding_dtype", sa.String()),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.embedding)
+            .where(table.c.id > last_id)
+            .where(table.c.embedding.is_not(None))
+            .where(table.c.embedding_vector.is_(None))
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        for row in rows:
+            values = json.loads(row.embedding) if row.embedding else None
+            if isinstance(values, list) and values:
+                blob = np.asarray(values, dtype="<f4").tobytes()
+                bind.execute(
+                    table.update()
+                    .where(table.c.id == row.id)
+                    .values(
+                        embedding_vector=blob,
+                        embedding_dtype="float32",
+                        embedding=None,
+                    )
+                )
+        last_id = rows[-1].id
+
+
+def _restore(table_name: str) -> None:
+    """Unpack blobs back into JSON lists so the previous schema keeps working."""
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Integer()),
+        sa.column("embedding", sa.Text()),
+        sa.column("embedding_vector", sa.LargeBinary()),
+        sa.column("embedding_dtype", sa.String()),
+    )
+    rows = bind.execute(
+        sa.select(table.c.id, table.c.embedding_vector, table.c.embedding_dtype).where(
+            table.c.embedding_vector.is_not(None)
+        )
+    ).all()
+    for row in rows:
+        dtype = np.dtype(row.embedding_dtype or "float32").newbyteorder("<")
+        values = np.frombuffer(row.embedding_vector, dtype=dtype).tolist()
+        bind.execute(
+            table.update()
+            .where(table.c.id == row.id)
+            .values(embedding=json.dumps(values))
+        )
+
+
+def upgrade() -> None:
+    for table_name in EMBEDDING_TABLES:
+        columns = _column_names(table_name)
+        if "embedding_vector" not in columns:
+            op.add_column(
+                table_name, sa.Column("embedding_vector", sa.LargeBinary(), nullable=True)
+            )
+        if "embedding_dtype" not in columns:
+            op.add_column(
+                table_name,
+                sa.Column("embedding_dtype", sa.String(length=16), nullable=True),
+            )
+        _backfill(table_name)
+
+
+def downgrade() -> None:
+    for table_name in EMBEDDING_TABLES:
+        columns = _column_names(table_name)
+        if "embedding_vector" in columns:
+            _restore(table_name)
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.drop_column("embedding_vector")
+                if "embedding_dtype" in columns:
+                    batch_op.drop_column("embedding_dtype")
@@ -0,0 +1,83 @@
+"""fulltext keyword index
+
+Revision ID: 20260515_0005
+Revises: 20260501_0004
+Create Date: 2026-05-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20260515_0005"
+down_revision = "20260501_0004"
+branch_labels = None
+depends_on = None
+
+FTS_TABLES = {
+    "documents": ("title", "summary", "content"),
+    "document_chunks": ("content",),
+}
+
+
+def _fts5_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return bool(
+        bind.exec_driver_sql(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).scalar()
+    )
+
+
+def _create_statements(table_name: str, columns: tuple[str, ...]) -> list[str]:
+    fts = f"{table_name}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table_name}', content_rowid='id', "
+        "tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} "
+        f"ON {table_name} BEGIN {delete_old} {insert_new} END",
+        # Index the rows that existed before the triggers.
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    # Other databases keep the substring keyword scoring fallback.
+    if not _fts5_available():
+        return
+    bind = op.get_bind()
+    for table_name, columns in FTS_TABLES.items():
+        for statement in _create_statements(table_name, columns):
+            bind.exec_driver_sql(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for table_name in FTS_TABLES:
+        fts = f"{table_name}_fts"
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {fts}_au",
+            f"DROP TRIGGER IF EXISTS {fts}_ad",
+            f"DROP TRIGGER IF EXISTS {fts}_ai",
+            f"DROP TABLE IF EXISTS {fts}",
+        ):
+            bind.exec_driver_sql(statement)
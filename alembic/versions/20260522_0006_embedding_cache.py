@@ -0,0 +1,45 @@
+"""content-hash embedding cache
+
+Revision ID: 20260522_0006
+Revises: 20260515_0005
+Create Date: 2026-05-22 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260522_0006"
+down_revision = "20260515_0005"
+branch_labels = None
+depends_on = None
+
+
+def _table_names() -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return set(inspector.get_table_names())
+
+
+def upgrade() -> None:
+    if "embedding_cache" in _table_names():
+        return
+    op.create_table(
+        "embedding_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=255), nullable=False),
+        sa.Column("embedding_vector", sa.LargeBinary(), nullable=False),
+        sa.Column("embedding_dtype", sa.String(length=16), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "model", "content_hash", name="uq_embedding_cache_model_hash"
+        ),
+    )
+
+
+def downgrade() -> None:
+    if "embedding_cache" in _table_names():
+        op.drop_table("embedding_cache")
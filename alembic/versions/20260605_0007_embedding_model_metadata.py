@@ -0,0 +1,58 @@
+"""embedding model metadata
+
+Revision ID: 20260605_0007
+Revises: 20260522_0006
+Create Date: 2026-06-05 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260605_0007"
+down_revision = "20260522_0006"
+branch_labels = None
+depends_on = None
+
+EMBEDDING_TABLES = ("documents", "document_chunks")
+
+
+def _column_names(table_name: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    # Existing vectors keep a NULL model; the reindex job re-embeds them once
+    # because their provenance is unknown.
+    for table_name in EMBEDDING_TABLES:
+        if "embedding_model" not in _column_names(table_name):
+            op.add_column(
+                table_name,
+                sa.Column("embedding_model", sa.String(length=255), nullable=True),
+            )
+
+
+def _table_triggers(table_name: str) -> list[str]:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return []
+    rows = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+        (table_name,),
+    ).all()
+    return [row[0] for row in rows]
+
+
+def downgrade() -> None:
+    for table_name in EMBEDDING_TABLES:
+        if "embedding_model" in _column_names(table_name):
+            # SQLite batch mode recreates the table, which drops its FTS triggers.
+            triggers = _table_triggers(table_name)
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.drop_column("embedding_model")
+            for statement in triggers:
+                op.get_bind().exec_driver_sql(statement)
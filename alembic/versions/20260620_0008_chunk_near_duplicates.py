@@ -0,0 +1,96 @@
+"""near-duplicate chunk fingerprints
+
+Revision ID: 20260620_0008
+Revises: 20260605_0007
+Create Date: 2026-06-20 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260620_0008"
+down_revision = "20260605_0007"
+branch_labels = None
+depends_on = None
+
+BAND_COLUMNS = tuple(f"simhash_band_{band}" for band in range(4))
+
+
+def _column_names(table_name: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _index_names(table_name: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    # Existing chunks stay unfingerprinted until
+    # `python -m scripts.backfill_chunk_fingerprints` links them.
+    columns = _column_names("document_chunks")
+    if "simhash" not in columns:
+        op.add_column(
+            "document_chunks", sa.Column("simhash", sa.BigInteger(), nullable=True)
+        )
+    for name in BAND_COLUMNS:
+        if name not in columns:
+            op.add_column(
+                "document_chunks", sa.Column(name, sa.Integer(), nullable=True)
+            )
+    if "canonical_chunk_id" not in columns:
+        # SQLite cannot add a constraint in place (and does not enforce it by
+        # default); IngestionService re-points duplicates before deletes.
+        reference = (
+            []
+            if op.get_bind().dialect.name == "sqlite"
+            else [sa.ForeignKey("document_chunks.id", ondelete="SET NULL")]
+        )
+        op.add_column(
+            "document_chunks",
+            sa.Column("canonical_chunk_id", sa.Integer(), *reference, nullable=True),
+        )
+    indexes = _index_names("document_chunks")
+    for name in (*BAND_COLUMNS, "canonical_chunk_id"):
+        index_name = f"ix_document_chunks_{name}"
+        if index_name not in indexes:
+            op.create_index(index_name, "document_chunks", [name])
+
+
+def _table_triggers(table_name: str) -> list[str]:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return []
+    rows = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+        (table_name,),
+    ).all()
+    return [row[0] for row in rows]
+
+
+def downgrade() -> None:
+    indexes = _index_names("document_chunks")
+    for name in (*BAND_COLUMNS, "canonical_chunk_id"):
+        index_name = f"ix_document_chunks_{name}"
+        if index_name in indexes:
+            op.drop_index(index_name, table_name="document_chunks")
+    columns = _column_names("document_chunks")
+    dropped = [
+        name
+        for name in ("simhash", *BAND_COLUMNS, "canonical_chunk_id")
+        if name in columns
+    ]
+    if not dropped:
+        return
+    # SQLite batch mode recreates the table, which drops its FTS triggers.
+    triggers = _table_triggers("document_chunks")
+    with op.batch_alter_table("document_chunks") as batch_op:
+        for name in dropped:
+            batch_op.drop_column(name)
+    for statement in triggers:
+        op.get_bind().exec_driver_sql(statement)
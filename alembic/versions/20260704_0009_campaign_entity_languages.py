@@ -0,0 +1,83 @@
+"""campaign entity language index
+
+Revision ID: 20260704_0009
+Revises: 20260620_0008
+Create Date: 2026-07-04 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260704_0009"
+down_revision = "20260620_0008"
+branch_labels = None
+depends_on = None
+
+LANGUAGE_FIELDS = ("languages", "scripts", "dialects")
+
+
+def _table_names() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _languages(details: object) -> set[str]:
+    # Mirrors CampaignService._entity_languages.
+    values: set[str] = set()
+    if not isinstance(details, dict):
+        return values
+    for field in LANGUAGE_FIELDS:
+        field_value = details.get(field)
+        if isinstance(field_value, list):
+            values.update(
+                str(value).strip().casefold()
+                for value in field_value
+                if str(value).strip()
+            )
+        elif isinstance(field_value, str) and field_value.strip():
+            values.add(field_value.strip().casefold())
+    return values
+
+
+def upgrade() -> None:
+    if "campaign_entity_languages" in _table_names():
+        return
+    languages = op.create_table(
+        "campaign_entity_languages",
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("language", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["entity_id"], ["campaign_entities.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("entity_id", "language"),
+    )
+    op.create_index(
+        "idx_campaign_entity_languages_language",
+        "campaign_entity_languages",
+        ["language", "entity_id"],
+    )
+
+    entities = sa.table(
+        "campaign_entities", sa.column("id", sa.Integer), sa.column("details", sa.JSON)
+    )
+    rows = op.get_bind().execute(sa.select(entities.c.id, entities.c.details)).all()
+    values = [
+        {"entity_id": entity_id, "language": language}
+        for entity_id, details in rows
+        for language in sorted(_languages(details))
+    ]
+    if values:
+        op.bulk_insert(languages, values)
+
+
+def downgrade() -> None:
+    if "campaign_entity_languages" not in _table_names():
+        return
+    op.drop_index(
+        "idx_campaign_entity_languages_language",
+        table_name="campaign_entity_languages",
+    )
+    op.drop_table("campaign_entity_languages")
@@ -0,0 +1,88 @@
+"""campaign entity fulltext index
+
+Revision ID: 20260718_0010
+Revises: 20260704_0009
+Create Date: 2026-07-18 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20260718_0010"
+down_revision = "20260704_0009"
+branch_labels = None
+depends_on = None
+
+FTS = "campaign_entities_fts"
+
+
+def _json_values(column: str) -> str:
+    return (
+        "(SELECT group_concat(value, ' ') FROM json_tree("
+        f"CASE WHEN json_valid({{row}}.{column}) THEN {{row}}.{column} "
+        "ELSE '{{}}' END) WHERE type IN ('text', 'integer', 'real'))"
+    )
+
+
+COLUMNS = {
+    "name": "{row}.name",
+    "stable_key": "{row}.stable_key",
+    "summary": "{row}.summary",
+    "description": "{row}.description",
+    "tags": _json_values("tags"),
+    "details": _json_values("details"),
+}
+
+
+def _fts5_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return bool(
+        bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar()
+    )
+
+
+def _values(row: str) -> str:
+    return ", ".join(expression.format(row=row) for expression in COLUMNS.values())
+
+
+def upgrade() -> None:
+    # Other databases keep the ILIKE search fallback.
+    if not _fts5_available():
+        return
+    cols = ", ".join(COLUMNS)
+    insert_new = f"INSERT INTO {FTS}(rowid, {cols}) SELECT new.id, {_values('new')};"
+    delete_old = f"DELETE FROM {FTS} WHERE rowid = old.id;"
+    bind = op.get_bind()
+    for statement in (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS} USING fts5("
+        f"{cols}, tokenize='porter unicode61', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS}_ai AFTER INSERT ON campaign_entities "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS}_ad AFTER DELETE ON campaign_entities "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS}_au AFTER UPDATE ON campaign_entities "
+        f"BEGIN {delete_old} {insert_new} END",
+        # Index the rows that existed before the triggers.
+        f"DELETE FROM {FTS}",
+        f"INSERT INTO {FTS}(rowid, {cols}) "
+        f"SELECT id, {_values('campaign_entities')} FROM campaign_entities",
+    ):
+        bind.exec_driver_sql(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for statement in (
+        f"DROP TRIGGER IF EXISTS {FTS}_au",
+        f"DROP TRIGGER IF EXISTS {FTS}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS}_ai",
+        f"DROP TABLE IF EXISTS {FTS}",
+    ):
+        bind.exec_driver_sql(statement)
@@ -0,0 +1,40 @@
+"""campaign graph version
+
+Revision ID: 20260801_0011
+Revises: 20260718_0010
+Create Date: 2026-08-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260801_0011"
+down_revision = "20260718_0010"
+branch_labels = None
+depends_on = None
+
+
+def _table_names() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    if "campaign_graph_version" in _table_names():
+        return
+    version = op.create_table(
+        "campaign_graph_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.bulk_insert(version, [{"id": 1, "generation": 0}])
+
+
+def downgrade() -> None:
+    if "campaign_graph_version" not in _table_names():
+        return
+    op.drop_table("campaign_graph_version")
@@ -0,0 +1,40 @@
+"""corpus versions
+
+Revision ID: 20260815_0012
+Revises: 20260801_0011
+Create Date: 2026-08-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260815_0012"
+down_revision = "20260801_0011"
+branch_labels = None
+depends_on = None
+
+
+def _table_names() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    if "corpus_versions" in _table_names():
+        return
+    versions = op.create_table(
+        "corpus_versions",
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("kind"),
+    )
+    op.bulk_insert(versions, [{"kind": "rule", "generation": 0}])
+
+
+def downgrade() -> None:
+    if "corpus_versions" not in _table_names():
+        return
+    op.drop_table("corpus_versions")
@@ -0,0 +1,85 @@
+"""title keys
+
+Revision ID: 20260901_0013
+Revises: 20260815_0012
+Create Date: 2026-09-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20260901_0013"
+down_revision = "20260815_0012"
+branch_labels = None
+depends_on = None
+
+# (table, source column, key column, key type); keys match
+# backend.models.base.title_key.
+TITLE_KEYS = (
+    ("documents", "title", "title_key", sa.Text()),
+    ("campaign_entities", "name", "name_key", sa.String(length=255)),
+)
+
+
+def _column_names(table_name: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _index_names(table_name: str) -> set[str | None]:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table_name, source, key, key_type in TITLE_KEYS:
+        if key not in _column_names(table_name):
+            op.add_column(table_name, sa.Column(key, key_type, nullable=True))
+        # Backfilled in Python: SQLite's lower() only folds ASCII.
+        table = sa.table(table_name, sa.column("id"), sa.column(source), sa.column(key))
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[source]).where(table.c[key].is_(None))
+        ).all()
+        if rows:
+            bind.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam("row_id"))
+                .values({key: sa.bindparam("key_value")}),
+                [
+                    {"row_id": row_id, "key_value": value.strip().casefold()}
+                    for row_id, value in rows
+                ],
+            )
+        index_name = f"ix_{table_name}_{key}"
+        if index_name not in _index_names(table_name):
+            op.create_index(index_name, table_name, [key])
+
+
+def _table_triggers(table_name: str) -> list[str]:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return []
+    rows = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+        (table_name,),
+    ).all()
+    return [row[0] for row in rows]
+
+
+def downgrade() -> None:
+    for table_name, _source, key, _key_type in TITLE_KEYS:
+        index_name = f"ix_{table_name}_{key}"
+        if index_name in _index_names(table_name):
+            op.drop_index(index_name, table_name=table_name)
+        if key in _column_names(table_name):
+            # SQLite batch mode recreates the table, which drops its FTS triggers.
+            triggers = _table_triggers(table_name)
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.drop_column(key)
+            for statement in triggers:
+                op.get_bind().exec_driver_sql(statement)
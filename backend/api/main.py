@@ -5,6 +5,8 @@ import logging
 
 from backend.config.settings import settings
 from backend.models.base import init_db
+from backend.services.embedding_service import embedding_service
+from backend.services.pdf_text_extractor import pdf_text_extractor
 from backend.services.scheduler import scheduler
 from backend.api.routes.documents import router as documents_router
 from backend.api.routes.admin import router as admin_router
@@ -37,6 +39,9 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         scheduler.stop()
+        embedding_service.query_cache.save()
+        embedding_service.executor.shutdown()
+        pdf_text_extractor.shutdown()
         logger.info("DMA API shutdown complete")
 
 
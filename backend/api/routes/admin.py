@@ -1,14 +1,34 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.base import get_db
+from backend.services.embedding_reindex_service import embedding_reindex_service
 from backend.services.scheduler import scheduler
 from backend.services.metrics_service import metrics_service
+from backend.services.vector_index_service import vector_index_service
 
 router = APIRouter()
 
 
 @router.post("/reindex")
 async def trigger_reindex():
-    await scheduler.reindex_embeddings()
-    return {"status": "ok", "triggered": "reindex_embeddings"}
+    started = scheduler.trigger_reindex()
+    return {"status": "ok", "triggered": "reindex_embeddings", "started": started}
+
+
+@router.get("/reindex")
+async def reindex_progress(db: AsyncSession = Depends(get_db)):
+    return await embedding_reindex_service.progress(db)
+
+
+@router.post("/vector-index/rebuild")
+async def rebuild_vector_index(db: AsyncSession = Depends(get_db)):
+    if not vector_index_service.enabled:
+        raise HTTPException(status_code=409, detail="Vector index is disabled")
+    try:
+        return await vector_index_service.build_snapshot(db)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
 
 
 @router.get("/metrics")
@@ -26,6 +26,7 @@ class PaginatedResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    next_cursor: Optional[str] = None
 
 
 class LocationDetails(BaseModel):
@@ -390,6 +391,7 @@ async def list_campaign_entities(
     is_active: Optional[bool] = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None),
     db: AsyncSession = Depends(get_db),
 ):
     try:
@@ -405,6 +407,7 @@ async def list_campaign_entities(
             is_active=is_active,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
     except ValueError as exc:
         raise _bad_request(str(exc)) from exc
@@ -531,6 +534,27 @@ async def list_entity_relationships(entity_id: int, db: AsyncSession = Depends(g
     return {"entity_id": entity_id, "relationships": relationships}
 
 
+@router.get("/entities/{entity_id}/neighborhood")
+async def get_entity_neighborhood(
+    entity_id: int,
+    depth: int = Query(default=1, ge=0, le=4),
+    types: Optional[list[str]] = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    # ``types`` may repeat or hold comma-separated relationship types.
+    relationship_types = [
+        value for entry in types or [] for value in entry.split(",") if value.strip()
+    ]
+    try:
+        return await campaign_service.get_neighborhood(
+            entity_id, db, depth=depth, relationship_types=relationship_types
+        )
+    except ValueError as exc:
+        raise _bad_request(str(exc)) from exc
+    except LookupError as exc:
+        raise _not_found(str(exc)) from exc
+
+
 @router.get("/pcs/{entity_id}/dossier")
 async def get_pc_dossier(entity_id: int, db: AsyncSession = Depends(get_db)):
     try:
@@ -1,13 +1,16 @@
-from typing import Any, List, Optional
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
 from time import perf_counter
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 
-from backend.models.base import get_db
+from backend.models.base import get_db, get_session_maker
 from backend.models.document import Document
 from backend.services.ingestion_governance import (
     PrivacyScope,
@@ -17,7 +20,7 @@ from backend.services.ingestion_governance import (
 )
 from backend.services.ingestion_service import ingestion_service
 from backend.services.metrics_service import metrics_service
-from backend.services.retrieval_service import retrieval_service
+from backend.services.retrieval_service import SearchRequest, retrieval_service
 from backend.services.rules_service import rules_service
 
 
@@ -74,6 +77,27 @@ class SearchQueryResponse(BaseModel):
     results: List[Any]
 
 
+class BatchSearchQuery(BaseModel):
+    q: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=20)
+    include_chunks: int = Field(default=0, ge=0, le=5)
+    kind: Optional[str] = None
+    source_class: Optional[SourceClass] = None
+    privacy_scope: Optional[PrivacyScope] = None
+    review_status: Optional[ReviewStatus] = None
+    visibility_scope: Optional[VisibilityScope] = None
+    rag_eligible: Optional[bool] = None
+    train_eligible: Optional[bool] = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery] = Field(min_length=1, max_length=50)
+
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchQueryResponse]
+
+
 def _to_dict(d: Document):
     return {
         "id": d.id,
@@ -91,10 +115,16 @@ def _to_dict(d: Document):
         "train_eligible": d.train_eligible,
         "created_at": d.created_at.isoformat() if d.created_at else None,
         "updated_at": d.updated_at.isoformat() if d.updated_at else None,
-        "has_embedding": bool(d.embedding),
+        "has_embedding": d.has_embedding,
     }
 
 
+def _search_items(items: List[Dict[str, Any]], include_chunks: int) -> List[Any]:
+    if include_chunks:
+        return items
+    return [{"score": item["score"], "document": item["document"]} for item in items]
+
+
 def _apply_document_filters(
     stmt,
     *,
@@ -241,6 +271,135 @@ async def search_documents(
         )
 
 
+@router.get("/search/stream")
+async def stream_search_documents(
+    request: Request,
+    q: str = Query(min_length=1),
+    kind: Optional[str] = Query(default=None),
+    source_class: Optional[SourceClass] = Query(default=None),
+    privacy_scope: Optional[PrivacyScope] = Query(default=None),
+    review_status: Optional[ReviewStatus] = Query(default=None),
+    visibility_scope: Optional[VisibilityScope] = Query(default=None),
+    rag_eligible: Optional[bool] = Query(default=None),
+    train_eligible: Optional[bool] = Query(default=None),
+    top_k: int = Query(default=5, ge=1, le=20),
+    include_chunks: int = Query(default=0, ge=0, le=5),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+):
+    """Server-sent events: ``keyword`` results first, then the ``final`` ranking.
+
+    Closing the connection cancels the search, including a pending query
+    embedding.
+    """
+
+    async def _events() -> AsyncIterator[str]:
+        start = perf_counter()
+        success = False
+        try:
+            # The body runs after the handler returned, so it owns its session.
+            async with session_maker() as db, aclosing(
+                retrieval_service.search_documents_progressive(
+                    q,
+                    db,
+                    top_k=top_k,
+                    kind=kind,
+                    include_chunks=include_chunks,
+                    source_class=source_class.value if source_class else None,
+                    privacy_scope=privacy_scope.value if privacy_scope else None,
+                    review_status=review_status.value if review_status else None,
+                    visibility_scope=(
+                        visibility_scope.value if visibility_scope else None
+                    ),
+                    rag_eligible=rag_eligible,
+                    train_eligible=train_eligible,
+                )
+            ) as phases:
+                async for phase, items in phases:
+                    if phase == "keyword":
+                        metrics_service.record(
+                            "documents.search.stream.keyword",
+                            latency_ms=(perf_counter() - start) * 1000,
+                        )
+                    payload = {
+                        "query": q,
+                        "results": _search_items(items, include_chunks),
+                    }
+                    yield f"event: {phase}\ndata: {json.dumps(payload)}\n\n"
+                    if await request.is_disconnected():
+                        return
+            success = True
+        finally:
+            metrics_service.record(
+                "documents.search.stream",
+                latency_ms=(perf_counter() - start) * 1000,
+                success=success,
+            )
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(
+    payload: BatchSearchRequest, db: AsyncSession = Depends(get_db)
+):
+    start = perf_counter()
+    response_payload = None
+    success = False
+    try:
+        ranked = await retrieval_service.search_documents_batch(
+            [
+                SearchRequest(
+                    query.q,
+                    top_k=query.top_k,
+                    include_chunks=query.include_chunks,
+                    kind=query.kind,
+                    source_class=(
+                        query.source_class.value if query.source_class else None
+                    ),
+                    privacy_scope=(
+                        query.privacy_scope.value if query.privacy_scope else None
+                    ),
+                    review_status=(
+                        query.review_status.value if query.review_status else None
+                    ),
+                    visibility_scope=(
+                        query.visibility_scope.value if query.visibility_scope else None
+                    ),
+                    rag_eligible=query.rag_eligible,
+                    train_eligible=query.train_eligible,
+                )
+                for query in payload.queries
+            ],
+            db,
+        )
+        response_payload = {
+            "results": [
+                {
+                    "query": query.q,
+                    "results": _search_items(items, query.include_chunks),
+                }
+                for query, items in zip(payload.queries, ranked)
+            ]
+        }
+        success = True
+        return response_payload
+    finally:
+        metrics_service.record(
+            "documents.search.batch",
+            latency_ms=(perf_counter() - start) * 1000,
+            input_tokens=metrics_service.estimate_tokens(
+                payload.model_dump(mode="json")
+            ),
+            output_tokens=metrics_service.estimate_tokens(response_payload),
+            success=success,
+            token_source="estimated",
+        )
+
+
 @router.post("/rules/query")
 async def query_rules(payload: RulesQueryRequest, db: AsyncSession = Depends(get_db)):
     start = perf_counter()
@@ -341,8 +500,7 @@ async def update_document(
     if should_refresh:
         await ingestion_service.refresh_document(db, doc, rechunk=content_changed)
     else:
-        await db.commit()
-        await db.refresh(doc)
+        await ingestion_service.update_metadata(db, doc)
 
     return _to_dict(doc)
 
@@ -353,6 +511,5 @@ async def delete_document(doc_id: int, db: AsyncSession = Depends(get_db)):
     doc = res.scalar_one_or_none()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    await db.delete(doc)
-    await db.commit()
+    await ingestion_service.delete_document(db, doc)
     return {"deleted": True, "id": doc_id}
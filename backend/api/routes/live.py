@@ -19,7 +19,6 @@ from backend.config.local_paths import private_child_root, project_path, vault_r
 from backend.models.base import get_db
 from backend.services.campaign_service import campaign_service
 from backend.services.aon_creature_service import aon_creature_service
-from backend.services.ingestion_service import ingestion_service
 from backend.services.live_assistant_service import live_assistant_service
 from backend.services.live_maptool_service import live_maptool_service
 from backend.services.live_session_service import live_session_service
@@ -27,6 +26,7 @@ from backend.services.metrics_service import metrics_service
 from backend.services.obsidian_markdown import split_frontmatter
 from backend.services.private_campaign_data_service import private_campaign_data_service
 from backend.services.private_image_intake_service import private_image_intake_service
+from backend.services.private_index_mirror_service import private_index_mirror_service
 from backend.services.private_index_service import private_index_service
 from backend.services.private_import_audit_service import private_import_audit_service
 from backend.services.reference_corpus_service import reference_corpus_service
@@ -3305,33 +3305,17 @@ async def mirror_private_index_to_search_db(db: AsyncSession = Depends(get_db)):
     if rag_file is None:
         raise _bad_request("Build private indexes before mirroring RAG documents.")
     rag_path = private_campaign_data_service.private_root() / str(rag_file.get("path") or "")
-    imported = 0
-    for line in rag_path.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        row = json.loads(line)
-        await ingestion_service.ingest_document(
-            db,
-            title=str(row.get("title") or row.get("external_id") or "Private Index Document"),
-            kind=str(row.get("kind") or "campaign_index"),
-            content=str(row.get("content") or ""),
-            summary=None,
-            source_name="private-local-index",
-            url=f"private-index:{row.get('external_id')}",
-            dedupe_on_url=True,
-            source_class="private_local",
-            privacy_scope="private_local",
-            review_status="approved",
-            visibility_scope="gm_only",
-            rag_eligible=True,
-            train_eligible=False,
-        )
-        imported += 1
+    counts = await private_index_mirror_service.mirror(db, rag_path)
+    imported = counts["added"] + counts["updated"]
     return {
         "status": "mirrored",
-        "message": f"Mirrored {imported} private-local RAG documents into the search database.",
+        "message": (
+            f"Mirrored {imported} changed private-local RAG documents into the search database "
+            f"({counts['unchanged']} unchanged, {counts['removed']} removed)."
+        ),
         "rag_documents_path": rag_file.get("path"),
         "imported": imported,
+        **counts,
     }
 
 
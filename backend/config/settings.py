@@ -14,7 +14,57 @@ class Settings(BaseSettings):
     embedding_model: str = "text-embedding-3-small"  # OpenAI model
     local_embedding_model: str = "all-MiniLM-L6-v2"  # sentence-transformers
     max_embedding_batch_size: int = 100
+    # Provider calls run on a thread pool; concurrent single-text requests
+    # arriving within the window are coalesced into one batch.
+    embedding_executor_workers: int = 4
+    embedding_batch_window_ms: float = 5.0
+    embedding_max_pending_requests: int = 256
+    embedding_storage_dtype: str = "float32"  # "float32" or "float16"
+    # Query embedding LRU cache; set EMBEDDING_CACHE_PATH to keep it across restarts
+    embedding_cache_size: int = 1024
+    embedding_cache_ttl_seconds: int = 86400
+    embedding_cache_path: Optional[str] = None
+    embedding_cache_save_minutes: int = 10
     openai_embedding_cost_per_1m_tokens: Optional[float] = None
+    # Background re-embedding of stale or changed documents and chunks
+    embedding_reindex_interval_minutes: int = 60
+    embedding_reindex_page_size: int = 200
+    embedding_reindex_concurrency: int = 2
+    embedding_reindex_requests_per_minute: float = 60.0
+
+    # Approximate-nearest-neighbour chunk index (IVF, NumPy)
+    vector_index_enabled: bool = False
+    vector_index_path: str = "./data/vector-index"
+    vector_index_nprobe: int = 8
+    vector_index_candidates: int = 200
+    vector_snapshot_refresh_minutes: int = 5
+    # Candidate search on "int8" or "binary" codes, exact re-rank of k * factor
+    vector_index_quantization: str = "none"
+    vector_index_rerank_factor: int = 8
+
+    # Chunks within this SimHash Hamming distance (0-3 of 64 bits) of an
+    # earlier chunk are linked to it and skipped by ANN and retrieval
+    chunk_dedupe_enabled: bool = True
+    chunk_dedupe_max_distance: int = 3
+
+    # Bulk ingestion (mirror-rag) commits once per this many documents
+    ingestion_bulk_batch_size: int = 100
+    # Drop-zone batch imports run as a pipeline of bounded queues:
+    # discover -> parse -> chunk -> embed -> persist
+    asset_import_parse_concurrency: int = 4
+    asset_import_embed_concurrency: int = 2
+    asset_import_batch_size: int = 16
+    asset_import_queue_size: int = 32
+    # pdftotext runs in a process pool (0 = in the calling thread); its output
+    # is cached by PDF sha256 and extractor options
+    pdf_extract_workers: int = 2
+    pdf_text_cache_path: str = "./data/pdf-text-cache"
+
+    # Rules answers cached per rules-corpus version (0 disables)
+    rules_cache_size: int = 256
+    # Campaign overview served from an in-process entity graph, patched by
+    # CampaignService writes and checked against campaign_graph_version
+    campaign_graph_cache_enabled: bool = True
 
     # Database
     # Keep the no-.env fallback aligned with the default local vault profile.
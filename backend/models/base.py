@@ -13,6 +13,11 @@ class Base(DeclarativeBase):
     pass
 
 
+def title_key(title: str) -> str:
+    """Case- and padding-insensitive form of a title, for matching in SQL."""
+    return title.strip().casefold()
+
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
@@ -34,6 +39,7 @@ async def init_db():
     import backend.models.document  # noqa: F401
     import backend.models.context  # noqa: F401
     import backend.models.chunk  # noqa: F401
+    import backend.models.embedding_cache  # noqa: F401
 
     async with engine.begin() as conn:
         logger.info("Initializing DMA database tables…")
@@ -52,3 +58,12 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Session factory for responses that outlive the handler, e.g. streams.
+
+    ``get_db`` closes its session once the handler returns, so a streaming
+    body opens its own session from this factory instead.
+    """
+    return async_session_maker
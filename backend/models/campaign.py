@@ -14,9 +14,10 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from backend.models.base import Base
+from backend.models.base import Base, title_key
+from backend.models.fulltext import register_fulltext
 
 
 class CampaignEntity(Base):
@@ -26,6 +27,8 @@ class CampaignEntity(Base):
     stable_key: Mapped[str] = mapped_column(String(64), unique=True, index=True)
     entity_type: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # title_key(name), kept in step by the validator below
+    name_key: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     details: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
@@ -96,6 +99,11 @@ class CampaignEntity(Base):
         order_by="CharacterSheetVersion.version_number",
     )
 
+    @validates("name")
+    def _set_name_key(self, _key: str, name: str | None) -> str | None:
+        self.name_key = None if name is None else title_key(name)
+        return name
+
     __table_args__ = (
         Index("idx_campaign_entities_type_name", "entity_type", "name"),
         Index("idx_campaign_entities_active_type", "is_active", "entity_type"),
@@ -148,6 +156,39 @@ class CampaignRelationship(Base):
     )
 
 
+class CampaignEntityLanguage(Base):
+    """Casefolded languages, scripts and dialects from an entity's details.
+
+    Rewritten by ``CampaignService`` whenever ``details`` change, so the
+    language filter of ``list_entities`` runs as an indexed lookup.
+    """
+
+    __tablename__ = "campaign_entity_languages"
+
+    entity_id: Mapped[int] = mapped_column(
+        ForeignKey("campaign_entities.id", ondelete="CASCADE"), primary_key=True
+    )
+    language: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    __table_args__ = (
+        Index("idx_campaign_entity_languages_language", "language", "entity_id"),
+    )
+
+
+class CampaignGraphVersion(Base):
+    """Single row counting committed campaign graph writes.
+
+    ``CampaignService`` bumps it inside every entity, relationship and sheet
+    write, so each process's ``EntityGraphCache`` notices writes made by the
+    API, the asset importer or the Obsidian sync alike.
+    """
+
+    __tablename__ = "campaign_graph_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class CharacterSheetVersion(Base):
     __tablename__ = "character_sheet_versions"
 
@@ -177,3 +218,25 @@ class CharacterSheetVersion(Base):
             name="uq_character_sheet_versions_entity_version",
         ),
     )
+
+
+def _json_values(column: str) -> str:
+    # Scalar values of a JSON column, space separated; keys are left out.
+    return (
+        "(SELECT group_concat(value, ' ') FROM json_tree("
+        f"CASE WHEN json_valid({{row}}.{column}) THEN {{row}}.{column} "
+        "ELSE '{{}}' END) WHERE type IN ('text', 'integer', 'real'))"
+    )
+
+
+# Column order matters: KeywordIndexService weights bm25 per column.
+CAMPAIGN_ENTITY_FTS_COLUMNS = {
+    "name": "{row}.name",
+    "stable_key": "{row}.stable_key",
+    "summary": "{row}.summary",
+    "description": "{row}.description",
+    "tags": _json_values("tags"),
+    "details": _json_values("details"),
+}
+
+register_fulltext(CampaignEntity.__table__, CAMPAIGN_ENTITY_FTS_COLUMNS)
@@ -1,18 +1,20 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, ForeignKey, Index, Integer, JSON, Text
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models.base import Base
+from backend.models.embedding import EmbeddingVectorMixin
+from backend.models.fulltext import register_fulltext
 
 if TYPE_CHECKING:
     from backend.models.document import Document
 
 
-class DocumentChunk(Base):
+class DocumentChunk(EmbeddingVectorMixin, Base):
     """Chunked document content optimized for retrieval."""
 
     __tablename__ = "document_chunks"
@@ -26,13 +28,29 @@ class DocumentChunk(Base):
     )
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    embedding: Mapped[list[float] | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
+    # 64-bit SimHash of the text (signed) and its four 16-bit bands, which
+    # are indexed so near-duplicate lookups only touch matching buckets.
+    simhash: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    simhash_band_0: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    simhash_band_1: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    simhash_band_2: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    simhash_band_3: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    # Set on near-duplicates: the earlier chunk they repeat.
+    canonical_chunk_id: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        ForeignKey("document_chunks.id", ondelete="SET NULL"),
+        index=True,
+        nullable=True,
+    )
 
     document: Mapped["Document"] = relationship("Document", back_populates="chunks")
 
     __table_args__ = (
         Index("idx_document_chunks_doc_idx", "document_id", "chunk_index"),
     )
+
+
+register_fulltext(DocumentChunk.__table__, ("content",))
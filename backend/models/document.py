@@ -3,16 +3,18 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from sqlalchemy import JSON, DateTime, Index, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from backend.models.base import Base
+from backend.models.base import Base, title_key
+from backend.models.embedding import EmbeddingVectorMixin
+from backend.models.fulltext import register_fulltext
 
 if TYPE_CHECKING:
     from backend.models.chunk import DocumentChunk
 
 
-class Document(Base):
+class Document(EmbeddingVectorMixin, Base):
     """Generic RAG document for DMA (rules, notes, lore, logs)."""
 
     __tablename__ = "documents"
@@ -43,6 +45,8 @@ class Document(Base):
 
     # Content
     title: Mapped[str] = mapped_column(Text, nullable=False)
+    # title_key(title), kept in step by the validator below
+    title_key: Mapped[str | None] = mapped_column(Text, nullable=True, index=True)
     content: Mapped[str | None] = mapped_column(Text, nullable=True)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
 
@@ -60,10 +64,7 @@ class Document(Base):
         onupdate=lambda: datetime.now(timezone.utc),
     )
 
-    # Vector embedding for retrieval
-    embedding: Mapped[list[float] | None] = mapped_column(
-        JSON, nullable=True
-    )  # JSON array of floats
+    # Vector embedding for retrieval: see EmbeddingVectorMixin
 
     chunks: Mapped[list["DocumentChunk"]] = relationship(
         "DocumentChunk",
@@ -72,6 +73,11 @@ class Document(Base):
         lazy="selectin",
     )
 
+    @validates("title")
+    def _set_title_key(self, _key: str, title: str | None) -> str | None:
+        self.title_key = None if title is None else title_key(title)
+        return title
+
     __table_args__ = (
         Index("idx_documents_kind_title", "kind", "title"),
         Index(
@@ -84,3 +90,20 @@ class Document(Base):
 
     def __repr__(self) -> str:
         return f"<Document(id={self.id}, kind={self.kind}, title={self.title[:40]!r})>"
+
+
+class CorpusVersion(Base):
+    """Generation counter of the documents of one ``kind``.
+
+    ``IngestionService`` and the embedding reindex job bump the row of a kind
+    inside the transaction that writes its documents, so rules answers cached
+    by any process notice imports, AoN fetches and other workers' writes.
+    """
+
+    __tablename__ = "corpus_versions"
+
+    kind: Mapped[str] = mapped_column(String(50), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+register_fulltext(Document.__table__, ("title", "summary", "content"))
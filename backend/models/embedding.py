@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import JSON, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.config.settings import settings
+
+SUPPORTED_EMBEDDING_DTYPES = {"float32", "float16"}
+
+
+def encode_embedding(
+    values: Sequence[float] | np.ndarray, dtype: Optional[str] = None
+) -> tuple[bytes, str]:
+    """Pack an embedding into little-endian bytes of the configured dtype."""
+    dtype = dtype or settings.embedding_storage_dtype
+    if dtype not in SUPPORTED_EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    array = np.asarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return array.tobytes(), dtype
+
+
+def decode_embedding(
+    blob: Optional[bytes], dtype: Optional[str], legacy: Any = None
+) -> Optional[np.ndarray]:
+    """Return a read-only NumPy view over ``blob`` (no copy).
+
+    Rows written before binary storage existed only have the JSON ``legacy``
+    list; those are converted on the fly until the backfill migration runs.
+    """
+    if blob:
+        return np.frombuffer(blob, dtype=np.dtype(dtype or "float32").newbyteorder("<"))
+    if isinstance(legacy, list) and legacy:
+        return np.asarray(legacy, dtype=np.float32)
+    return None
+
+
+class EmbeddingVectorMixin:
+    """Embedding storage shared by documents and chunks.
+
+    ``embedding_vector`` holds the packed vector; ``embedding`` is the legacy
+    JSON list kept readable for rows that have not been backfilled yet.
+    """
+
+    embedding: Mapped[list[float] | None] = mapped_column(
+        JSON(none_as_null=True), nullable=True
+    )
+    embedding_vector: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    embedding_dtype: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    # "<provider>:<model>" that produced the vector; the reindexer re-embeds
+    # rows whose value differs from the configured model.
+    embedding_model: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    @property
+    def embedding_array(self) -> Optional[np.ndarray]:
+        return decode_embedding(
+            self.embedding_vector, self.embedding_dtype, self.embedding
+        )
+
+    @property
+    def has_embedding(self) -> bool:
+        return bool(self.embedding_vector) or bool(self.embedding)
+
+    def set_embedding(
+        self,
+        values: Optional[Sequence[float] | np.ndarray],
+        dtype: Optional[str] = None,
+        *,
+        model: Optional[str] = None,
+    ) -> None:
+        if values is None or len(values) == 0:
+            self.embedding_vector = None
+            self.embedding_dtype = None
+            self.embedding_model = None
+        else:
+            self.embedding_vector, self.embedding_dtype = encode_embedding(
+                values, dtype
+            )
+            self.embedding_model = model
+        self.embedding = None
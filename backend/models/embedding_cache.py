@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.models.base import Base
+
+
+class EmbeddingCacheEntry(Base):
+    """Embedding of an exact text, keyed by its sha256 and the embedding model."""
+
+    __tablename__ = "embedding_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    model: Mapped[str] = mapped_column(String(255), nullable=False)
+    embedding_vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    embedding_dtype: Mapped[str] = mapped_column(String(16), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        UniqueConstraint("model", "content_hash", name="uq_embedding_cache_model_hash"),
+    )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping, Sequence, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import FromClause
+
+# Porter stemming folds "grabbed"/"grabs" onto "grab", the same reach the
+# retrieval query expansion used to get from substring matching.
+FTS_TOKENIZER = "porter unicode61"
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def fts_create_statements(table_name: str, columns: Sequence[str]) -> List[str]:
+    """DDL for an external-content FTS5 table kept in sync by triggers."""
+    fts = fts_table_name(table_name)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table_name}', content_rowid='id', "
+        f"tokenize='{FTS_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} "
+        f"ON {table_name} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def fts_derived_create_statements(
+    table_name: str, columns: Mapping[str, str]
+) -> List[str]:
+    """DDL for an FTS5 table of values derived from each row of ``table_name``.
+
+    ``columns`` maps each FTS column to an SQL expression over ``{row}``. The
+    values are not columns of ``table_name``, so the FTS table keeps its own
+    copy; prefix indexes make ``term*`` queries cheap.
+    """
+    fts = fts_table_name(table_name)
+    cols = ", ".join(columns)
+    new_values = ", ".join(
+        expression.format(row="new") for expression in columns.values()
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) SELECT new.id, {new_values};"
+    delete_old = f"DELETE FROM {fts} WHERE rowid = old.id;"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, tokenize='{FTS_TOKENIZER}', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def fts_drop_statements(table_name: str) -> List[str]:
+    fts = fts_table_name(table_name)
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def fts5_available(connection: Connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    return bool(
+        connection.exec_driver_sql(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).scalar()
+    )
+
+
+def register_fulltext(
+    table: FromClause, columns: Union[Sequence[str], Mapping[str, str]]
+) -> None:
+    """Create/drop the FTS5 mirror of ``table`` alongside ``create_all``.
+
+    ``columns`` names the indexed columns, or maps FTS columns to derived
+    expressions (see ``fts_derived_create_statements``). Other databases get
+    nothing here; searches fall back to substring matching when the FTS
+    table is missing.
+    """
+
+    def _create(target: FromClause, connection: Connection, **_: Any) -> None:
+        if fts5_available(connection):
+            statements = (
+                fts_derived_create_statements(table.description, columns)
+                if isinstance(columns, Mapping)
+                else fts_create_statements(table.description, columns)
+            )
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+
+    def _drop(target: FromClause, connection: Connection, **_: Any) -> None:
+        if connection.dialect.name == "sqlite":
+            for statement in fts_drop_statements(table.description):
+                connection.exec_driver_sql(statement)
+
+    event.listen(table, "after_create", _create)
+    event.listen(table, "before_drop", _drop)
@@ -1,30 +1,39 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass, field
+from itertools import count
 import json
 from pathlib import Path
 import re
-import subprocess
 from typing import Any, Optional
 import zipfile
 from xml.etree import ElementTree as ET
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, raiseload
 
+from backend.config.settings import settings
 from backend.models.document import Document
 from backend.services.campaign_note_import_service import (
     ParsedEntityNote,
     campaign_note_import_service,
 )
 from backend.services.campaign_service import campaign_service
+from backend.services.content_embedding_cache import content_embedding_cache
+from backend.services.embedding_service import embedding_service
 from backend.services.ingestion_governance import ingestion_governance_service
-from backend.services.ingestion_service import ingestion_service
+from backend.services.ingestion_service import DocumentInput, ingestion_service
 from backend.services.pc_sheet_import_service import (
     ParsedPCSheet,
     pc_sheet_import_service,
 )
+from backend.services.pdf_text_extractor import pdf_text_extractor
 from backend.services.session_update_service import session_update_service
+from backend.services.staged_pipeline import PipelineStage, StagedPipeline
+
+REFERENCE_DOCUMENT_TYPES = {"guide", "local_reference", "rule"}
 
 
 @dataclass(frozen=True)
@@ -162,10 +171,10 @@ class CampaignAssetImportService:
         store_documents: bool = True,
         stop_on_error: bool = False,
     ) -> dict[str, Any]:
-        candidates, failed_files = await self._load_candidates(
-            db, root_path=root_path, categories=categories
-        )
         if dry_run:
+            candidates, failed_files = await self._load_candidates(
+                db, root_path=root_path, categories=categories
+            )
             return self._build_batch_response(
                 root_path=self._resolve_root(root_path),
                 dry_run=True,
@@ -174,43 +183,227 @@ class CampaignAssetImportService:
                 imported_results=[],
                 failed_files=failed_files,
             )
+        return await self._import_pipeline(
+            db,
+            root=self._resolve_root(root_path),
+            categories=self._normalize_categories(categories),
+            store_documents=store_documents,
+            stop_on_error=stop_on_error,
+        )
 
-        imported_results: list[dict[str, Any]] = []
-        for candidate in candidates:
-            try:
-                imported_results.append(
-                    await self._import_candidate(
-                        db,
-                        candidate,
-                        store_documents=store_documents,
+    async def _import_pipeline(
+        self,
+        db: AsyncSession,
+        *,
+        root: Path,
+        categories: list[str],
+        store_documents: bool,
+        stop_on_error: bool,
+    ) -> dict[str, Any]:
+        """Import a drop zone as discover -> parse -> chunk -> embed -> persist.
+
+        Document files (guides, references, rules) flow through all stages
+        while later files are still being parsed. The embed stage fills the
+        content embedding cache for whole batches of documents, and persist
+        writes each batch with ``ingest_documents_bulk`` in one commit. Entity
+        files (notes, PC sheets, session logs) resolve references against the
+        whole batch, so they are imported in discovery order once the pipeline
+        has drained. A batch that fails to persist is rolled back and retried
+        one document at a time, so only the offending files fail.
+
+        With ``stop_on_error``, files discovered after the first failed import
+        are skipped when they reach parse or persist, and entity files
+        discovered before it are still imported. Entity files are imported
+        after the drain, so a failing entity file only stops the entity files
+        after it: document files discovered later have already been persisted
+        by then, unlike in a sequential import. Unparseable files only land in
+        ``failed_files`` and never stop a batch.
+        """
+        db_lock = asyncio.Lock()
+        sequence = count()
+        candidates: dict[int, ParsedAssetCandidate] = {}
+        entity_candidates: dict[int, ParsedAssetCandidate] = {}
+        results: dict[int, dict[str, Any]] = {}
+        failed_files: dict[int, dict[str, Any]] = {}
+        first_failure: Optional[int] = None
+
+        def _skipped(seq: int) -> bool:
+            return first_failure is not None and seq > first_failure
+
+        def _fail(seq: int, candidate: ParsedAssetCandidate, exc: Exception) -> None:
+            nonlocal first_failure
+            results[seq] = self._failed_candidate_payload(candidate, exc)
+            if stop_on_error and (first_failure is None or seq < first_failure):
+                first_failure = seq
+                pipeline.stop()
+
+        async def _discover(configs: list[DropZoneConfig]) -> list[Any]:
+            found = []
+            for config in configs:
+                for path in await asyncio.to_thread(
+                    self._discover_folder, root, config
+                ):
+                    found.append((next(sequence), path, config))
+            return found
+
+        async def _parse(items: list[Any]) -> list[Any]:
+            passed = []
+            for seq, path, config in items:
+                if _skipped(seq):
+                    continue
+                try:
+                    candidate = await asyncio.to_thread(
+                        self._parse_candidate, path, config, root=root
                     )
+                except (OSError, UnicodeDecodeError, ValueError) as exc:
+                    failed_files[seq] = self._failed_file_payload(
+                        path, config, root=root, error=exc
+                    )
+                    continue
+                candidates[seq] = candidate
+                if candidate.import_type not in REFERENCE_DOCUMENT_TYPES:
+                    entity_candidates[seq] = candidate
+                elif not store_documents:
+                    results[seq] = self._skipped_reference_payload(candidate)
+                else:
+                    passed.append((seq, candidate))
+            return passed
+
+        async def _chunk(items: list[Any]) -> list[Any]:
+            chunked = []
+            for seq, candidate in items:
+                document = self._reference_document_input(candidate)
+                document.chunks = await asyncio.to_thread(
+                    ingestion_service.chunk_strategy.chunk, document.content
                 )
-            except (LookupError, OSError, UnicodeDecodeError, ValueError) as exc:
-                imported_results.append(
-                    {
-                        "path": candidate.relative_path,
-                        "category": candidate.category,
-                        "import_type": candidate.import_type,
-                        "import_format": candidate.import_format,
-                        "title": candidate.title,
-                        "status": "failed",
-                        "error": str(exc),
-                        "warnings": list(candidate.warnings),
-                        "preview": candidate.preview,
-                        "parsed_summary": candidate.parsed_summary,
-                    }
+                chunked.append((seq, candidate, document))
+            return chunked
+
+        async def _embed(items: list[Any]) -> list[Any]:
+            if content_embedding_cache.enabled:
+                texts: list[str] = []
+                for _, _, document in items:
+                    texts.append(
+                        embedding_service.create_document_text(document.columns())
+                    )
+                    texts.extend(document.chunks or [])
+                # Persist reads these vectors back from the content cache;
+                # committed here, so a failed persist batch cannot roll them
+                # back with its documents.
+                await content_embedding_cache.embed_texts(
+                    db,
+                    texts,
+                    batch_size=settings.max_embedding_batch_size,
+                    db_lock=db_lock,
+                    commit=True,
+                )
+            return items
+
+        async def _persist_each(
+            items: list[Any],
+        ) -> dict[tuple[str, Optional[str]], tuple[Document, bool]]:
+            stored = {}
+            for seq, candidate, document in items:
+                if _skipped(seq):
+                    continue
+                try:
+                    stored.update(
+                        await self._persist_reference_documents(db, [document])
+                    )
+                except (LookupError, OSError, UnicodeDecodeError, ValueError) as exc:
+                    await db.rollback()
+                    _fail(seq, candidate, exc)
+            return stored
+
+        async def _persist(items: list[Any]) -> list[Any]:
+            items = sorted(
+                (item for item in items if not _skipped(item[0])),
+                key=lambda item: item[0],
+            )
+            if not items:
+                return []
+            async with db_lock:
+                try:
+                    stored = await self._persist_reference_documents(
+                        db, [document for _, _, document in items]
+                    )
+                except (LookupError, OSError, UnicodeDecodeError, ValueError):
+                    # Retry alone so one bad file does not fail its batch.
+                    await db.rollback()
+                    stored = await _persist_each(items)
+            persisted = []
+            for seq, candidate, document in items:
+                key = (document.kind, document.url)
+                if seq in results or key not in stored:
+                    continue
+                stored_document, created = stored[key]
+                results[seq] = self._imported_reference_payload(
+                    candidate, stored_document, created=created
                 )
-                if stop_on_error:
-                    break
+                persisted.append((seq, candidate, document))
+            return persisted
+
+        batch_size = max(1, settings.asset_import_batch_size)
+        pipeline = StagedPipeline(
+            [
+                PipelineStage("discover", _discover),
+                PipelineStage(
+                    "parse",
+                    _parse,
+                    concurrency=max(1, settings.asset_import_parse_concurrency),
+                ),
+                PipelineStage("chunk", _chunk),
+                PipelineStage(
+                    "embed",
+                    _embed,
+                    concurrency=max(1, settings.asset_import_embed_concurrency),
+                    batch_size=batch_size,
+                ),
+                PipelineStage("persist", _persist, batch_size=batch_size),
+            ],
+            queue_size=settings.asset_import_queue_size,
+            metrics_prefix="campaign.import",
+        )
+        stats = await pipeline.run(self.drop_zones[category] for category in categories)
 
-        return self._build_batch_response(
-            root_path=self._resolve_root(root_path),
+        ordered = [
+            (seq, candidate)
+            for seq, candidate in sorted(entity_candidates.items())
+            if not _skipped(seq)
+        ]
+        predicted_refs = self._collect_predicted_refs(
+            [candidate for _, candidate in ordered]
+        )
+        for _, candidate in ordered:
+            candidate.warnings.extend(
+                await self._preview_reference_warnings(
+                    db,
+                    candidate.reference_checks,
+                    predicted_refs=predicted_refs,
+                )
+            )
+        for seq, candidate in ordered:
+            if _skipped(seq):
+                break
+            try:
+                results[seq] = await self._import_candidate(
+                    db,
+                    candidate,
+                    store_documents=store_documents,
+                )
+            except (LookupError, OSError, UnicodeDecodeError, ValueError) as exc:
+                _fail(seq, candidate, exc)
+
+        response = self._build_batch_response(
+            root_path=root,
             dry_run=False,
             store_documents=store_documents,
-            candidates=candidates,
-            imported_results=imported_results,
-            failed_files=failed_files,
+            candidates=[candidates[seq] for seq in sorted(candidates)],
+            imported_results=[results[seq] for seq in sorted(results)],
+            failed_files=[failed_files[seq] for seq in sorted(failed_files)],
         )
+        response["pipeline"] = stats
+        return response
 
     async def _load_candidates(
         self,
@@ -220,28 +413,32 @@ class CampaignAssetImportService:
         categories: Optional[list[str]],
     ) -> tuple[list[ParsedAssetCandidate], list[dict[str, Any]]]:
         root = self._resolve_root(root_path)
-        discovered = self._discover_files(root, categories=categories)
+        discovered = await asyncio.to_thread(
+            self._discover_files, root, categories=categories
+        )
+        slots = asyncio.Semaphore(max(1, settings.asset_import_parse_concurrency))
+
+        async def _parse(
+            path: Path, config: DropZoneConfig
+        ) -> ParsedAssetCandidate | dict[str, Any]:
+            # Parsing reads files and may run pdftotext; keep it off the loop.
+            async with slots:
+                try:
+                    return await asyncio.to_thread(
+                        self._parse_candidate, path, config, root=root
+                    )
+                except (OSError, UnicodeDecodeError, ValueError) as exc:
+                    return self._failed_file_payload(path, config, root=root, error=exc)
+
         candidates: list[ParsedAssetCandidate] = []
         failed_files: list[dict[str, Any]] = []
-        for path, config in discovered:
-            relative_path = path.relative_to(root).as_posix()
-            try:
-                candidates.append(self._parse_candidate(path, config, root=root))
-            except (OSError, UnicodeDecodeError, ValueError) as exc:
-                failed_files.append(
-                    {
-                        "path": relative_path,
-                        "category": config.category,
-                        "import_type": config.import_type,
-                        "import_format": config.import_type,
-                        "title": self._humanize_stem(path.stem),
-                        "status": "failed",
-                        "error": str(exc),
-                        "warnings": [],
-                        "preview": {},
-                        "parsed_summary": {},
-                    }
-                )
+        for parsed in await asyncio.gather(
+            *(_parse(path, config) for path, config in discovered)
+        ):
+            if isinstance(parsed, ParsedAssetCandidate):
+                candidates.append(parsed)
+            else:
+                failed_files.append(parsed)
         predicted_refs = self._collect_predicted_refs(candidates)
         for candidate in candidates:
             candidate.warnings.extend(
@@ -263,19 +460,58 @@ class CampaignAssetImportService:
         discovered: list[tuple[Path, DropZoneConfig]] = []
         for category in normalized_categories:
             config = self.drop_zones[category]
-            folder = root / config.folder_name
-            if not folder.exists():
+            discovered.extend(
+                (path, config) for path in self._discover_folder(root, config)
+            )
+        return discovered
+
+    def _discover_folder(self, root: Path, config: DropZoneConfig) -> list[Path]:
+        folder = root / config.folder_name
+        if not folder.exists():
+            return []
+        discovered: list[Path] = []
+        for path in sorted(folder.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
                 continue
-            for path in sorted(folder.rglob("*")):
-                if not path.is_file() or path.name.startswith("."):
-                    continue
-                if path.stem.lower() == "readme":
-                    continue
-                if path.suffix.lower() not in config.allowed_suffixes:
-                    continue
-                discovered.append((path, config))
+            if path.stem.lower() == "readme":
+                continue
+            if path.suffix.lower() not in config.allowed_suffixes:
+                continue
+            discovered.append(path)
         return discovered
 
+    def _failed_file_payload(
+        self, path: Path, config: DropZoneConfig, *, root: Path, error: Exception
+    ) -> dict[str, Any]:
+        return {
+            "path": path.relative_to(root).as_posix(),
+            "category": config.category,
+            "import_type": config.import_type,
+            "import_format": config.import_type,
+            "title": self._humanize_stem(path.stem),
+            "status": "failed",
+            "error": str(error),
+            "warnings": [],
+            "preview": {},
+            "parsed_summary": {},
+        }
+
+    def _failed_candidate_payload(
+        self, candidate: ParsedAssetCandidate, error: Exception
+    ) -> dict[str, Any]:
+        return {
+            "path": candidate.relative_path,
+            "category": candidate.category,
+            "import_type": candidate.import_type,
+            "import_format": candidate.import_format,
+            "title": candidate.title,
+            "status": "failed",
+            "error": str(error),
+            "warnings": list(candidate.warnings),
+            "preview": candidate.preview,
+            "parsed_summary": candidate.parsed_summary,
+        }
+
     def _parse_candidate(
         self, path: Path, config: DropZoneConfig, *, root: Path
     ) -> ParsedAssetCandidate:
@@ -627,12 +863,6 @@ class CampaignAssetImportService:
                 store_document=store_documents,
                 document_governance=candidate.document_governance,
             )
-        elif candidate.import_type in {"guide", "local_reference", "rule"}:
-            return await self._import_reference_document_candidate(
-                db,
-                candidate,
-                store_documents=store_documents,
-            )
         else:
             raise ValueError(f"Unsupported import type '{candidate.import_type}'")
 
@@ -738,50 +968,74 @@ class CampaignAssetImportService:
                 )
         return warnings
 
-    async def _import_reference_document_candidate(
-        self,
-        db: AsyncSession,
-        candidate: ParsedAssetCandidate,
-        *,
-        store_documents: bool,
-    ) -> dict[str, Any]:
-        warnings = list(candidate.warnings)
-        document_kind = candidate.document_kind or "guide"
-        if not store_documents:
-            warnings.append(
-                f"{document_kind.title()} imports are document-only, so this file was skipped because store_documents=false."
-            )
-            return {
-                "path": candidate.relative_path,
-                "category": candidate.category,
-                "import_type": candidate.import_type,
-                "import_format": candidate.import_format,
-                "title": candidate.title,
-                "status": "skipped",
-                "summary": {"skipped_documents": 1},
-                "warnings": warnings,
-                "document": None,
-                "preview": candidate.preview,
-                "parsed_summary": candidate.parsed_summary,
-            }
-
-        existing = await self._get_document_by_url(
-            db,
-            kind=document_kind,
-            url=candidate.document_url,
-        )
-        stored_document = await ingestion_service.ingest_document(
-            db,
+    def _reference_document_input(
+        self, candidate: ParsedAssetCandidate
+    ) -> DocumentInput:
+        return DocumentInput(
             title=candidate.title,
-            kind=document_kind,
+            kind=candidate.document_kind or "guide",
             content=candidate.content,
             summary=self._reference_document_summary(candidate),
             source_name=candidate.source_name,
             url=candidate.document_url,
-            dedupe_on_url=True,
             **candidate.document_governance,
         )
 
+    async def _persist_reference_documents(
+        self, db: AsyncSession, documents: list[DocumentInput]
+    ) -> dict[tuple[str, Optional[str]], tuple[Document, bool]]:
+        """Store one batch in a single commit; maps ``(kind, url)`` to the
+        stored document and whether it was created."""
+        keys = {(document.kind, document.url) for document in documents}
+        urls = {url for _, url in keys if url}
+        existing = {
+            (row.kind, row.url)
+            for row in (
+                await db.execute(
+                    select(Document.kind, Document.url).where(Document.url.in_(urls))
+                )
+            ).all()
+        }
+        await ingestion_service.ingest_documents_bulk(
+            db, documents, batch_size=len(documents)
+        )
+        stmt = (
+            select(Document)
+            .options(defer(Document.content), raiseload(Document.chunks))
+            .where(Document.url.in_(urls))
+            .order_by(Document.id)
+        )
+        stored: dict[tuple[str, Optional[str]], tuple[Document, bool]] = {}
+        for document in (await db.execute(stmt)).scalars().all():
+            key = (document.kind, document.url)
+            if key in keys and key not in stored:
+                stored[key] = (document, key not in existing)
+        return stored
+
+    def _skipped_reference_payload(
+        self, candidate: ParsedAssetCandidate
+    ) -> dict[str, Any]:
+        document_kind = candidate.document_kind or "guide"
+        return {
+            "path": candidate.relative_path,
+            "category": candidate.category,
+            "import_type": candidate.import_type,
+            "import_format": candidate.import_format,
+            "title": candidate.title,
+            "status": "skipped",
+            "summary": {"skipped_documents": 1},
+            "warnings": [
+                *candidate.warnings,
+                f"{document_kind.title()} imports are document-only, so this file was skipped because store_documents=false.",
+            ],
+            "document": None,
+            "preview": candidate.preview,
+            "parsed_summary": candidate.parsed_summary,
+        }
+
+    def _imported_reference_payload(
+        self, candidate: ParsedAssetCandidate, document: Document, *, created: bool
+    ) -> dict[str, Any]:
         return {
             "path": candidate.relative_path,
             "category": candidate.category,
@@ -790,22 +1044,15 @@ class CampaignAssetImportService:
             "title": candidate.title,
             "status": "imported",
             "summary": {
-                "created_documents": 1 if existing is None else 0,
-                "updated_documents": 0 if existing is None else 1,
+                "created_documents": 1 if created else 0,
+                "updated_documents": 0 if created else 1,
             },
-            "warnings": warnings,
-            "document": self._document_payload(stored_document),
+            "warnings": list(candidate.warnings),
+            "document": self._document_payload(document),
             "preview": candidate.preview,
             "parsed_summary": candidate.parsed_summary,
         }
 
-    async def _get_document_by_url(
-        self, db: AsyncSession, *, kind: str, url: str
-    ) -> Optional[Document]:
-        stmt = select(Document).where(Document.kind == kind).where(Document.url == url)
-        result = await db.execute(stmt)
-        return result.scalar_one_or_none()
-
     def _document_payload(self, document: Document) -> dict[str, Any]:
         return {
             "id": document.id,
@@ -964,23 +1211,7 @@ class CampaignAssetImportService:
         return content, len(rendered_sheets), non_empty_row_count
 
     def _extract_pdf_text(self, path: Path) -> tuple[str, int]:
-        try:
-            result = subprocess.run(
-                ["pdftotext", "-layout", str(path), "-"],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        except FileNotFoundError as exc:
-            raise ValueError(
-                "PDF import requires the local 'pdftotext' command to be installed."
-            ) from exc
-        except subprocess.CalledProcessError as exc:
-            stderr = (exc.stderr or "").strip()
-            message = stderr or "pdftotext failed to extract PDF text."
-            raise ValueError(message) from exc
-
-        content = self._normalize_pdf_text(result.stdout)
+        content = self._normalize_pdf_text(pdf_text_extractor.extract(path))
         if not content:
             raise ValueError("No importable reference content found in PDF.")
         non_empty_lines = sum(1 for line in content.splitlines() if line.strip())
@@ -1,18 +1,44 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
+from datetime import datetime
+from time import perf_counter
 from typing import Any, Iterable, Optional
 
-from sqlalchemy import and_, or_, select
+from sqlalchemy import (
+    ColumnElement,
+    Subquery,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+)
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import joinedload, load_only, noload, selectinload
 
 from backend.models.campaign import (
     CampaignEntity,
+    CampaignEntityLanguage,
     CampaignRelationship,
     CharacterSheetVersion,
 )
 from backend.models.document import Document
+from backend.services.entity_graph_cache import (
+    REF_FIELDS,
+    EntityGraph,
+    entity_graph_cache,
+)
+from backend.services.keyword_index_service import keyword_index_service
+from backend.services.metrics_service import metrics_service
 
 
 class CampaignService:
@@ -77,10 +103,13 @@ class CampaignService:
             owner_entity_id=owner_entity_id,
         )
         db.add(entity)
-        await self._commit(db, "Campaign entity already exists")
+        generation = await self._commit(
+            db, "Campaign entity already exists", languages_of=entity, graph_write=True
+        )
         loaded = await self.get_entity(entity.id, db)
         if loaded is None:
             raise LookupError("Campaign entity was created but could not be reloaded")
+        self._cache_entity(db, generation, loaded)
         return loaded
 
     async def update_entity(
@@ -144,18 +173,31 @@ class CampaignService:
         elif owner_entity_id is not None:
             entity.owner_entity_id = owner_entity_id
 
-        await self._commit(db, "Campaign entity update conflicts with existing data")
+        generation = await self._commit(
+            db,
+            "Campaign entity update conflicts with existing data",
+            languages_of=entity if details is not None else None,
+            graph_write=True,
+        )
         loaded = await self.get_entity(entity.id, db)
         if loaded is None:
             raise LookupError("Campaign entity disappeared during update")
+        self._cache_entity(db, generation, loaded)
         return loaded
 
     async def delete_entity(self, entity_id: int, db: AsyncSession) -> bool:
         entity = await self.get_entity(entity_id, db)
         if entity is None:
             return False
+        await db.execute(
+            delete(CampaignEntityLanguage).where(
+                CampaignEntityLanguage.entity_id == entity_id
+            )
+        )
         await db.delete(entity)
+        generation = await entity_graph_cache.bump(db)
         await db.commit()
+        entity_graph_cache.remove_entity(db, generation, entity_id)
         return True
 
     async def get_entity(
@@ -272,43 +314,64 @@ class CampaignService:
         is_active: Optional[bool] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
     ) -> dict[str, Any]:
-        stmt = select(CampaignEntity).options(*self._entity_loader_options())
+        """One page of entities ordered by ``(entity_type, name, id)``.
+
+        With the FTS5 index, ``q`` matches every word as a prefix across the
+        text fields, tags and ``details`` values, and results are ordered by
+        bm25 rank instead; other databases fall back to ``ILIKE``. ``cursor``
+        is the ``next_cursor`` of a previous page; when given it replaces
+        ``page`` and the page starts right after that entity.
+        """
+        conditions: list[Any] = []
         if entity_type:
-            stmt = stmt.where(
+            conditions.append(
                 CampaignEntity.entity_type == self._normalize_entity_type(entity_type)
             )
-        if q:
-            like = f"%{q.strip()}%"
-            stmt = stmt.where(
-                or_(
-                    CampaignEntity.name.ilike(like),
-                    CampaignEntity.stable_key.ilike(like),
-                    CampaignEntity.summary.ilike(like),
-                    CampaignEntity.description.ilike(like),
+        matches = None
+        if q and q.strip():
+            match = keyword_index_service.prefix_match_expression(q)
+            if match is not None and await keyword_index_service.entities_available(db):
+                matches = keyword_index_service.entity_matches(match)
+            else:
+                like = f"%{q.strip()}%"
+                conditions.append(
+                    or_(
+                        CampaignEntity.name.ilike(like),
+                        CampaignEntity.stable_key.ilike(like),
+                        CampaignEntity.summary.ilike(like),
+                        CampaignEntity.description.ilike(like),
+                    )
+                )
+        if language and language.strip():
+            conditions.append(
+                CampaignEntity.id.in_(
+                    select(CampaignEntityLanguage.entity_id).where(
+                        CampaignEntityLanguage.language == language.strip().casefold()
+                    )
                 )
             )
         if current_location_id is not None:
-            stmt = stmt.where(CampaignEntity.current_location_id == current_location_id)
+            conditions.append(CampaignEntity.current_location_id == current_location_id)
         if owner_entity_id is not None:
-            stmt = stmt.where(CampaignEntity.owner_entity_id == owner_entity_id)
+            conditions.append(CampaignEntity.owner_entity_id == owner_entity_id)
         if is_active is not None:
-            stmt = stmt.where(CampaignEntity.is_active == is_active)
+            conditions.append(CampaignEntity.is_active == is_active)
 
         if relationship_type or related_entity_id is not None:
-            stmt = stmt.join(
-                CampaignRelationship,
+            relationship_match: list[Any] = [
                 or_(
                     CampaignRelationship.source_entity_id == CampaignEntity.id,
                     CampaignRelationship.target_entity_id == CampaignEntity.id,
-                ),
-            )
+                )
+            ]
             if relationship_type:
-                stmt = stmt.where(
+                relationship_match.append(
                     CampaignRelationship.relationship_type == relationship_type.strip()
                 )
             if related_entity_id is not None:
-                stmt = stmt.where(
+                relationship_match.append(
                     or_(
                         and_(
                             CampaignRelationship.source_entity_id == CampaignEntity.id,
@@ -319,31 +382,58 @@ class CampaignService:
                             CampaignRelationship.source_entity_id == related_entity_id,
                         ),
                     )
-                ).where(CampaignEntity.id != related_entity_id)
+                )
+                conditions.append(CampaignEntity.id != related_entity_id)
+            conditions.append(
+                select(CampaignRelationship.id).where(*relationship_match).exists()
+            )
 
-        stmt = stmt.order_by(CampaignEntity.entity_type, CampaignEntity.name)
-        result = await db.execute(stmt)
-        entities = list(result.scalars().unique().all())
+        sort_columns: tuple[Any, ...] = (
+            CampaignEntity.entity_type,
+            CampaignEntity.name,
+            CampaignEntity.id,
+        )
+        count_stmt = select(func.count()).select_from(CampaignEntity)
+        stmt = select(CampaignEntity)
+        if matches is not None:
+            sort_columns = (matches.c.rank, CampaignEntity.id)
+            count_stmt = count_stmt.join(
+                matches, matches.c.entity_id == CampaignEntity.id
+            )
+            stmt = stmt.join(matches, matches.c.entity_id == CampaignEntity.id)
 
-        if language:
-            language_key = language.strip().casefold()
-            entities = [
-                entity
-                for entity in entities
-                if self._entity_languages(entity)
-                and language_key in self._entity_languages(entity)
-            ]
+        total = await db.scalar(count_stmt.where(*conditions)) or 0
+        stmt = (
+            stmt.add_columns(*sort_columns)
+            .where(*conditions)
+            .options(*self._entity_loader_options())
+            .order_by(*sort_columns)
+            .limit(page_size + 1)
+        )
+        if cursor:
+            stmt = stmt.where(
+                self._keyset_after(
+                    sort_columns, self._decode_cursor(cursor, len(sort_columns))
+                )
+            )
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        rows = (await db.execute(stmt)).unique().all()
+        entities = [row[0] for row in rows]
+        next_cursor = (
+            self._encode_cursor(rows[page_size - 1][1:])
+            if len(rows) > page_size
+            else None
+        )
 
-        total = len(entities)
         pages = (total + page_size - 1) // page_size if page_size > 0 else 1
-        start = (page - 1) * page_size
-        end = start + page_size
         return {
-            "items": [self.entity_to_dict(entity) for entity in entities[start:end]],
+            "items": [self.entity_to_dict(entity) for entity in entities[:page_size]],
             "total": total,
             "page": page,
             "page_size": page_size,
             "pages": pages,
+            "next_cursor": next_cursor,
         }
 
     async def create_relationship(
@@ -371,7 +461,9 @@ class CampaignService:
             notes=notes,
         )
         db.add(relationship)
-        await self._commit(db, "Relationship already exists")
+        generation = await self._commit(
+            db, "Relationship already exists", graph_write=True
+        )
 
         stmt = (
             select(CampaignRelationship)
@@ -385,6 +477,14 @@ class CampaignService:
         loaded = result.scalars().one_or_none()
         if loaded is None:
             raise LookupError("Relationship was created but could not be reloaded")
+        entity_graph_cache.add_relationship(
+            db,
+            generation,
+            loaded.id,
+            loaded.source_entity_id,
+            loaded.target_entity_id,
+            loaded.relationship_type,
+        )
         return loaded
 
     async def ensure_relationship(
@@ -452,6 +552,125 @@ class CampaignService:
         )
         return relationships
 
+    async def get_neighborhood(
+        self,
+        entity_id: int,
+        db: AsyncSession,
+        *,
+        depth: int = 1,
+        relationship_types: Optional[Iterable[str]] = None,
+    ) -> dict[str, Any]:
+        """Entities within ``depth`` relationship hops, as compact nodes and edges.
+
+        One recursive CTE walks ``campaign_relationships`` in both directions
+        (only ``relationship_types`` when given); nodes carry their hop
+        distance and edges are the relationships among the reached nodes.
+        Only the columns returned are selected.
+        """
+        if depth < 0:
+            raise ValueError("depth must not be negative")
+        types = sorted(
+            {value.strip() for value in relationship_types or [] if value.strip()}
+        )
+
+        reach = select(
+            literal(entity_id).label("entity_id"), literal(0).label("depth")
+        ).cte("reach", recursive=True)
+        hop = (
+            select(
+                case(
+                    (
+                        CampaignRelationship.source_entity_id == reach.c.entity_id,
+                        CampaignRelationship.target_entity_id,
+                    ),
+                    else_=CampaignRelationship.source_entity_id,
+                ),
+                reach.c.depth + 1,
+            )
+            .select_from(reach)
+            .join(
+                CampaignRelationship,
+                or_(
+                    CampaignRelationship.source_entity_id == reach.c.entity_id,
+                    CampaignRelationship.target_entity_id == reach.c.entity_id,
+                ),
+            )
+            .where(reach.c.depth < depth)
+        )
+        if types:
+            hop = hop.where(CampaignRelationship.relationship_type.in_(types))
+        reach = reach.union(hop)
+        distances = (
+            select(reach.c.entity_id, func.min(reach.c.depth).label("depth"))
+            .group_by(reach.c.entity_id)
+            .subquery()
+        )
+        node_rows = (
+            await db.execute(
+                select(
+                    CampaignEntity.id,
+                    CampaignEntity.stable_key,
+                    CampaignEntity.entity_type,
+                    CampaignEntity.name,
+                    distances.c.depth,
+                )
+                .join(distances, distances.c.entity_id == CampaignEntity.id)
+                .order_by(
+                    distances.c.depth,
+                    CampaignEntity.entity_type,
+                    CampaignEntity.name,
+                    CampaignEntity.id,
+                )
+            )
+        ).all()
+        if not node_rows:
+            raise LookupError("Campaign entity not found")
+
+        node_ids = [row.id for row in node_rows]
+        edge_stmt = (
+            select(
+                CampaignRelationship.id,
+                CampaignRelationship.source_entity_id,
+                CampaignRelationship.target_entity_id,
+                CampaignRelationship.relationship_type,
+                CampaignRelationship.strength,
+            )
+            .where(CampaignRelationship.source_entity_id.in_(node_ids))
+            .where(CampaignRelationship.target_entity_id.in_(node_ids))
+            .order_by(CampaignRelationship.id)
+        )
+        if types:
+            edge_stmt = edge_stmt.where(
+                CampaignRelationship.relationship_type.in_(types)
+            )
+        edge_rows = (await db.execute(edge_stmt)).all()
+
+        return {
+            "entity_id": entity_id,
+            "depth": depth,
+            "relationship_types": types,
+            "nodes": [
+                {
+                    "id": row.id,
+                    "stable_key": row.stable_key,
+                    "entity_type": row.entity_type,
+                    "name": row.name,
+                    "depth": row.depth,
+                }
+                for row in node_rows
+            ],
+            "edges": [
+                {
+                    "id": row.id,
+                    "source_entity_id": row.source_entity_id,
+                    "target_entity_id": row.target_entity_id,
+                    "relationship_type": row.relationship_type,
+                    "strength": row.strength,
+                }
+                for row in edge_rows
+            ],
+        }
+
     async def add_sheet_version(
         self,
         entity_id: int,
@@ -480,7 +699,12 @@ class CampaignService:
         )
         db.add(version)
         entity.details = self._sync_pc_details(entity.details, payload)
-        await self._commit(db, "Character sheet version conflicts with existing data")
+        generation = await self._commit(
+            db,
+            "Character sheet version conflicts with existing data",
+            languages_of=entity,
+            graph_write=True,
+        )
 
         stmt = (
             select(CharacterSheetVersion)
@@ -493,6 +717,9 @@ class CampaignService:
             raise LookupError(
                 "Character sheet version was created but could not be reloaded"
             )
+        # ``entity.sheet_versions`` was loaded before the insert, so the new
+        # version is passed explicitly.
+        self._cache_entity(db, generation, entity, latest_sheet_version=loaded)
         return loaded
 
     async def list_sheet_versions(
@@ -508,16 +735,19 @@ class CampaignService:
         ]
 
     async def get_overview(self, db: AsyncSession) -> dict[str, Any]:
-        result = await db.execute(
-            select(CampaignEntity).options(*self._entity_loader_options())
-        )
-        entities = list(result.scalars().unique().all())
-        entities.sort(key=lambda entity: (entity.entity_type, entity.name))
-        grouped: dict[str, list[dict[str, Any]]] = {}
-        for entity in entities:
-            grouped.setdefault(entity.entity_type, []).append(
-                self.entity_to_dict(entity)
-            )
+        start = perf_counter()
+        graph = await entity_graph_cache.get(db)
+        if graph is None:
+            graph = await self._load_entity_graph(db)
+            operation = "campaign.graph_cache.miss"
+        else:
+            operation = "campaign.graph_cache.hit"
+        grouped = {
+            entity_type: items
+            for entity_type in sorted(graph.by_type)
+            if (items := graph.entities_of_type(entity_type))
+        }
+        metrics_service.record(operation, latency_ms=(perf_counter() - start) * 1000)
 
         counts = {entity_type: len(items) for entity_type, items in grouped.items()}
         return {
@@ -590,82 +820,115 @@ class CampaignService:
         page: int = 1,
         page_size: int = 20,
     ) -> dict[str, Any]:
-        event_result = await db.execute(
-            select(CampaignEntity)
-            .where(CampaignEntity.entity_type == "event")
-            .options(*self._entity_loader_options())
-        )
-        events = list(event_result.scalars().unique().all())
-
-        document_result = await db.execute(
-            select(Document)
-            .where(Document.kind == "session_log")
-            .order_by(Document.updated_at.desc())
-        )
-        documents = list(document_result.scalars().all())
-
-        documents_by_title: dict[str, list[Document]] = {}
-        for document in documents:
-            documents_by_title.setdefault(document.title.strip().casefold(), []).append(
-                document
+        """Events and session logs, newest first, one page at a time.
+
+        Each event is paired with an unmatched ``session_log`` of the same
+        title (newest log first); leftover logs are listed on their own. The
+        pairing, ``q`` filter, count and page window all run in SQL, and only
+        the page's events and documents are loaded, without document content.
+        """
+        history = self._session_history_query()
+        stmt = select(history.c.event_id, history.c.document_id)
+        if q and q.strip():
+            like = "%{}%".format(
+                q.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
             )
-
-        items: list[dict[str, Any]] = []
-        matched_document_ids: set[int] = set()
-        for event in events:
-            matched_document = None
-            candidates = documents_by_title.get(event.name.strip().casefold(), [])
-            for document in candidates:
-                if document.id not in matched_document_ids:
-                    matched_document = document
-                    matched_document_ids.add(document.id)
-                    break
-
-            item = {
-                "title": event.name,
-                "event": self.entity_to_dict(event),
-                "document": self._document_ref(matched_document),
-                "timeline_position": (event.details or {}).get("timeline_position"),
-                "scheduled_for": (event.details or {}).get("scheduled_for"),
-                "summary": event.summary,
-                "_sort_at": max(
-                    event.updated_at,
-                    (
-                        matched_document.updated_at
-                        if matched_document
-                        else event.updated_at
+            stmt = stmt.where(
+                or_(
+                    *(
+                        history.c[column].ilike(like, escape="\\")
+                        for column in (
+                            "event_name",
+                            "event_summary",
+                            "timeline_position",
+                            "scheduled_for",
+                            "document_title",
+                            "document_summary",
+                            "document_source_name",
+                        )
+                    )
+                )
+            )
+        total = await db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
+        rows = (
+            await db.execute(
+                stmt.order_by(
+                    history.c.sort_at.desc(),
+                    history.c.event_id.desc(),
+                    history.c.document_id.desc(),
+                )
+                .limit(page_size)
+                .offset((page - 1) * page_size)
+            )
+        ).all()
+
+        event_ids = [row.event_id for row in rows if row.event_id is not None]
+        document_ids = [row.document_id for row in rows if row.document_id is not None]
+        events: dict[int, CampaignEntity] = {}
+        if event_ids:
+            event_result = await db.execute(
+                select(CampaignEntity)
+                .where(CampaignEntity.id.in_(event_ids))
+                .options(*self._entity_loader_options())
+            )
+            events = {event.id: event for event in event_result.scalars().unique()}
+        documents: dict[int, Document] = {}
+        if document_ids:
+            document_result = await db.execute(
+                select(Document)
+                .where(Document.id.in_(document_ids))
+                .options(
+                    load_only(
+                        Document.id,
+                        Document.title,
+                        Document.kind,
+                        Document.summary,
+                        Document.source_name,
+                        Document.url,
+                        Document.created_at,
+                        Document.updated_at,
                     ),
-                ),
+                    noload(Document.chunks),
+                )
+            )
+            documents = {
+                document.id: document for document in document_result.scalars()
             }
-            if self._session_history_matches_query(item, q):
-                items.append(item)
 
-        for document in documents:
-            if document.id in matched_document_ids:
-                continue
-            item = {
-                "title": document.title,
-                "event": None,
-                "document": self._document_ref(document),
-                "timeline_position": None,
-                "scheduled_for": None,
-                "summary": document.summary,
-                "_sort_at": document.updated_at,
-            }
-            if self._session_history_matches_query(item, q):
-                items.append(item)
+        items: list[dict[str, Any]] = []
+        for row in rows:
+            event = events.get(row.event_id) if row.event_id is not None else None
+            document = (
+                documents.get(row.document_id) if row.document_id is not None else None
+            )
+            if event is not None:
+                items.append(
+                    {
+                        "title": event.name,
+                        "event": self.entity_to_dict(event),
+                        "document": self._document_ref(document),
+                        "timeline_position": (event.details or {}).get(
+                            "timeline_position"
+                        ),
+                        "scheduled_for": (event.details or {}).get("scheduled_for"),
+                        "summary": event.summary,
+                    }
+                )
+            elif document is not None:
+                items.append(
+                    {
+                        "title": document.title,
+                        "event": None,
+                        "document": self._document_ref(document),
+                        "timeline_position": None,
+                        "scheduled_for": None,
+                        "summary": document.summary,
+                    }
+                )
 
-        items.sort(key=lambda item: item["_sort_at"], reverse=True)
-        total = len(items)
         pages = (total + page_size - 1) // page_size if page_size > 0 else 1
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated = items[start:end]
-        for item in paginated:
-            item.pop("_sort_at", None)
-
         return {
-            "items": paginated,
+            "items": items,
             "total": total,
             "page": page,
             "page_size": page_size,
@@ -752,12 +1015,130 @@ class CampaignService:
             "created_at": version.created_at.isoformat(),
         }
 
-    async def _commit(self, db: AsyncSession, error_message: str) -> None:
+    async def _load_entity_graph(self, db: AsyncSession) -> EntityGraph:
+        generation = await entity_graph_cache.generation(db)
+        result = await db.execute(
+            select(CampaignEntity).options(*self._entity_loader_options())
+        )
+        entities = list(result.scalars().unique().all())
+        graph = EntityGraph.build(
+            (
+                (self.entity_to_dict(entity), self._entity_ref_ids(entity))
+                for entity in entities
+            ),
+            (
+                (
+                    relationship.id,
+                    (
+                        relationship.source_entity_id,
+                        relationship.target_entity_id,
+                        relationship.relationship_type,
+                    ),
+                )
+                for entity in entities
+                for relationship in entity.outgoing_relationships
+            ),
+        )
+        entity_graph_cache.store(db, graph, generation)
+        return graph
+
+    def _cache_entity(
+        self,
+        db: AsyncSession,
+        generation: int,
+        entity: CampaignEntity,
+        *,
+        latest_sheet_version: Optional[CharacterSheetVersion] = None,
+    ) -> None:
+        payload = self.entity_to_dict(entity)
+        if latest_sheet_version is not None:
+            payload["latest_sheet_version"] = self.sheet_version_to_dict(
+                latest_sheet_version
+            )
+        # Freshly inserted rows still hold aware datetimes; the columns store
+        # naive UTC, which is what a reload would serialize.
+        for record in (payload, payload["latest_sheet_version"]):
+            for field in ("created_at", "updated_at"):
+                if record and record.get(field):
+                    record[field] = (
+                        datetime.fromisoformat(record[field])
+                        .replace(tzinfo=None)
+                        .isoformat()
+                    )
+        # Refs are resolved from the cached graph by id: relationship
+        # attributes loaded earlier in this session may predate the update.
+        entity_graph_cache.put_entity(
+            db, generation, payload, self._entity_ref_ids(entity)
+        )
+
+    def _entity_ref_ids(self, entity: CampaignEntity) -> dict[str, Optional[int]]:
+        return {field: getattr(entity, f"{field}_id") for field in REF_FIELDS}
+
+    async def _commit(
+        self,
+        db: AsyncSession,
+        error_message: str,
+        *,
+        languages_of: Optional[CampaignEntity] = None,
+        graph_write: bool = False,
+    ) -> int:
+        """Commit; a ``graph_write`` returns its ``campaign_graph_version``."""
+        generation = 0
         try:
+            if languages_of is not None:
+                await db.flush()
+                await self._replace_languages(db, languages_of)
+            if graph_write:
+                generation = await entity_graph_cache.bump(db)
             await db.commit()
         except IntegrityError as exc:
             await db.rollback()
             raise ValueError(error_message) from exc
+        return generation
+
+    async def _replace_languages(
+        self, db: AsyncSession, entity: CampaignEntity
+    ) -> None:
+        await db.execute(
+            delete(CampaignEntityLanguage).where(
+                CampaignEntityLanguage.entity_id == entity.id
+            )
+        )
+        languages = sorted(self._entity_languages(entity))
+        if languages:
+            await db.execute(
+                insert(CampaignEntityLanguage),
+                [
+                    {"entity_id": entity.id, "language": language}
+                    for language in languages
+                ],
+            )
+
+    def _keyset_after(
+        self, columns: tuple[Any, ...], values: list[Any]
+    ) -> ColumnElement[bool]:
+        condition = columns[-1] > values[-1]
+        for sort_column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+            condition = or_(sort_column > value, and_(sort_column == value, condition))
+        return condition
+
+    def _encode_cursor(self, values: Iterable[Any]) -> str:
+        payload = json.dumps(list(values))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def _decode_cursor(self, cursor: str, size: int) -> list[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (binascii.Error, UnicodeError, ValueError) as exc:
+            raise ValueError("Invalid cursor") from exc
+        if (
+            not isinstance(values, list)
+            or len(values) != size
+            or not isinstance(values[-1], int)
+            or not all(isinstance(value, (str, int, float)) for value in values)
+        ):
+            raise ValueError("Invalid cursor")
+        return values
 
     async def _next_stable_key(self, entity_type: str, db: AsyncSession) -> str:
         prefix = self.stable_key_prefixes[entity_type]
@@ -941,32 +1322,93 @@ class CampaignService:
             "updated_at": document.updated_at.isoformat(),
         }
 
-    def _session_history_matches_query(
-        self, item: dict[str, Any], q: Optional[str]
-    ) -> bool:
-        if not q:
-            return True
-        needle = q.strip().casefold()
-        haystack = [
-            item.get("title"),
-            item.get("summary"),
-            item.get("timeline_position"),
-            item.get("scheduled_for"),
-        ]
-        event = item.get("event") or {}
-        document = item.get("document") or {}
-        haystack.extend(
-            [
-                event.get("name"),
-                event.get("summary"),
-                document.get("title"),
-                document.get("summary"),
-                document.get("source_name"),
-            ]
+    def _session_history_query(self) -> Subquery:
+        """Events outer-joined to session logs with the same title, plus the
+        logs no event took.
+
+        Numbering both sides per title (events by id, logs newest first) and
+        joining on that number pairs each event with the first log no earlier
+        event took. Titles match on the stored ``title_key`` forms, which
+        casefold in Python; SQLite's ``lower`` only folds ASCII.
+        """
+        event_key = CampaignEntity.name_key
+        events = (
+            select(
+                CampaignEntity.id.label("event_id"),
+                event_key.label("title_key"),
+                func.row_number()
+                .over(partition_by=event_key, order_by=CampaignEntity.id)
+                .label("position"),
+                CampaignEntity.updated_at,
+                CampaignEntity.name,
+                CampaignEntity.summary,
+                CampaignEntity.details["timeline_position"]
+                .as_string()
+                .label("timeline_position"),
+                CampaignEntity.details["scheduled_for"]
+                .as_string()
+                .label("scheduled_for"),
+            )
+            .where(CampaignEntity.entity_type == "event")
+            .subquery()
         )
-        return any(
-            isinstance(value, str) and needle in value.casefold() for value in haystack
+        document_key = Document.title_key
+        documents = (
+            select(
+                Document.id.label("document_id"),
+                document_key.label("title_key"),
+                func.row_number()
+                .over(
+                    partition_by=document_key,
+                    order_by=(Document.updated_at.desc(), Document.id),
+                )
+                .label("position"),
+                Document.updated_at,
+                Document.title,
+                Document.summary,
+                Document.source_name,
+            )
+            .where(Document.kind == "session_log")
+            .subquery()
+        )
+        paired = and_(
+            events.c.title_key == documents.c.title_key,
+            events.c.position == documents.c.position,
+        )
+        # LEFT JOIN plus the unpaired logs instead of a FULL OUTER JOIN,
+        # which SQLite only supports from 3.39.
+        events_with_logs = select(
+            events.c.event_id,
+            documents.c.document_id,
+            case(
+                (documents.c.updated_at > events.c.updated_at, documents.c.updated_at),
+                else_=events.c.updated_at,
+            ).label("sort_at"),
+            events.c.name.label("event_name"),
+            events.c.summary.label("event_summary"),
+            events.c.timeline_position,
+            events.c.scheduled_for,
+            documents.c.title.label("document_title"),
+            documents.c.summary.label("document_summary"),
+            documents.c.source_name.label("document_source_name"),
+        ).select_from(events.outerjoin(documents, paired))
+        unpaired_logs = (
+            select(
+                null().label("event_id"),
+                documents.c.document_id,
+                documents.c.updated_at.label("sort_at"),
+                null().label("event_name"),
+                null().label("event_summary"),
+                null().label("timeline_position"),
+                null().label("scheduled_for"),
+                documents.c.title.label("document_title"),
+                documents.c.summary.label("document_summary"),
+                documents.c.source_name.label("document_source_name"),
+            )
+            .select_from(documents.outerjoin(events, paired))
+            .where(events.c.event_id.is_(None))
         )
+        return union_all(events_with_logs, unpaired_logs).subquery()
 
     async def _get_relationship(
         self, relationship_id: int, db: AsyncSession
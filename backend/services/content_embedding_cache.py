@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.embedding import decode_embedding, encode_embedding
+from backend.models.embedding_cache import EmbeddingCacheEntry
+from backend.services.embedding_executor import AsyncRateLimiter
+from backend.services.embedding_service import embedding_service
+from backend.services.metrics_service import metrics_service
+
+LOOKUP_BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContentEmbeddingCache:
+    """Persistent embedding cache keyed by ``sha256(text)`` and model.
+
+    Ingestion and re-chunking run every text through here, so unchanged
+    chunks and documents reuse their stored vectors and only new or edited
+    text reaches the embedding provider.
+    """
+
+    @property
+    def model_key(self) -> str:
+        return f"{embedding_service.provider}:{embedding_service.model}"
+
+    @property
+    def enabled(self) -> bool:
+        return embedding_service.provider != "disabled"
+
+    async def embed_texts(
+        self,
+        db: AsyncSession,
+        texts: Sequence[str],
+        *,
+        batch_size: int = 50,
+        concurrency: int = 1,
+        rate_limiter: Optional[AsyncRateLimiter] = None,
+        db_lock: Optional[asyncio.Lock] = None,
+        commit: bool = False,
+    ) -> List[Optional[List[float]]]:
+        """Embeddings for ``texts`` (None for blanks), embedding only misses.
+
+        Misses are sent in ``batch_size`` batches, up to ``concurrency`` at a
+        time, each waiting on ``rate_limiter`` first. ``db`` is only used
+        before and after the provider calls, holding ``db_lock`` if given, so
+        callers sharing one session can embed while it is used elsewhere.
+        With ``commit``, new vectors are committed before the lock is released,
+        so a later rollback of the shared session does not discard them.
+        """
+        items = list(texts)
+        if not self.enabled:
+            return await self._embed_batches(items, batch_size, 1, rate_limiter)
+
+        hashes = [
+            content_hash(text) if text and text.strip() else None for text in items
+        ]
+        start = perf_counter()
+        async with db_lock or nullcontext():
+            cached = await self._lookup(db, [h for h in hashes if h is not None])
+        self._record(items, hashes, cached, (perf_counter() - start) * 1000)
+        missing: Dict[str, str] = {}
+        for text, digest in zip(items, hashes):
+            if digest is not None and digest not in cached:
+                missing.setdefault(digest, text)
+
+        if missing:
+            fresh = await self._embed_batches(
+                list(missing.values()), batch_size, concurrency, rate_limiter
+            )
+            computed = {
+                digest: embedding
+                for digest, embedding in zip(missing, fresh)
+                if embedding is not None
+            }
+            async with db_lock or nullcontext():
+                await self._store(db, computed)
+                if commit:
+                    await db.commit()
+            cached.update(computed)
+        return [cached.get(digest) if digest else None for digest in hashes]
+
+    async def embed_text(self, db: AsyncSession, text: str) -> Optional[List[float]]:
+        """Single-text variant that calls ``generate_embedding`` on a miss."""
+        if not self.enabled or not text or not text.strip():
+            return await embedding_service.generate_embedding(text)
+        digest = content_hash(text)
+        start = perf_counter()
+        cached = await self._lookup(db, [digest])
+        self._record([text], [digest], cached, (perf_counter() - start) * 1000)
+        if digest in cached:
+            return cached[digest]
+        embedding = await embedding_service.generate_embedding(text)
+        if embedding is not None:
+            await self._store(db, {digest: embedding})
+        return embedding
+
+    async def _embed_batches(
+        self,
+        texts: List[str],
+        batch_size: int,
+        concurrency: int,
+        rate_limiter: Optional[AsyncRateLimiter],
+    ) -> List[Optional[List[float]]]:
+        batch_size = max(1, batch_size)
+        slots = asyncio.Semaphore(max(1, concurrency))
+
+        async def _embed(batch: List[str]) -> List[Optional[List[float]]]:
+            async with slots:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                return await embedding_service.generate_embeddings_batch(batch)
+
+        batches = await asyncio.gather(
+            *(
+                _embed(texts[start : start + batch_size])
+                for start in range(0, len(texts), batch_size)
+            )
+        )
+        return [embedding for batch in batches for embedding in batch]
+
+    async def _lookup(
+        self, db: AsyncSession, hashes: Sequence[str]
+    ) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), LOOKUP_BATCH_SIZE):
+            stmt = select(
+                EmbeddingCacheEntry.content_hash,
+                EmbeddingCacheEntry.embedding_vector,
+                EmbeddingCacheEntry.embedding_dtype,
+            ).where(
+                EmbeddingCacheEntry.model == self.model_key,
+                EmbeddingCacheEntry.content_hash.in_(
+                    unique[start : start + LOOKUP_BATCH_SIZE]
+                ),
+            )
+            for row in (await db.execute(stmt)).all():
+                vector = decode_embedding(row.embedding_vector, row.embedding_dtype)
+                if vector is not None:
+                    found[row.content_hash] = vector.astype(float).tolist()
+        return found
+
+    async def _store(
+        self, db: AsyncSession, embeddings: Dict[str, List[float]]
+    ) -> None:
+        if not embeddings:
+            return
+        rows = []
+        for digest, embedding in embeddings.items():
+            blob, dtype = encode_embedding(embedding)
+            rows.append(
+                {
+                    "content_hash": digest,
+                    "model": self.model_key,
+                    "embedding_vector": blob,
+                    "embedding_dtype": dtype,
+                }
+            )
+        # Another ingest may have cached the same text meanwhile; keep the first.
+        await db.execute(_insert_ignoring_duplicates(db), rows)
+
+    def _record(
+        self,
+        texts: Sequence[str],
+        hashes: Sequence[Optional[str]],
+        cached: Dict[str, List[float]],
+        latency_ms: float,
+    ) -> None:
+        """One metrics event per text; tokens show what a hit saved."""
+        hits = [t for t, h in zip(texts, hashes) if h is not None and h in cached]
+        misses = [t for t, h in zip(texts, hashes) if h is not None and h not in cached]
+        for operation, group in (
+            ("embeddings.content_cache.hit", hits),
+            ("embeddings.content_cache.miss", misses),
+        ):
+            for text in group:
+                metrics_service.record(
+                    operation,
+                    latency_ms=latency_ms,
+                    input_tokens=metrics_service.estimate_tokens(text),
+                    provider=embedding_service.provider,
+                    model=embedding_service.model,
+                )
+
+
+def _insert_ignoring_duplicates(db: AsyncSession) -> Any:
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(EmbeddingCacheEntry).on_conflict_do_nothing(
+            index_elements=["model", "content_hash"]
+        )
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(EmbeddingCacheEntry).on_conflict_do_nothing(
+            index_elements=["model", "content_hash"]
+        )
+    return insert(EmbeddingCacheEntry)
+
+
+content_embedding_cache = ContentEmbeddingCache()
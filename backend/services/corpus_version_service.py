@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.document import CorpusVersion
+
+
+class CorpusVersionService:
+    """Per-database versions of the documents of a given kind.
+
+    Writers bump the kind's ``corpus_versions`` row in the same transaction
+    as their document changes, so writes made by another process (imports,
+    AoN fetches, a second worker) change the version with their commit.
+    ``version`` is one primary-key lookup. Caches key their entries on it, so
+    anything cached before a change is never served again.
+    """
+
+    async def version(self, db: AsyncSession, kind: str) -> int:
+        return await self._stored_generation(db, kind) or 0
+
+    async def bump(self, db: AsyncSession, kind: str) -> int:
+        """Advance the kind's version in the caller's transaction; returns it."""
+        # Update before reading, so the row lock orders concurrent writers.
+        await db.execute(
+            update(CorpusVersion)
+            .where(CorpusVersion.kind == kind)
+            .values(generation=CorpusVersion.generation + 1)
+        )
+        generation = await self._stored_generation(db, kind)
+        if generation is None:
+            db.add(CorpusVersion(kind=kind, generation=1))
+            await db.flush()
+            generation = 1
+        return generation
+
+    async def _stored_generation(self, db: AsyncSession, kind: str) -> Optional[int]:
+        return (
+            await db.execute(
+                select(CorpusVersion.generation).where(CorpusVersion.kind == kind)
+            )
+        ).scalar_one_or_none()
+
+
+corpus_version_service = CorpusVersionService()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import RLock
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_query_text(text: str) -> str:
+    """Case- and whitespace-insensitive form used as the cache key."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with a per-entry TTL.
+
+    Keys are ``(normalized text, provider, model)`` so switching providers or
+    models never serves a vector from a different embedding space. When
+    ``path`` is set the cache is loaded lazily from disk and written back by
+    ``save`` (vectors stored as base64 float32).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl_seconds: float,
+        path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._clock = clock
+        self._lock = RLock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[float]]]" = (
+            OrderedDict()
+        )
+        self._loaded = path is None
+        self._dirty = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, text: str, provider: str, model: str) -> CacheKey:
+        return normalize_query_text(text), provider, model
+
+    def get(self, key: CacheKey) -> Optional[List[float]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, embedding = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            return list(embedding)
+
+    def put(self, key: CacheKey, embedding: List[float]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = (self._clock() + self.ttl_seconds, list(embedding))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def save(self) -> bool:
+        """Write unexpired entries to ``path``; returns True when written."""
+        if self.path is None:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            now = self._clock()
+            payload = {
+                "entries": [
+                    {
+                        "text": text,
+                        "provider": provider,
+                        "model": model,
+                        "expires_at": expires_at,
+                        "embedding": base64.b64encode(
+                            np.asarray(embedding, dtype="<f4").tobytes()
+                        ).decode("ascii"),
+                    }
+                    for (text, provider, model), (
+                        expires_at,
+                        embedding,
+                    ) in self._entries.items()
+                    if expires_at > now
+                ]
+            }
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload))
+        os.replace(tmp_path, self.path)
+        return True
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable embedding cache %s: %s", self.path, exc)
+            return
+        now = self._clock()
+        for item in payload.get("entries", []):
+            expires_at = float(item["expires_at"])
+            if expires_at <= now:
+                continue
+            vector = np.frombuffer(base64.b64decode(item["embedding"]), dtype="<f4")
+            key = (item["text"], item["provider"], item["model"])
+            self._entries[key] = (expires_at, vector.astype(np.float64).tolist())
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
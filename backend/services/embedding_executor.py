@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _LoopState(Generic[T, R]):
+    """Pending requests of one event loop (tests run several loops in turn)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_pending: int) -> None:
+        self.loop = loop
+        self.pending: List[Tuple[T, "asyncio.Future[R]"]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.slots = asyncio.Semaphore(max_pending)
+        self.tasks: Set["asyncio.Task[None]"] = set()
+
+
+class EmbeddingExecutor(Generic[T, R]):
+    """Runs blocking provider calls in a thread pool and coalesces requests.
+
+    ``submit`` queues one item and waits for its result. Items arriving within
+    ``window_ms`` of each other are handed to ``batch_fn`` together (at most
+    ``max_batch_size`` per call), so concurrent single-text lookups share one
+    ``embeddings.create``/``encode`` round trip. At most ``max_pending`` items
+    wait at once; further callers block until a slot frees up.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], List[R]],
+        *,
+        max_workers: int,
+        max_batch_size: int,
+        window_ms: float,
+        max_pending: int,
+    ) -> None:
+        self.batch_fn = batch_fn
+        self.max_workers = max(1, max_workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_seconds = max(0.0, window_ms) / 1000
+        self.max_pending = max(1, max_pending)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = Lock()
+        self._state: Optional[_LoopState[T, R]] = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="embeddings"
+                )
+            return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, partial(fn, *args))
+
+    async def submit(self, item: T) -> R:
+        state = self._loop_state()
+        async with state.slots:
+            future: "asyncio.Future[R]" = state.loop.create_future()
+            state.pending.append((item, future))
+            if len(state.pending) >= self.max_batch_size:
+                self._flush(state)
+            elif state.timer is None:
+                state.timer = state.loop.call_later(
+                    self.window_seconds, self._flush, state
+                )
+            return await future
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _loop_state(self) -> _LoopState[T, R]:
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._state.loop is not loop:
+            self._state = _LoopState(loop, self.max_pending)
+        return self._state
+
+    def _flush(self, state: _LoopState[T, R]) -> None:
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        while state.pending:
+            batch = state.pending[: self.max_batch_size]
+            del state.pending[: self.max_batch_size]
+            task = state.loop.create_task(self._run_batch(batch))
+            state.tasks.add(task)
+            task.add_done_callback(state.tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[T, "asyncio.Future[R]"]]) -> None:
+        try:
+            results = await self.run(self.batch_fn, [item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled while the batch was running.
+            if not future.done():
+                future.set_result(result)
+
+
+class AsyncRateLimiter:
+    """Spaces out call starts so at most ``per_minute`` begin each minute."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_start = 0.0
+
+    async def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config.settings import settings
+from backend.models.chunk import DocumentChunk
+from backend.models.document import Document
+from backend.models.embedding import encode_embedding
+from backend.services.content_embedding_cache import content_embedding_cache
+from backend.services.context_service import context_service
+from backend.services.corpus_version_service import corpus_version_service
+from backend.services.embedding_executor import AsyncRateLimiter
+from backend.services.embedding_service import embedding_service
+from backend.services.vector_index_service import vector_index_service
+
+logger = logging.getLogger(__name__)
+
+REINDEX_STATE_KEY = "embedding_reindex"
+LEASE_SECONDS = 600
+PHASES = ("stale_documents", "stale_chunks", "changed_documents")
+
+
+class EmbeddingReindexService:
+    """Background re-embedding of documents and chunks.
+
+    A run has three phases, each walked with a keyset cursor:
+
+    - ``stale_documents`` / ``stale_chunks``: rows with no vector or whose
+      ``embedding_model`` differs from the configured provider/model.
+    - ``changed_documents``: documents with ``updated_at`` past the stored
+      watermark; their text and chunks go back through the content-hash cache
+      so only edited text reaches the provider.
+
+    The cursor, watermark and counters live in the ``contexts`` table and are
+    committed together with each batch of vectors, so a crashed run resumes
+    where it stopped.
+    """
+
+    async def progress(self, db: AsyncSession) -> Dict[str, Any]:
+        state = await self._load_state(db)
+        model = content_embedding_cache.model_key
+        watermark = _parse_watermark(state.get("watermark"))
+        changed = select(func.count(Document.id))
+        if watermark is not None:
+            changed = changed.where(
+                tuple_(Document.updated_at, Document.id) > tuple_(*watermark)
+            )
+        return {
+            **state,
+            "model": model,
+            "provider_enabled": content_embedding_cache.enabled,
+            "pending": {
+                "stale_documents": await self._count(db, Document, model),
+                "stale_chunks": await self._count(db, DocumentChunk, model),
+                "changed_documents": (await db.execute(changed)).scalar() or 0,
+            },
+        }
+
+    async def run(self, db: AsyncSession) -> Dict[str, Any]:
+        if not content_embedding_cache.enabled:
+            return {"status": "skipped", "reason": "embedding provider disabled"}
+
+        state = await self._load_state(db)
+        if state.get("status") == "running" and not _lease_expired(state):
+            return {**state, "status": "busy"}
+
+        model = content_embedding_cache.model_key
+        if state.get("phase") not in PHASES or state.get("model") != model:
+            state.update(
+                phase=PHASES[0],
+                cursor=None,
+                model=model,
+                started_at=_utcnow().isoformat(),
+                finished_at=None,
+                counts={
+                    "documents_embedded": 0,
+                    "chunks_embedded": 0,
+                    "failed": 0,
+                },
+            )
+        state.update(status="running", last_error=None)
+        await self._save_state(db, state)
+
+        limiter = AsyncRateLimiter(settings.embedding_reindex_requests_per_minute)
+        chunks_changed = False
+        try:
+            while state["phase"] is not None:
+                handler = getattr(self, f"_{state['phase']}_batch")
+                cursor, embedded = await handler(db, state, model, limiter)
+                chunks_changed = chunks_changed or embedded
+                if cursor is None:
+                    next_index = PHASES.index(state["phase"]) + 1
+                    state["phase"] = (
+                        PHASES[next_index] if next_index < len(PHASES) else None
+                    )
+                state["cursor"] = cursor
+                await self._save_state(db, state)
+        except Exception as exc:
+            await db.rollback()
+            logger.exception("Embedding reindex failed")
+            state.update(status="failed", last_error=str(exc))
+            await self._save_state(db, state)
+            return state
+
+        state.update(status="completed", finished_at=_utcnow().isoformat())
+        counts = state["counts"]
+        if counts["documents_embedded"] or counts["chunks_embedded"]:
+            # New vectors can reorder rules answers cached for the old ones;
+            # the bump commits with the completed state.
+            await corpus_version_service.bump(db, "rule")
+        await self._save_state(db, state)
+        if chunks_changed and vector_index_service.enabled:
+            try:
+                await vector_index_service.build_snapshot(db)
+            except RuntimeError as exc:
+                logger.info("Vector snapshot rebuild deferred: %s", exc)
+        return state
+
+    async def _stale_documents_batch(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        limiter: AsyncRateLimiter,
+    ) -> tuple[Optional[int], bool]:
+        rows = (
+            await db.execute(
+                select(
+                    Document.id,
+                    Document.title,
+                    Document.summary,
+                    Document.content,
+                    Document.kind,
+                    Document.source_name,
+                )
+                .where(Document.id > (state["cursor"] or 0))
+                .where(_stale(Document, model))
+                .order_by(Document.id)
+                .limit(settings.embedding_reindex_page_size)
+            )
+        ).all()
+        if not rows:
+            return None, False
+        await self._embed_documents(db, state, model, limiter, rows)
+        return rows[-1].id, False
+
+    async def _stale_chunks_batch(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        limiter: AsyncRateLimiter,
+    ) -> tuple[Optional[int], bool]:
+        rows = (
+            await db.execute(
+                select(DocumentChunk.id, DocumentChunk.content)
+                .where(DocumentChunk.id > (state["cursor"] or 0))
+                .where(_stale(DocumentChunk, model))
+                .order_by(DocumentChunk.id)
+                .limit(settings.embedding_reindex_page_size)
+            )
+        ).all()
+        if not rows:
+            return None, False
+        embedded = await self._embed_chunks(db, state, model, limiter, rows)
+        return rows[-1].id, embedded > 0
+
+    async def _changed_documents_batch(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        limiter: AsyncRateLimiter,
+    ) -> tuple[Optional[Dict[str, Any]], bool]:
+        after = _parse_watermark(state["cursor"] or state.get("watermark"))
+        stmt = select(
+            Document.id,
+            Document.updated_at,
+            Document.title,
+            Document.summary,
+            Document.content,
+            Document.kind,
+            Document.source_name,
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Document.updated_at, Document.id) > tuple_(*after))
+        rows = (
+            await db.execute(
+                stmt.order_by(Document.updated_at, Document.id).limit(
+                    settings.embedding_reindex_page_size
+                )
+            )
+        ).all()
+        if not rows:
+            if state["cursor"] is not None:
+                state["watermark"] = state["cursor"]
+            return None, False
+
+        await self._embed_documents(db, state, model, limiter, rows)
+        chunk_rows = (
+            await db.execute(
+                select(DocumentChunk.id, DocumentChunk.content)
+                .where(DocumentChunk.document_id.in_([row.id for row in rows]))
+                .order_by(DocumentChunk.id)
+            )
+        ).all()
+        embedded = await self._embed_chunks(db, state, model, limiter, chunk_rows)
+        last = rows[-1]
+        return {"updated_at": last.updated_at.isoformat(), "id": last.id}, embedded > 0
+
+    async def _embed_documents(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        limiter: AsyncRateLimiter,
+        rows: Sequence[Any],
+    ) -> int:
+        texts = [
+            embedding_service.create_document_text(dict(row._mapping)) for row in rows
+        ]
+        vectors = await self._embed(db, texts, limiter)
+        return await self._write(db, state, model, Document, rows, vectors, "documents")
+
+    async def _embed_chunks(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        limiter: AsyncRateLimiter,
+        rows: Sequence[Any],
+    ) -> int:
+        vectors = await self._embed(db, [row.content for row in rows], limiter)
+        return await self._write(
+            db, state, model, DocumentChunk, rows, vectors, "chunks"
+        )
+
+    async def _embed(
+        self, db: AsyncSession, texts: List[str], limiter: AsyncRateLimiter
+    ) -> List[Optional[List[float]]]:
+        return await content_embedding_cache.embed_texts(
+            db,
+            texts,
+            batch_size=settings.max_embedding_batch_size,
+            concurrency=settings.embedding_reindex_concurrency,
+            rate_limiter=limiter,
+        )
+
+    async def _write(
+        self,
+        db: AsyncSession,
+        state: Dict[str, Any],
+        model: str,
+        entity: Any,
+        rows: Sequence[Any],
+        vectors: Sequence[Optional[List[float]]],
+        label: str,
+    ) -> int:
+        written = 0
+        for row, vector in zip(rows, vectors):
+            if vector is None:
+                state["counts"]["failed"] += 1
+                continue
+            blob, dtype = encode_embedding(vector)
+            values: Dict[str, Any] = {
+                "embedding_vector": blob,
+                "embedding_dtype": dtype,
+                "embedding_model": model,
+                "embedding": None,
+            }
+            if entity is Document:
+                # A vector refresh is not a content change; keep the watermark still.
+                values["updated_at"] = Document.updated_at
+            await db.execute(update(entity).where(entity.id == row.id).values(values))
+            written += 1
+        state["counts"][f"{label}_embedded"] += written
+        return written
+
+    async def _count(self, db: AsyncSession, entity: Any, model: str) -> int:
+        stmt = select(func.count(entity.id)).where(_stale(entity, model))
+        return (await db.execute(stmt)).scalar() or 0
+
+    async def _load_state(self, db: AsyncSession) -> Dict[str, Any]:
+        entry = await context_service.load(REINDEX_STATE_KEY, db)
+        if entry is None:
+            return {"status": "idle", "phase": None, "watermark": None}
+        return dict(entry.data)
+
+    async def _save_state(self, db: AsyncSession, state: Dict[str, Any]) -> None:
+        state["heartbeat_at"] = _utcnow().isoformat()
+        # Commits the batch's vector updates together with the cursor.
+        await context_service.save(REINDEX_STATE_KEY, dict(state), db)
+
+
+def _stale(entity: Any, model: str) -> Any:
+    return or_(entity.embedding_model.is_(None), entity.embedding_model != model)
+
+
+def _parse_watermark(value: Optional[Dict[str, Any]]) -> Optional[tuple]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value["updated_at"]), int(value["id"])
+
+
+def _lease_expired(state: Dict[str, Any]) -> bool:
+    heartbeat = state.get("heartbeat_at")
+    if not heartbeat:
+        return True
+    age = _utcnow() - datetime.fromisoformat(heartbeat)
+    return age > timedelta(seconds=LEASE_SECONDS)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+embedding_reindex_service = EmbeddingReindexService()
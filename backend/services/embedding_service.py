@@ -1,9 +1,14 @@
 import math
 import logging
+from pathlib import Path
 from time import perf_counter
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from backend.config.settings import settings
+from backend.services.embedding_cache import CacheKey, QueryEmbeddingCache
+from backend.services.embedding_executor import EmbeddingExecutor
 from backend.services.metrics_service import metrics_service
 
 logger = logging.getLogger(__name__)
@@ -15,6 +20,24 @@ class EmbeddingService:
         self.openai_client: Any = None
         self.sentence_transformer: Any = None
         self.model = settings.embedding_model
+        self.executor: EmbeddingExecutor[str, Tuple[List[float], int, str]] = (
+            EmbeddingExecutor(
+                self._embed_coalesced,
+                max_workers=settings.embedding_executor_workers,
+                max_batch_size=settings.max_embedding_batch_size,
+                window_ms=settings.embedding_batch_window_ms,
+                max_pending=settings.embedding_max_pending_requests,
+            )
+        )
+        self.query_cache = QueryEmbeddingCache(
+            max_entries=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+            path=(
+                Path(settings.embedding_cache_path)
+                if settings.embedding_cache_path
+                else None
+            ),
+        )
 
         if self.provider == "openai":
             if not settings.openai_api_key:
@@ -46,34 +69,47 @@ class EmbeddingService:
     async def generate_embedding(self, text: str) -> Optional[List[float]]:
         if not text or not text.strip():
             return None
+        cache_key = self._query_cache_key(text)
+        if cache_key is not None:
+            cached = self._cached_embedding(cache_key)
+            if cached is not None:
+                return cached
+        embedding = await self._generate_embedding_uncached(text)
+        if cache_key is not None and embedding is not None:
+            self.query_cache.put(cache_key, embedding)
+        return embedding
+
+    def _query_cache_key(self, text: str) -> Optional[CacheKey]:
+        if self.provider == "disabled" or not self.query_cache.enabled:
+            return None
+        return self.query_cache.key(text, self.provider, self.model)
+
+    def _cached_embedding(self, cache_key: CacheKey) -> Optional[List[float]]:
+        start = perf_counter()
+        cached = self.query_cache.get(cache_key)
+        metrics_service.record(
+            "embeddings.cache.hit" if cached is not None else "embeddings.cache.miss",
+            latency_ms=(perf_counter() - start) * 1000,
+            provider=self.provider,
+            model=self.model,
+        )
+        return cached
+
+    async def _generate_embedding_uncached(self, text: str) -> Optional[List[float]]:
         start = perf_counter()
         input_tokens = metrics_service.estimate_tokens(text)
         token_source = "estimated"
         cost_usd = 0.0
         success = False
         try:
-            if self.provider == "openai":
-                if self.openai_client is None:
-                    success = True
-                    return None
-                resp = self.openai_client.embeddings.create(
-                    input=text, model=self.model
-                )
-                input_tokens, token_source = self._token_usage(resp, input_tokens)
-                cost_usd = metrics_service.estimate_embedding_cost_usd(
-                    self.model, input_tokens
-                )
-                success = True
-                return self._coerce_embedding(resp.data[0].embedding)
-            if self.provider == "local":
-                if self.sentence_transformer is None:
-                    success = True
-                    return None
-                emb = self.sentence_transformer.encode(text, convert_to_numpy=True)
+            if not self._provider_ready():
                 success = True
-                return self._coerce_embedding(emb)
+                return None
+            # Concurrent lookups are coalesced into one provider call.
+            embedding, input_tokens, token_source = await self.executor.submit(text)
+            cost_usd = self._cost_usd(input_tokens)
             success = True
-            return None
+            return embedding
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             return None
@@ -94,11 +130,24 @@ class EmbeddingService:
         self, texts: Sequence[str]
     ) -> List[Optional[List[float]]]:
         items = list(texts)
-        if not items:
-            return []
-        valid_texts = [t for t in items if t and t.strip()]
-        if not valid_texts:
-            return [None] * len(items)
+        out: List[Optional[List[float]]] = [None] * len(items)
+        # Texts already in the query cache skip the provider; the rest fill it.
+        missing: List[int] = []
+        cache_keys: Dict[int, CacheKey] = {}
+        for i, text in enumerate(items):
+            if not text or not text.strip():
+                continue
+            cache_key = self._query_cache_key(text)
+            if cache_key is not None:
+                cached = self._cached_embedding(cache_key)
+                if cached is not None:
+                    out[i] = cached
+                    continue
+                cache_keys[i] = cache_key
+            missing.append(i)
+        if not missing:
+            return out
+        valid_texts = [items[i] for i in missing]
         start = perf_counter()
         input_tokens = sum(
             metrics_service.estimate_tokens(text) for text in valid_texts
@@ -107,50 +156,33 @@ class EmbeddingService:
         cost_usd = 0.0
         success = False
         try:
-            if self.provider == "openai":
-                if self.openai_client is None:
-                    success = True
-                    return [None] * len(items)
-                resp = self.openai_client.embeddings.create(
-                    input=valid_texts, model=self.model
-                )
-                input_tokens, token_source = self._token_usage(resp, input_tokens)
-                cost_usd = metrics_service.estimate_embedding_cost_usd(
-                    self.model, input_tokens
-                )
-                embs = [self._coerce_embedding(d.embedding) for d in resp.data]
-                out: List[Optional[List[float]]] = []
-                idx = 0
-                for t in items:
-                    if t and t.strip():
-                        out.append(embs[idx])
-                        idx += 1
-                    else:
-                        out.append(None)
+            if not self._provider_ready():
                 success = True
                 return out
-            if self.provider == "local":
-                if self.sentence_transformer is None:
-                    success = True
-                    return [None] * len(items)
-                embs = self.sentence_transformer.encode(
-                    valid_texts, convert_to_numpy=True
+            embs: List[List[float]] = []
+            actual_tokens: Optional[int] = 0
+            batch_size = max(1, settings.max_embedding_batch_size)
+            for offset in range(0, len(valid_texts), batch_size):
+                part, part_tokens = await self.executor.run(
+                    self._embed_sync, valid_texts[offset : offset + batch_size]
                 )
-                local_out: List[Optional[List[float]]] = []
-                idx = 0
-                for t in items:
-                    if t and t.strip():
-                        local_out.append(self._coerce_embedding(embs[idx]))
-                        idx += 1
-                    else:
-                        local_out.append(None)
-                success = True
-                return local_out
+                embs.extend(part)
+                if actual_tokens is not None and part_tokens is not None:
+                    actual_tokens += part_tokens
+                else:
+                    actual_tokens = None
+            if actual_tokens is not None:
+                input_tokens, token_source = actual_tokens, "actual"
+            cost_usd = self._cost_usd(input_tokens)
+            for i, embedding in zip(missing, embs):
+                out[i] = embedding
+                if i in cache_keys:
+                    self.query_cache.put(cache_keys[i], embedding)
             success = True
-            return [None] * len(items)
+            return out
         except Exception as e:
             logger.error(f"Batch embedding failed: {e}")
-            return [None] * len(items)
+            return out
         finally:
             metrics_service.record(
                 "embeddings.batch",
@@ -164,6 +196,48 @@ class EmbeddingService:
                 model=self.model,
             )
 
+    def _provider_ready(self) -> bool:
+        if self.provider == "openai":
+            return self.openai_client is not None
+        if self.provider == "local":
+            return self.sentence_transformer is not None
+        return False
+
+    def _cost_usd(self, input_tokens: int) -> float:
+        if self.provider != "openai":
+            return 0.0
+        return metrics_service.estimate_embedding_cost_usd(self.model, input_tokens)
+
+    def _embed_sync(self, texts: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        """Blocking provider call; runs on the executor's thread pool.
+
+        Returns the embeddings and the provider-reported prompt tokens, if any.
+        """
+        if self.provider == "openai":
+            resp = self.openai_client.embeddings.create(input=texts, model=self.model)
+            usage = getattr(resp, "usage", None)
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            return (
+                [self._coerce_embedding(d.embedding) for d in resp.data],
+                int(prompt_tokens) if prompt_tokens is not None else None,
+            )
+        embs = self.sentence_transformer.encode(texts, convert_to_numpy=True)
+        return [self._coerce_embedding(emb) for emb in embs], None
+
+    def _embed_coalesced(self, texts: List[str]) -> List[Tuple[List[float], int, str]]:
+        """Batch function behind ``executor.submit``.
+
+        Provider-reported tokens are split across the coalesced requests in
+        proportion to their estimated size, so per-request cost still adds up.
+        """
+        embs, prompt_tokens = self._embed_sync(texts)
+        estimates = [metrics_service.estimate_tokens(text) for text in texts]
+        if prompt_tokens is None:
+            return [(emb, est, "estimated") for emb, est in zip(embs, estimates)]
+        total = max(1, sum(estimates))
+        shares = [round(prompt_tokens * est / total) for est in estimates]
+        return [(emb, share, "actual") for emb, share in zip(embs, shares)]
+
     def compute_similarity(
         self, embedding1: List[float], embedding2: List[float]
     ) -> float:
@@ -178,6 +252,54 @@ class EmbeddingService:
             return 0.0
         return dot / (n1 * n2)
 
+    def query_vector(
+        self, embedding: Optional[Sequence[float]]
+    ) -> Optional[np.ndarray]:
+        """Return a unit-length float32 query vector, or None when unusable."""
+        if embedding is None or len(embedding) == 0:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def stack_embeddings(
+        self, embeddings: Sequence[Optional[np.ndarray]], dim: int
+    ) -> np.ndarray:
+        """Stack embeddings into a contiguous float32 matrix of shape (n, dim).
+
+        Missing or wrong-dimension rows become zero rows, which score 0.0 in
+        ``cosine_scores`` exactly like ``compute_similarity`` would.
+        """
+        matrix = np.zeros((len(embeddings), dim), dtype=np.float32)
+        for row, embedding in enumerate(embeddings):
+            if embedding is not None and embedding.shape == (dim,):
+                matrix[row] = embedding
+        return matrix
+
+    def cosine_scores(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit query vector against every matrix row."""
+        if matrix.shape[0] == 0:
+            return np.zeros(0, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        dots = matrix @ query
+        scores = np.zeros_like(dots)
+        np.divide(dots, norms, out=scores, where=norms > 0)
+        return scores
+
+    def cosine_score_matrix(
+        self, queries: np.ndarray, matrix: np.ndarray
+    ) -> np.ndarray:
+        """``cosine_scores`` for several unit query rows: shape (queries, rows)."""
+        if matrix.shape[0] == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        dots = queries @ matrix.T
+        scores = np.zeros_like(dots)
+        np.divide(dots, norms, out=scores, where=norms > 0)
+        return scores
+
     def create_document_text(self, doc: Dict[str, Any]) -> str:
         parts: List[str] = []
         if doc.get("title"):
@@ -193,18 +315,7 @@ class EmbeddingService:
         return "\n".join(parts)
 
     def _coerce_embedding(self, embedding: Any) -> List[float]:
-        if hasattr(embedding, "tolist"):
-            coerced = embedding.tolist()
-        else:
-            coerced = list(embedding)
-        return [float(value) for value in coerced]
-
-    def _token_usage(self, response: Any, fallback_tokens: int) -> tuple[int, str]:
-        usage = getattr(response, "usage", None)
-        prompt_tokens = getattr(usage, "prompt_tokens", None)
-        if prompt_tokens is None:
-            return fallback_tokens, "estimated"
-        return int(prompt_tokens), "actual"
+        return np.asarray(embedding, dtype=np.float64).ravel().tolist()
 
 
 # Singleton
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config.settings import settings
+from backend.models.campaign import CampaignGraphVersion
+
+REF_FIELDS = ("parent_entity", "current_location", "owner_entity")
+GRAPH_VERSION_ID = 1
+Edge = Tuple[int, int, str]
+
+
+class EntityGraph:
+    """Campaign entities of one database as serialized dicts.
+
+    ``entities`` maps id to the ``entity_to_dict`` payload, ``by_type`` holds
+    the ids of each entity type and ``adjacency`` maps an id to the
+    relationships touching it (relationship id -> source, target, type).
+    ``ref_ids`` and ``referrers`` track the parent/location/owner links, so
+    renaming or deleting an entity rewrites the refs embedded in the others.
+    ``generation`` is the ``campaign_graph_version`` value the graph reflects.
+    """
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self.entities: Dict[int, Dict[str, Any]] = {}
+        self.ref_ids: Dict[int, Dict[str, Optional[int]]] = {}
+        self.by_type: Dict[str, Set[int]] = {}
+        self.referrers: Dict[int, Set[int]] = {}
+        self.adjacency: Dict[int, Dict[int, Edge]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        entities: Iterable[Tuple[Dict[str, Any], Dict[str, Optional[int]]]],
+        relationships: Iterable[Tuple[int, Edge]],
+    ) -> "EntityGraph":
+        graph = cls()
+        entries = list(entities)
+        # Seed every payload first so refs resolve whatever the order.
+        for payload, _ in entries:
+            graph.entities[payload["id"]] = payload
+        for payload, ref_ids in entries:
+            # A ref to a deleted row loads as None, like the joined load does.
+            graph.put_entity(
+                payload,
+                {
+                    field: target if target in graph.entities else None
+                    for field, target in ref_ids.items()
+                },
+            )
+        for relationship_id, (source, target, relationship_type) in relationships:
+            graph.add_relationship(relationship_id, source, target, relationship_type)
+        return graph
+
+    def put_entity(
+        self, payload: Dict[str, Any], ref_ids: Dict[str, Optional[int]]
+    ) -> bool:
+        """Insert or replace an entity; False if a ref points outside the graph."""
+        if any(
+            target is not None and target not in self.entities
+            for target in ref_ids.values()
+        ):
+            return False
+        entity_id = payload["id"]
+        previous = self.entities.get(entity_id)
+        if previous is not None:
+            self.by_type.get(previous["entity_type"], set()).discard(entity_id)
+            for target in self.ref_ids.get(entity_id, {}).values():
+                if target is not None:
+                    self.referrers.get(target, set()).discard(entity_id)
+
+        payload = dict(payload)
+        if previous is not None and _version_number(
+            previous.get("latest_sheet_version")
+        ) > _version_number(payload.get("latest_sheet_version")):
+            # Sheet versions only grow; a writer whose session loaded the
+            # entity before a newer version was added must not roll it back.
+            payload["latest_sheet_version"] = previous["latest_sheet_version"]
+        self.entities[entity_id] = payload
+        self.ref_ids[entity_id] = dict(ref_ids)
+        self.by_type.setdefault(payload["entity_type"], set()).add(entity_id)
+        for field, target in ref_ids.items():
+            if target is not None:
+                self.referrers.setdefault(target, set()).add(entity_id)
+            payload[field] = self.entity_ref(target)
+
+        ref = self.entity_ref(entity_id)
+        for referrer_id in self.referrers.get(entity_id, set()):
+            self._set_refs(referrer_id, entity_id, ref)
+        return True
+
+    def remove_entity(self, entity_id: int) -> None:
+        payload = self.entities.pop(entity_id, None)
+        if payload is None:
+            return
+        self.by_type.get(payload["entity_type"], set()).discard(entity_id)
+        for target in self.ref_ids.pop(entity_id, {}).values():
+            if target is not None:
+                self.referrers.get(target, set()).discard(entity_id)
+        # The foreign keys are ON DELETE SET NULL.
+        for referrer_id in self.referrers.pop(entity_id, set()):
+            self._set_refs(referrer_id, entity_id, None)
+            referrer_refs = self.ref_ids.get(referrer_id, {})
+            for field, target in referrer_refs.items():
+                if target == entity_id:
+                    referrer_refs[field] = None
+        # Relationships cascade with either endpoint.
+        for relationship_id, (source, target, _) in self.adjacency.pop(
+            entity_id, {}
+        ).items():
+            other = target if source == entity_id else source
+            self.adjacency.get(other, {}).pop(relationship_id, None)
+
+    def add_relationship(
+        self, relationship_id: int, source: int, target: int, relationship_type: str
+    ) -> None:
+        edge = (source, target, relationship_type)
+        self.adjacency.setdefault(source, {})[relationship_id] = edge
+        self.adjacency.setdefault(target, {})[relationship_id] = edge
+
+    def entities_of_type(self, entity_type: str) -> List[Dict[str, Any]]:
+        """Copies of one type's entity dicts, ordered by name."""
+        items = [
+            self.entities[entity_id] for entity_id in self.by_type.get(entity_type, ())
+        ]
+        items.sort(key=lambda item: (item["name"], item["id"]))
+        return copy.deepcopy(items)
+
+    def entity_ref(self, entity_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        payload = self.entities.get(entity_id) if entity_id is not None else None
+        if payload is None:
+            return None
+        return {
+            "id": payload["id"],
+            "stable_key": payload["stable_key"],
+            "entity_type": payload["entity_type"],
+            "name": payload["name"],
+        }
+
+    def _set_refs(
+        self, referrer_id: int, target_id: int, ref: Optional[Dict[str, Any]]
+    ) -> None:
+        payload = self.entities.get(referrer_id)
+        if payload is None:
+            return
+        for field, target in self.ref_ids.get(referrer_id, {}).items():
+            if target == target_id:
+                payload[field] = dict(ref) if ref is not None else None
+
+
+class EntityGraphCache:
+    """Process-level ``EntityGraph`` per database, checked against the DB.
+
+    Every ``CampaignService`` write bumps the ``campaign_graph_version`` row
+    inside its own transaction (``bump``) and then patches the loaded graph,
+    but only if the graph was current right before that write. ``get``
+    compares the graph's generation with the row, one primary-key read, so a
+    write by another process (``make import-assets``, ``make
+    sync-obsidian-vault``) or a racing writer drops the graph and the next
+    read reloads it. Writes that bypass ``CampaignService`` must call
+    ``bump`` themselves.
+    """
+
+    def __init__(self) -> None:
+        self._graphs: "WeakKeyDictionary[Engine, EntityGraph]" = WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.campaign_graph_cache_enabled
+
+    async def get(self, db: AsyncSession) -> Optional[EntityGraph]:
+        if not self.enabled:
+            return None
+        engine = _engine(db)
+        graph = self._graphs.get(engine)
+        if graph is None:
+            return None
+        if graph.generation != await self.generation(db):
+            self._graphs.pop(engine, None)
+            return None
+        return graph
+
+    async def generation(self, db: AsyncSession) -> int:
+        return await self._stored_generation(db) or 0
+
+    async def bump(self, db: AsyncSession) -> int:
+        """Advance the generation in the caller's transaction; returns it."""
+        # Update before reading, so the row lock orders concurrent writers.
+        await db.execute(
+            update(CampaignGraphVersion)
+            .where(CampaignGraphVersion.id == GRAPH_VERSION_ID)
+            .values(generation=CampaignGraphVersion.generation + 1)
+        )
+        generation = await self._stored_generation(db)
+        if generation is None:
+            db.add(CampaignGraphVersion(id=GRAPH_VERSION_ID, generation=1))
+            await db.flush()
+            generation = 1
+        return generation
+
+    def store(self, db: AsyncSession, graph: EntityGraph, generation: int) -> None:
+        """Keep ``graph``, loaded after ``generation`` was read."""
+        if self.enabled:
+            graph.generation = generation
+            self._graphs[_engine(db)] = graph
+
+    def put_entity(
+        self,
+        db: AsyncSession,
+        generation: int,
+        payload: Dict[str, Any],
+        ref_ids: Dict[str, Optional[int]],
+    ) -> None:
+        graph = self._advance(db, generation)
+        if graph is not None and not graph.put_entity(payload, ref_ids):
+            self.invalidate(db)
+
+    def remove_entity(self, db: AsyncSession, generation: int, entity_id: int) -> None:
+        graph = self._advance(db, generation)
+        if graph is not None:
+            graph.remove_entity(entity_id)
+
+    def add_relationship(
+        self,
+        db: AsyncSession,
+        generation: int,
+        relationship_id: int,
+        source: int,
+        target: int,
+        relationship_type: str,
+    ) -> None:
+        graph = self._advance(db, generation)
+        if graph is not None:
+            graph.add_relationship(relationship_id, source, target, relationship_type)
+
+    def invalidate(self, db: AsyncSession) -> None:
+        self._graphs.pop(_engine(db), None)
+
+    def clear(self) -> None:
+        self._graphs = WeakKeyDictionary()
+
+    def _advance(self, db: AsyncSession, generation: int) -> Optional[EntityGraph]:
+        """The graph to patch with write ``generation``, if it saw all before."""
+        engine = _engine(db)
+        graph = self._graphs.get(engine)
+        if graph is None:
+            return None
+        if graph.generation != generation - 1:
+            # Another writer committed in between; its change is unknown here.
+            self._graphs.pop(engine, None)
+            return None
+        graph.generation = generation
+        return graph
+
+    async def _stored_generation(self, db: AsyncSession) -> Optional[int]:
+        result = await db.execute(
+            select(CampaignGraphVersion.generation).where(
+                CampaignGraphVersion.id == GRAPH_VERSION_ID
+            )
+        )
+        return result.scalar_one_or_none()
+
+
+def _version_number(version: Optional[Dict[str, Any]]) -> int:
+    return version["version_number"] if version else 0
+
+
+def _engine(db: AsyncSession) -> Engine:
+    engine = db.get_bind()
+    if not isinstance(engine, Engine):
+        engine = engine.engine
+    return engine
+
+
+entity_graph_cache = EntityGraphCache()
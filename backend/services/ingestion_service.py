@@ -1,16 +1,41 @@
 from __future__ import annotations
 
 import logging
+import re
+from dataclasses import dataclass, fields
 from enum import Enum
-from typing import Any, List, Optional, Sequence
+from itertools import islice
+from collections.abc import AsyncIterable
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, raiseload, selectinload
 
+from backend.config.settings import settings
+from backend.models.base import title_key
 from backend.models.document import Document
 from backend.models.chunk import DocumentChunk
+from backend.models.embedding import decode_embedding, encode_embedding
+from backend.services.content_embedding_cache import content_embedding_cache
+from backend.services.corpus_version_service import corpus_version_service
 from backend.services.embedding_service import embedding_service
+from backend.services.near_duplicate_service import (
+    FILTER_FIELDS,
+    near_duplicate_service,
+)
+from backend.services.vector_index_service import vector_index_service
 
 logger = logging.getLogger(__name__)
 
@@ -26,37 +51,20 @@ class ChunkStrategy:
         self.max_chars = max_chars
         self.overlap = min(overlap, max_chars // 2)
 
-    def _split_paragraphs(self, text: str) -> List[str]:
-        paras = [p.strip() for p in text.split("\n\n") if p.strip()]
-        return paras if paras else [text.strip()]
-
     def chunk(self, text: Optional[str]) -> List[str]:
         if not text or not text.strip():
             return []
-        chunks: List[str] = []
-        paragraphs = self._split_paragraphs(text)
-        current: List[str] = []
-        current_len = 0
-        for para in paragraphs:
-            para_len = len(para)
-            if para_len >= self.max_chars:
-                # Hard split long paragraphs
-                if current:
-                    self._flush_chunk(" ".join(current), chunks)
-                    current, current_len = [], 0
-                for part in self._slice_long_paragraph(para):
-                    self._flush_chunk(part, chunks)
-                continue
+        return list(self.iter_chunks([text]))
 
-            if current_len + para_len + 1 > self.max_chars and current:
-                self._flush_chunk(" ".join(current), chunks)
-                current, current_len = [], 0
+    def iter_chunks(self, parts: Iterable[str]) -> Iterator[str]:
+        """Yield the chunks of ``"".join(parts)`` without joining the parts."""
+        stream = self.stream()
+        for part in parts:
+            yield from stream.feed(part)
+        yield from stream.close()
 
-            current.append(para)
-            current_len += para_len + 1
-
-        self._flush_chunk(" ".join(current), chunks)
-        return chunks
+    def stream(self) -> "ChunkStream":
+        return ChunkStream(self)
 
     def _slice_long_paragraph(self, para: str) -> List[str]:
         slices: List[str] = []
@@ -68,22 +76,163 @@ class ChunkStrategy:
                 break
         return slices
 
-    def _flush_chunk(self, text: str, chunks: List[str]) -> None:
+    def _flush_chunk(self, text: str, previous: Optional[str]) -> Optional[str]:
         cleaned = text.strip()
         if not cleaned:
-            return
-        if chunks:
+            return None
+        if previous and self.overlap:
             # Add overlap from previous chunk
-            overlap_text = chunks[-1][-self.overlap :]
+            overlap_text = previous[-self.overlap :]
             cleaned = f"{overlap_text} {cleaned}".strip()
-        chunks.append(cleaned)
+        return cleaned
+
+
+class ChunkStream:
+    """Incremental ``ChunkStrategy.chunk``: feed text pieces, get finished chunks.
+
+    Paragraphs are split on blank lines as they arrive. Only the unfinished
+    paragraph and the chunk being built are buffered; a paragraph longer than
+    ``max_chars`` is sliced while it is still being read. Pieces may come
+    from a file, a subprocess pipe or an async stream.
+    """
+
+    def __init__(self, strategy: ChunkStrategy) -> None:
+        self.strategy = strategy
+        self._buffer = ""
+        # Set once the unfinished paragraph has been partly emitted as slices.
+        self._sliced = False
+        self._current: List[str] = []
+        self._current_len = 0
+        self._previous: Optional[str] = None
+
+    def feed(self, part: str) -> List[str]:
+        strategy = self.strategy
+        chunks: List[str] = []
+        buffer = self._buffer + part
+        pos = 0
+        while True:
+            if not self._sliced:
+                pos = _skip_whitespace(buffer, pos)
+            end = buffer.find("\n\n", pos)
+            if end < 0:
+                break
+            self._paragraph(buffer[pos:end], chunks)
+            pos, self._sliced = end + 2, False
+        # Slice a long unfinished paragraph so the buffer stays bounded.
+        limit = len(buffer.rstrip())
+        while limit - pos > strategy.max_chars:
+            if not self._sliced:
+                self._flush_current(chunks)
+            self._emit(buffer[pos : pos + strategy.max_chars], chunks)
+            pos += strategy.max_chars - strategy.overlap
+            self._sliced = True
+        self._buffer = buffer[pos:]
+        return chunks
+
+    def close(self) -> List[str]:
+        chunks: List[str] = []
+        buffer = self._buffer if self._sliced else self._buffer.lstrip()
+        self._paragraph(buffer, chunks)
+        self._buffer, self._sliced = "", False
+        self._flush_current(chunks)
+        return chunks
+
+    def _paragraph(self, text: str, chunks: List[str]) -> None:
+        para = text.rstrip()
+        if not para:
+            return
+        strategy = self.strategy
+        if self._sliced or len(para) >= strategy.max_chars:
+            # Hard split long paragraphs
+            self._flush_current(chunks)
+            for part in strategy._slice_long_paragraph(para):
+                self._emit(part, chunks)
+            return
+        if self._current_len + len(para) + 1 > strategy.max_chars and self._current:
+            self._flush_current(chunks)
+        self._current.append(para)
+        self._current_len += len(para) + 1
+
+    def _flush_current(self, chunks: List[str]) -> None:
+        if self._current:
+            self._emit(" ".join(self._current), chunks)
+            self._current, self._current_len = [], 0
+
+    def _emit(self, text: str, chunks: List[str]) -> None:
+        chunk = self.strategy._flush_chunk(text, self._previous)
+        if chunk is not None:
+            self._previous = chunk
+            chunks.append(chunk)
+
+
+_NON_WHITESPACE = re.compile(r"\S")
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _NON_WHITESPACE.search(text, pos)
+    return match.start() if match else len(text)
+
+
+@dataclass
+class DocumentInput:
+    """One document for ``IngestionService.ingest_documents_bulk``.
+
+    ``chunks`` may carry chunk texts already cut from ``content`` by the same
+    ``ChunkStrategy``; otherwise the content is chunked during ingestion.
+    """
+
+    title: str
+    kind: str
+    content: Optional[str] = None
+    summary: Optional[str] = None
+    source_name: Optional[str] = None
+    url: Optional[str] = None
+    source_class: str = "private_local"
+    privacy_scope: str = "private_local"
+    review_status: str = "approved"
+    visibility_scope: str = "gm_only"
+    rag_eligible: bool = True
+    train_eligible: bool = False
+    chunks: Optional[List[str]] = None
+
+    def columns(self) -> Dict[str, Any]:
+        values = {
+            column.name: getattr(self, column.name)
+            for column in fields(self)
+            if column.name != "chunks"
+        }
+        # Core inserts skip Document's title validator.
+        values["title_key"] = title_key(self.title)
+        return {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in values.items()
+        }
+
+
+ChunkOwner = tuple[int, str, bool, str]
+
+
+class _BulkIndexUpdates:
+    """ANN index changes of one bulk batch, applied once it has committed."""
+
+    def __init__(self) -> None:
+        self.removed: List[int] = []
+        self.retagged: List[Document] = []
+        self.indexed: List[tuple[ChunkOwner, List[tuple[int, Any]]]] = []
+        self.promoted: List[DocumentChunk] = []
 
 
 class IngestionService:
     """Ingests documents, chunks them, and persists both text and embeddings."""
 
-    def __init__(self, chunk_strategy: Optional[ChunkStrategy] = None) -> None:
+    def __init__(
+        self,
+        chunk_strategy: Optional[ChunkStrategy] = None,
+        chunk_batch_size: int = 50,
+    ) -> None:
         self.chunk_strategy = chunk_strategy or ChunkStrategy()
+        # Chunks are embedded and inserted this many at a time.
+        self.chunk_batch_size = max(1, chunk_batch_size)
 
     async def ingest_document(
         self,
@@ -138,13 +287,329 @@ class IngestionService:
         db.add(document)
         await db.flush()
 
-        chunks = self.chunk_strategy.chunk(content or "")
+        chunks = self.chunk_strategy.iter_chunks([content or ""])
         await self._attach_chunks(document, chunks, db)
-        await self._maybe_embed_document(document)
+        await self._maybe_embed_document(db, document)
+        await self._bump_corpus_version(db, document.kind)
+        await db.commit()
+        await self._reload_columns(db, document)
+        return document
+
+    async def ingest_document_stream(
+        self,
+        db: AsyncSession,
+        *,
+        title: str,
+        kind: str,
+        parts: Union[Iterable[str], AsyncIterable[str]],
+        store_content: bool = False,
+        summary: Optional[str] = None,
+        source_name: Optional[str] = None,
+        url: Optional[str] = None,
+        source_class: str = "private_local",
+        privacy_scope: str = "private_local",
+        review_status: str = "approved",
+        visibility_scope: str = "gm_only",
+        rag_eligible: bool = True,
+        train_eligible: bool = False,
+    ) -> Document:
+        """Ingest text arriving in pieces, e.g. a file or a subprocess pipe.
+
+        Chunks are embedded and inserted ``chunk_batch_size`` at a time as the
+        pieces arrive, so chunking, embedding and inserts use bounded memory
+        whatever the document size. ``Document.content`` stays empty unless
+        ``store_content`` is true, which keeps the joined text in memory until
+        the commit. The returned document does not have ``chunks`` loaded.
+        """
+        document = Document(
+            title=title, kind=kind, summary=summary, source_name=source_name, url=url
+        )
+        self._apply_governance_fields(
+            document,
+            {
+                "source_class": source_class,
+                "privacy_scope": privacy_scope,
+                "review_status": review_status,
+                "visibility_scope": visibility_scope,
+                "rag_eligible": rag_eligible,
+                "train_eligible": train_eligible,
+            },
+        )
+        db.add(document)
+        await db.flush()
+
+        stream = self.chunk_strategy.stream()
+        kept: List[str] = []
+        pending: List[str] = []
+        next_index = 0
+        async for part in _iterate(parts):
+            if store_content:
+                kept.append(part)
+            pending.extend(stream.feed(part))
+            while len(pending) >= self.chunk_batch_size:
+                batch = pending[: self.chunk_batch_size]
+                del pending[: self.chunk_batch_size]
+                next_index = await self._insert_chunks(document, batch, next_index, db)
+        pending.extend(stream.close())
+        await self._attach_chunks(document, pending, db, start_index=next_index)
+
+        if store_content:
+            document.content = "".join(kept)
+            kept.clear()
+        await self._maybe_embed_document(db, document)
+        await self._bump_corpus_version(db, document.kind)
         await db.commit()
-        await db.refresh(document)
+        await self._reload_columns(db, document)
         return document
 
+    async def ingest_documents_bulk(
+        self,
+        db: AsyncSession,
+        documents: Iterable[DocumentInput],
+        *,
+        dedupe_on_url: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Ingest many documents, committing once per ``batch_size`` of them.
+
+        Per batch, documents already stored under the same ``(kind, url)`` are
+        found with one ``url IN`` query and updated (re-chunked when their
+        content changed); the rest are inserted with one executemany. All
+        chunks of the batch are inserted together, and document and chunk
+        texts are embedded in ``max_embedding_batch_size`` provider calls.
+        Returns counts of documents read, created and updated, and chunks
+        written.
+        """
+        size = max(1, batch_size or settings.ingestion_bulk_batch_size)
+        counts = {"documents": 0, "created": 0, "updated": 0, "chunks": 0}
+        iterator = iter(documents)
+        while batch := list(islice(iterator, size)):
+            counts["documents"] += len(batch)
+            updates = await self._ingest_bulk_batch(db, batch, dedupe_on_url, counts)
+            for kind in {item.kind for item in batch}:
+                await self._bump_corpus_version(db, kind)
+            await db.commit()
+            await self._apply_bulk_index_updates(db, updates)
+        return counts
+
+    async def _ingest_bulk_batch(
+        self,
+        db: AsyncSession,
+        batch: Sequence[DocumentInput],
+        dedupe_on_url: bool,
+        counts: Dict[str, int],
+    ) -> _BulkIndexUpdates:
+        # A URL repeated within the batch keeps its last version.
+        latest: Dict[Hashable, DocumentInput] = {}
+        for position, item in enumerate(batch):
+            key = (item.kind, item.url) if dedupe_on_url and item.url else position
+            latest[key] = item
+        items = list(latest.values())
+
+        existing: Dict[Hashable, Document] = {}
+        urls = {item.url for item in items if dedupe_on_url and item.url}
+        if urls:
+            stmt = (
+                select(Document)
+                .options(raiseload(Document.chunks))
+                .where(Document.url.in_(urls))
+                .order_by(Document.id)
+            )
+            for stored in (await db.execute(stmt)).scalars().all():
+                existing.setdefault((stored.kind, stored.url), stored)
+
+        updated: List[Document] = []
+        created: List[DocumentInput] = []
+        rechunked: List[Document] = []
+        rechunked_items: List[DocumentInput] = []
+        refiltered: List[Document] = []
+        updates = _BulkIndexUpdates()
+        for item in items:
+            document = existing.get((item.kind, item.url)) if item.url else None
+            if document is None:
+                created.append(item)
+                continue
+            content_changed = document.content != item.content
+            for column, value in item.columns().items():
+                setattr(document, column, value)
+            updated.append(document)
+            if content_changed:
+                rechunked.append(document)
+                rechunked_items.append(item)
+            elif _filters_changed(document):
+                refiltered.append(document)
+            else:
+                updates.retagged.append(document)
+
+        if rechunked:
+            rechunked_ids = [document.id for document in rechunked]
+            chunk_ids = (
+                await db.execute(
+                    select(DocumentChunk.id).where(
+                        DocumentChunk.document_id.in_(rechunked_ids)
+                    )
+                )
+            ).scalars()
+            updates.promoted = await near_duplicate_service.release(db, chunk_ids)
+            await db.execute(
+                delete(DocumentChunk).where(
+                    DocumentChunk.document_id.in_(rechunked_ids)
+                )
+            )
+            updates.removed.extend(rechunked_ids)
+        for document in refiltered:
+            updates.removed.append(document.id)
+            updates.promoted.extend(
+                await near_duplicate_service.relink(db, document.id)
+            )
+
+        # Document texts first, then every chunk, in one cache lookup and as
+        # few provider batches as MAX_EMBEDDING_BATCH_SIZE allows.
+        doc_texts = [
+            embedding_service.create_document_text(document.__dict__)
+            for document in updated
+        ] + [embedding_service.create_document_text(item.columns()) for item in created]
+        chunked = [
+            (
+                item.chunks
+                if item.chunks is not None
+                else self.chunk_strategy.chunk(item.content)
+            )
+            for item in rechunked_items + created
+        ]
+        chunk_texts = [text for texts in chunked for text in texts]
+        vectors = await content_embedding_cache.embed_texts(
+            db,
+            doc_texts + chunk_texts,
+            batch_size=settings.max_embedding_batch_size,
+        )
+        doc_vectors, chunk_vectors = (
+            vectors[: len(doc_texts)],
+            vectors[len(doc_texts) :],
+        )
+
+        for document, vector in zip(updated, doc_vectors):
+            document.set_embedding(vector, model=content_embedding_cache.model_key)
+        created_ids: List[int] = []
+        if created:
+            rows = [
+                {**item.columns(), **_embedding_columns(vector)}
+                for item, vector in zip(created, doc_vectors[len(updated) :])
+            ]
+            created_ids = list(
+                (
+                    await db.execute(
+                        insert(Document).returning(
+                            Document.id, sort_by_parameter_order=True
+                        ),
+                        rows,
+                    )
+                ).scalars()
+            )
+
+        owners = [
+            (
+                document.id,
+                document.kind,
+                document.rag_eligible,
+                document.visibility_scope,
+            )
+            for document in rechunked
+        ] + [
+            (document_id, item.kind, item.rag_eligible, item.visibility_scope)
+            for document_id, item in zip(created_ids, created)
+        ]
+        updates.indexed = await self._bulk_insert_chunks(
+            db, owners, chunked, chunk_vectors
+        )
+        counts["created"] += len(created)
+        counts["updated"] += len(updated)
+        counts["chunks"] += len(chunk_texts)
+        return updates
+
+    async def _apply_bulk_index_updates(
+        self, db: AsyncSession, updates: _BulkIndexUpdates
+    ) -> None:
+        # Only after the commit, so a failed batch leaves the index untouched.
+        for document_id in updates.removed:
+            vector_index_service.remove_document(document_id)
+        for document in updates.retagged:
+            vector_index_service.update_document(document)
+        for owner, vectors in updates.indexed:
+            document_id, kind, rag_eligible, visibility_scope = owner
+            vector_index_service.index_vectors(
+                document_id,
+                vectors,
+                kind=kind,
+                rag_eligible=rag_eligible,
+                visibility_scope=visibility_scope,
+            )
+        await self._index_promoted(db, updates.promoted)
+
+    async def _bulk_insert_chunks(
+        self,
+        db: AsyncSession,
+        owners: Sequence[ChunkOwner],
+        chunked: Sequence[List[str]],
+        vectors: Sequence[Optional[List[float]]],
+    ) -> List[tuple[ChunkOwner, List[tuple[int, Any]]]]:
+        """Insert the chunks of many documents with one executemany.
+
+        ``owners`` holds ``(document_id, kind, rag_eligible, visibility_scope)``
+        for each list of chunk texts in ``chunked``. Returns each owner with
+        the ``(chunk_id, embedding)`` pairs to index once committed.
+        """
+        rows: List[Dict[str, Any]] = []
+        owner_of: List[ChunkOwner] = []
+        embeddings = iter(vectors)
+        for owner, texts in zip(owners, chunked):
+            for idx, text in enumerate(texts):
+                rows.append(
+                    {
+                        "document_id": owner[0],
+                        "chunk_index": idx,
+                        "content": text,
+                        **_embedding_columns(next(embeddings)),
+                        **near_duplicate_service.fingerprint_columns(text),
+                    }
+                )
+                owner_of.append(owner)
+        if not rows:
+            return []
+        chunk_ids = list(
+            (
+                await db.execute(
+                    insert(DocumentChunk).returning(
+                        DocumentChunk.id, sort_by_parameter_order=True
+                    ),
+                    rows,
+                )
+            ).scalars()
+        )
+        canonical = await near_duplicate_service.assign(
+            db, [(chunk_id, row["simhash"]) for chunk_id, row in zip(chunk_ids, rows)]
+        )
+        links = [
+            {"id": chunk_id, "canonical_chunk_id": canonical_id}
+            for chunk_id, canonical_id in canonical.items()
+            if canonical_id is not None
+        ]
+        if links:
+            await db.execute(update(DocumentChunk), links)
+
+        by_document: Dict[int, List[tuple[int, Any]]] = {}
+        for chunk_id, row, owner in zip(chunk_ids, rows, owner_of):
+            if canonical.get(chunk_id) is None:
+                by_document.setdefault(owner[0], []).append(
+                    (
+                        chunk_id,
+                        decode_embedding(
+                            row["embedding_vector"], row["embedding_dtype"]
+                        ),
+                    )
+                )
+        return [(owner, by_document.get(owner[0], [])) for owner in owners]
+
     def _apply_governance_fields(
         self, document: Document, governance_fields: dict[str, Any]
     ) -> None:
@@ -166,54 +631,202 @@ class IngestionService:
         return result.scalar_one_or_none()
 
     async def _attach_chunks(
-        self, document: Document, chunks: Sequence[str], db: AsyncSession
+        self,
+        document: Document,
+        chunks: Iterable[str],
+        db: AsyncSession,
+        *,
+        start_index: int = 0,
     ) -> None:
-        if not chunks:
-            return
-        embeddings = await self._maybe_embed_chunks(chunks)
-        for idx, (text, embedding) in enumerate(zip(chunks, embeddings)):
+        iterator = iter(chunks)
+        while batch := list(islice(iterator, self.chunk_batch_size)):
+            start_index = await self._insert_chunks(document, batch, start_index, db)
+
+    async def _insert_chunks(
+        self,
+        document: Document,
+        chunks: Sequence[str],
+        start_index: int,
+        db: AsyncSession,
+    ) -> int:
+        """Embed and insert one batch of chunks; returns the next chunk index."""
+        embeddings = await self._maybe_embed_chunks(db, chunks)
+        doc_chunks: List[DocumentChunk] = []
+        for idx, (text, embedding) in enumerate(
+            zip(chunks, embeddings), start=start_index
+        ):
             doc_chunk = DocumentChunk(
                 document_id=document.id,
                 chunk_index=idx,
                 content=text,
-                embedding=embedding,
             )
-            doc_chunk.document = document
+            doc_chunk.set_embedding(embedding, model=content_embedding_cache.model_key)
+            near_duplicate_service.fingerprint(doc_chunk)
             db.add(doc_chunk)
+            doc_chunks.append(doc_chunk)
         await db.flush()
+        await near_duplicate_service.link(db, doc_chunks)
+        vector_index_service.index_chunks(
+            document, [c for c in doc_chunks if c.canonical_chunk_id is None]
+        )
+        return start_index + len(doc_chunks)
+
+    async def _release_duplicates(
+        self, db: AsyncSession, document_id: int
+    ) -> List[DocumentChunk]:
+        # Copies elsewhere that point at this document's chunks need a new
+        # canonical chunk before these rows go away.
+        chunk_ids = (
+            await db.execute(
+                select(DocumentChunk.id).where(DocumentChunk.document_id == document_id)
+            )
+        ).scalars()
+        return await near_duplicate_service.release(db, chunk_ids)
+
+    async def _relink(
+        self, db: AsyncSession, document: Document
+    ) -> List[DocumentChunk]:
+        # Its chunks may now link elsewhere and its copies may not follow it;
+        # the returned chunks are indexed again once committed.
+        vector_index_service.remove_document(document.id)
+        return await near_duplicate_service.relink(db, document.id)
+
+    async def _index_promoted(
+        self, db: AsyncSession, promoted: Sequence[DocumentChunk]
+    ) -> None:
+        if not promoted:
+            return
+        stmt = (
+            select(Document)
+            .options(defer(Document.content), raiseload(Document.chunks))
+            .where(Document.id.in_({chunk.document_id for chunk in promoted}))
+        )
+        documents = {d.id: d for d in (await db.execute(stmt)).scalars().all()}
+        for chunk in promoted:
+            vector_index_service.index_chunks(documents[chunk.document_id], [chunk])
 
     async def refresh_document(
         self, db: AsyncSession, document: Document, *, rechunk: bool = False
     ) -> Document:
+        # Pending kind changes are flushed below; remember the kind it left.
+        previous_kinds = inspect(document).attrs.kind.history.deleted or ()
+        promoted: List[DocumentChunk] = []
         if rechunk:
+            promoted = await self._release_duplicates(db, document.id)
             await db.execute(
                 delete(DocumentChunk).where(DocumentChunk.document_id == document.id)
             )
             await db.flush()
-            chunks = self.chunk_strategy.chunk(document.content or "")
+            vector_index_service.remove_document(document.id)
+            chunks = self.chunk_strategy.iter_chunks([document.content or ""])
             await self._attach_chunks(document, chunks, db)
+        elif _filters_changed(document):
+            promoted = await self._relink(db, document)
+        else:
+            vector_index_service.update_document(document)
 
-        await self._maybe_embed_document(document)
+        await self._maybe_embed_document(db, document)
+        for kind in {document.kind, *previous_kinds}:
+            await self._bump_corpus_version(db, kind)
         await db.commit()
-        await db.refresh(document)
+        await self._reload_columns(db, document)
+        await self._index_promoted(db, promoted)
         return document
 
-    async def _maybe_embed_document(self, document: Document) -> None:
+    async def update_metadata(self, db: AsyncSession, document: Document) -> Document:
+        """Commit changes that need no new embedding, such as visibility or
+        RAG eligibility, and bring the ANN index in line."""
+        previous_kinds = inspect(document).attrs.kind.history.deleted or ()
+        relink = _filters_changed(document)
+        promoted = await self._relink(db, document) if relink else []
+        for kind in {document.kind, *previous_kinds}:
+            await self._bump_corpus_version(db, kind)
+        await db.commit()
+        await self._reload_columns(db, document)
+        if relink:
+            await self._index_promoted(db, promoted)
+        else:
+            vector_index_service.update_document(document)
+        return document
+
+    async def delete_document(self, db: AsyncSession, document: Document) -> None:
+        document_id = document.id
+        kind = document.kind
+        promoted = await self._release_duplicates(db, document_id)
+        await db.delete(document)
+        await self._bump_corpus_version(db, kind)
+        await db.commit()
+        vector_index_service.remove_document(document_id)
+        await self._index_promoted(db, promoted)
+
+    async def _reload_columns(self, db: AsyncSession, document: Document) -> None:
+        # Picks up database-side values such as timestamps. A plain refresh
+        # would also read every chunk back through the selectin ``chunks``
+        # relationship, and ``content`` is what was just written.
+        await db.refresh(
+            document,
+            attribute_names=[
+                attr.key
+                for attr in inspect(Document).column_attrs
+                if attr.key != "content"
+            ],
+        )
+
+    async def _bump_corpus_version(self, db: AsyncSession, kind: Optional[str]) -> None:
+        # Rules answers are cached per corpus version (see RulesService); it
+        # is bumped before the commit, so the write and the bump land together.
+        if kind == "rule":
+            await corpus_version_service.bump(db, kind)
+
+    async def _maybe_embed_document(self, db: AsyncSession, document: Document) -> None:
         text = embedding_service.create_document_text(document.__dict__)
-        document.embedding = await embedding_service.generate_embedding(text)
+        document.set_embedding(
+            await content_embedding_cache.embed_text(db, text),
+            model=content_embedding_cache.model_key,
+        )
 
     async def _maybe_embed_chunks(
-        self, chunks: Sequence[str]
+        self, db: AsyncSession, chunks: Sequence[str]
     ) -> List[Optional[List[float]]]:
         if not chunks:
             return []
-        # Batch for efficiency
-        batch_size = max(1, min(len(chunks), 50))
-        embeddings: List[Optional[List[float]]] = []
-        for start in range(0, len(chunks), batch_size):
-            batch = chunks[start : start + batch_size]
-            embeddings.extend(await embedding_service.generate_embeddings_batch(batch))
-        return embeddings
+        # Unchanged chunk text reuses its cached vector; misses are batched.
+        return await content_embedding_cache.embed_texts(
+            db, chunks, batch_size=self.chunk_batch_size
+        )
+
+
+def _embedding_columns(values: Optional[Sequence[float]]) -> Dict[str, Any]:
+    """Embedding column values for a bulk insert, as ``set_embedding`` sets them."""
+    if not values:
+        return {
+            "embedding_vector": None,
+            "embedding_dtype": None,
+            "embedding_model": None,
+        }
+    blob, dtype = encode_embedding(values)
+    return {
+        "embedding_vector": blob,
+        "embedding_dtype": dtype,
+        "embedding_model": content_embedding_cache.model_key,
+    }
+
+
+def _filters_changed(document: Document) -> bool:
+    """Whether pending changes touch the fields near-duplicate links respect."""
+    state = inspect(document)
+    return any(state.attrs[field].history.deleted for field in FILTER_FIELDS)
+
+
+async def _iterate(
+    parts: Union[Iterable[str], AsyncIterable[str]]
+) -> AsyncIterator[str]:
+    if isinstance(parts, AsyncIterable):
+        async for part in parts:
+            yield part
+    else:
+        for part in parts:
+            yield part
 
 
 ingestion_service = IngestionService()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Set
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import (
+    Subquery,
+    bindparam,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.expression import ColumnClause
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.fulltext import fts_table_name
+
+DOCUMENTS_FTS = fts_table_name("documents")
+CHUNKS_FTS = fts_table_name("document_chunks")
+ENTITIES_FTS = fts_table_name("campaign_entities")
+KEYWORD_RECALL_LIMIT = 200
+# bm25 weights of name, stable_key, summary, description, tags, details.
+ENTITY_FTS_WEIGHTS = (10.0, 8.0, 3.0, 1.0, 2.0, 1.0)
+# Constants of FTS5's bm25(): k1, and the floor it puts under a phrase's idf.
+BM25_K1 = 1.2
+BM25_MIN_IDF = 1e-6
+
+
+class KeywordIndexService:
+    """BM25 keyword scoring over the SQLite FTS5 mirrors of documents/chunks
+    and campaign entities.
+
+    The FTS tables are maintained by triggers (see ``backend.models.fulltext``),
+    so a query only reads the postings of its terms. ``available`` and
+    ``entities_available`` are False on databases without the tables and
+    callers fall back to substring scoring.
+    """
+
+    def __init__(self) -> None:
+        self._tables: "WeakKeyDictionary[Engine, Set[str]]" = WeakKeyDictionary()
+
+    async def available(self, db: AsyncSession) -> bool:
+        return {DOCUMENTS_FTS, CHUNKS_FTS} <= await self._fts_tables(db)
+
+    async def entities_available(self, db: AsyncSession) -> bool:
+        return ENTITIES_FTS in await self._fts_tables(db)
+
+    def match_phrases(self, terms: Sequence[str]) -> List[str]:
+        """The expanded query terms as FTS phrases, without duplicates."""
+        clauses: List[str] = []
+        for term in terms:
+            tokens = _fts_tokens(term)
+            if tokens:
+                clauses.append('"' + " ".join(tokens) + '"')
+        return list(dict.fromkeys(clauses))
+
+    def match_expression(self, terms: Sequence[str]) -> Optional[str]:
+        """OR together the expanded query terms; multi-word terms become phrases."""
+        phrases = self.match_phrases(terms)
+        return " OR ".join(phrases) if phrases else None
+
+    def prefix_match_expression(self, query: str) -> Optional[str]:
+        """Every word of ``query`` as a prefix term, so "capt mir" finds "Captain Mira"."""
+        tokens = _fts_tokens(query)
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in dict.fromkeys(tokens))
+
+    def entity_matches(self, match: str) -> Subquery:
+        """``entity_id`` and bm25 ``rank`` (lower is better) of matching entities."""
+        fts = table(ENTITIES_FTS, column("rowid"))
+        fts_column: ColumnClause[Any] = literal_column(ENTITIES_FTS)
+        return (
+            select(
+                fts.c.rowid.label("entity_id"),
+                func.bm25(fts_column, *ENTITY_FTS_WEIGHTS).label("rank"),
+            )
+            .where(fts_column.op("MATCH")(match))
+            .subquery()
+        )
+
+    async def document_scores(
+        self, db: AsyncSession, match: str, document_ids: Sequence[int]
+    ) -> Dict[int, float]:
+        """BM25 scores (higher is better) for matching ids in ``document_ids``."""
+        if not document_ids:
+            return {}
+        return await self._scores(
+            db,
+            f"SELECT rowid, -bm25({DOCUMENTS_FTS}) FROM {DOCUMENTS_FTS} "
+            f"WHERE {DOCUMENTS_FTS} MATCH :match "
+            "AND rowid IN :ids",
+            match,
+            document_ids,
+        )
+
+    async def chunk_scores(
+        self, db: AsyncSession, match: str, document_ids: Sequence[int]
+    ) -> Dict[int, float]:
+        """BM25 scores keyed by chunk id for chunks of ``document_ids``."""
+        if not document_ids:
+            return {}
+        return await self._scores(
+            db,
+            f"SELECT rowid, -bm25({CHUNKS_FTS}) FROM {CHUNKS_FTS} "
+            f"WHERE {CHUNKS_FTS} MATCH :match AND rowid IN ("
+            "SELECT id FROM document_chunks "
+            "WHERE document_id IN :ids)",
+            match,
+            document_ids,
+        )
+
+    async def document_score_bound(
+        self, db: AsyncSession, phrases: Sequence[str]
+    ) -> float:
+        """Highest BM25 score a document could reach for ``phrases``."""
+        return await self._score_bound(db, DOCUMENTS_FTS, "documents", phrases)
+
+    async def chunk_score_bound(
+        self, db: AsyncSession, phrases: Sequence[str]
+    ) -> float:
+        """Highest BM25 score a chunk could reach for ``phrases``."""
+        return await self._score_bound(db, CHUNKS_FTS, "document_chunks", phrases)
+
+    async def search_documents(
+        self, db: AsyncSession, match: str, limit: int = KEYWORD_RECALL_LIMIT
+    ) -> List[int]:
+        """Ids of the best BM25 matches across the whole corpus."""
+        result = await db.execute(
+            text(
+                f"SELECT rowid FROM {DOCUMENTS_FTS} "
+                f"WHERE {DOCUMENTS_FTS} MATCH :match "
+                f"ORDER BY bm25({DOCUMENTS_FTS}) LIMIT :limit"
+            ),
+            {"match": match, "limit": limit},
+        )
+        return [int(row[0]) for row in result.all()]
+
+    async def _fts_tables(self, db: AsyncSession) -> Set[str]:
+        engine = db.get_bind()
+        if not isinstance(engine, Engine):
+            engine = engine.engine
+        cached = self._tables.get(engine)
+        if cached is None:
+            cached = set()
+            if engine.dialect.name == "sqlite":
+                found = await db.execute(
+                    text(
+                        "SELECT name FROM sqlite_master "
+                        "WHERE type = 'table' AND name IN (:docs, :chunks, :entities)"
+                    ),
+                    {
+                        "docs": DOCUMENTS_FTS,
+                        "chunks": CHUNKS_FTS,
+                        "entities": ENTITIES_FTS,
+                    },
+                )
+                cached = set(found.scalars().all())
+            self._tables[engine] = cached
+        return cached
+
+    async def _score_bound(
+        self, db: AsyncSession, fts: str, table_name: str, phrases: Sequence[str]
+    ) -> float:
+        # Each phrase adds at most idf * (k1 + 1), reached as its term
+        # frequency grows; the idf uses the row and match counts bm25() sees.
+        # Phrases no row contains, such as the whole query of an expansion,
+        # cannot add to any score and are left out.
+        if not phrases:
+            return 0.0
+        counts = [f"(SELECT count(*) FROM {table_name})"] + [
+            f"(SELECT count(*) FROM {fts} WHERE {fts} MATCH :p{i})"
+            for i in range(len(phrases))
+        ]
+        row = (
+            await db.execute(
+                text("SELECT " + ", ".join(counts)),
+                {f"p{i}": phrase for i, phrase in enumerate(phrases)},
+            )
+        ).one()
+        total = row[0]
+        return sum(
+            max(BM25_MIN_IDF, math.log((total - matched + 0.5) / (matched + 0.5)))
+            * (BM25_K1 + 1)
+            for matched in row[1:]
+            if matched
+        )
+
+    async def _scores(
+        self, db: AsyncSession, sql: str, match: str, ids: Sequence[int]
+    ) -> Dict[int, float]:
+        stmt = text(sql).bindparams(bindparam("ids", expanding=True))
+        result = await db.execute(stmt, {"match": match, "ids": list(ids)})
+        return {int(row[0]): float(row[1]) for row in result.all()}
+
+
+def _fts_tokens(text: str) -> List[str]:
+    # Split like the unicode61 tokenizer: every non-alphanumeric character
+    # separates tokens, so "NPC-0001" is stored and queried as "npc" "0001".
+    return "".join(ch if ch.isalnum() else " " for ch in text).split()
+
+
+keyword_index_service = KeywordIndexService()
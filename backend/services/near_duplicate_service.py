@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config.settings import settings
+from backend.models.chunk import DocumentChunk
+from backend.models.document import Document
+
+SIMHASH_BITS = 64
+BAND_BITS = 16
+BANDS = SIMHASH_BITS // BAND_BITS
+# Four bands: any two hashes within 3 bits agree exactly on at least one band.
+MAX_DISTANCE = BANDS - 1
+SHINGLE_WORDS = 3
+# Every document field RetrievalService._apply_filters can filter on, so only
+# chunks of documents agreeing on all of them may share a canonical chunk.
+FILTER_FIELDS = (
+    "kind",
+    "source_class",
+    "privacy_scope",
+    "review_status",
+    "visibility_scope",
+    "rag_eligible",
+    "train_eligible",
+)
+
+_MASK = (1 << SIMHASH_BITS) - 1
+_WORD = re.compile(r"\w+")
+_BAND_COLUMNS = (
+    DocumentChunk.simhash_band_0,
+    DocumentChunk.simhash_band_1,
+    DocumentChunk.simhash_band_2,
+    DocumentChunk.simhash_band_3,
+)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over lower-cased word 3-shingles, as a signed integer."""
+    words = _WORD.findall(text.lower())
+    if len(words) > SHINGLE_WORDS:
+        features = Counter(
+            " ".join(words[i : i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        )
+    else:
+        features = Counter([" ".join(words)])
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            for feature in features
+        ],
+        dtype=np.uint64,
+    )
+    weights = np.array(list(features.values()), dtype=np.int64)
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    totals = ((bits.astype(np.int64) * 2 - 1) * weights[:, None]).sum(axis=0)
+    value = sum(1 << bit for bit in np.flatnonzero(totals > 0).tolist())
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def simhash_bands(value: int) -> Tuple[int, ...]:
+    unsigned = value & _MASK
+    mask = (1 << BAND_BITS) - 1
+    return tuple((unsigned >> (band * BAND_BITS)) & mask for band in range(BANDS))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class NearDuplicateService:
+    """Links near-duplicate chunks to the first chunk with (almost) the same text.
+
+    Chunks repeat across documents when the same source arrives through
+    ``mirror-rag``, vault sync and asset import. A chunk whose SimHash is
+    within ``max_distance`` bits of an earlier canonical chunk of a document
+    with the same ``FILTER_FIELDS`` gets ``canonical_chunk_id``. Linked chunks
+    stay in the table, so their document is complete, but the ANN index skips
+    them and retrieval drops a duplicate when its canonical chunk is among the
+    same candidates. Any filter that admits a linked chunk admits its
+    canonical chunk too; ``relink`` keeps that true when a document's filter
+    fields change.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_distance: Optional[int] = None,
+    ) -> None:
+        self.enabled = settings.chunk_dedupe_enabled if enabled is None else enabled
+        distance = (
+            settings.chunk_dedupe_max_distance if max_distance is None else max_distance
+        )
+        self.max_distance = max(0, min(MAX_DISTANCE, distance))
+
+    def fingerprint(self, chunk: DocumentChunk) -> None:
+        for column, value in self.fingerprint_columns(chunk.content).items():
+            setattr(chunk, column, value)
+
+    def fingerprint_columns(self, text: str) -> Dict[str, int]:
+        """``simhash`` and band column values for ``text``, for bulk inserts."""
+        value = simhash(text)
+        columns = {"simhash": value}
+        for band, band_value in enumerate(simhash_bands(value)):
+            columns[f"simhash_band_{band}"] = band_value
+        return columns
+
+    async def link(self, db: AsyncSession, chunks: Sequence[DocumentChunk]) -> int:
+        """Point flushed, fingerprinted ``chunks`` at earlier copies.
+
+        Returns how many were linked.
+        """
+        canonical = await self.assign(
+            db, [(c.id, c.simhash) for c in chunks if c.simhash is not None]
+        )
+        for chunk in chunks:
+            if chunk.id in canonical:
+                chunk.canonical_chunk_id = canonical[chunk.id]
+        return sum(1 for value in canonical.values() if value is not None)
+
+    async def assign(
+        self, db: AsyncSession, hashed: Sequence[Tuple[int, int]]
+    ) -> Dict[int, Optional[int]]:
+        """Canonical chunk id (None if none) for stored ``(chunk_id, simhash)``.
+
+        Chunks are compared with canonical chunks already stored and with
+        each other, in id order, among chunks whose documents share the
+        ``FILTER_FIELDS``.
+        """
+        if not self.enabled or not hashed:
+            return {}
+        chunk_ids = [chunk_id for chunk_id, _ in hashed]
+        filter_columns = [getattr(Document, field) for field in FILTER_FIELDS]
+        filters_of = {
+            row[0]: tuple(row[1:])
+            for row in (
+                await db.execute(
+                    select(DocumentChunk.id, *filter_columns)
+                    .join(Document, Document.id == DocumentChunk.document_id)
+                    .where(DocumentChunk.id.in_(chunk_ids))
+                )
+            ).all()
+        }
+        bands = [simhash_bands(value) for _, value in hashed]
+        stmt = (
+            select(DocumentChunk.id, DocumentChunk.simhash, *filter_columns)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .where(DocumentChunk.canonical_chunk_id.is_(None))
+            .where(DocumentChunk.simhash.is_not(None))
+            .where(DocumentChunk.id.not_in(chunk_ids))
+            .where(
+                or_(
+                    *(
+                        column.in_({chunk_bands[band] for chunk_bands in bands})
+                        for band, column in enumerate(_BAND_COLUMNS)
+                    )
+                )
+            )
+        )
+        known: Dict[Tuple[object, ...], List[Tuple[int, int]]] = {}
+        for row in (await db.execute(stmt)).all():
+            known.setdefault(tuple(row[2:]), []).append((row.id, row.simhash))
+        canonical: Dict[int, Optional[int]] = {}
+        for chunk_id, value in sorted(hashed):
+            candidates = known.setdefault(filters_of.get(chunk_id, ()), [])
+            canonical[chunk_id] = self._closest(value, candidates)
+            if canonical[chunk_id] is None:
+                candidates.append((chunk_id, value))
+        return canonical
+
+    async def relink(self, db: AsyncSession, document_id: int) -> List[DocumentChunk]:
+        """Link a document's chunks again after its ``FILTER_FIELDS`` changed.
+
+        Copies elsewhere that pointed at its chunks get a new canonical chunk,
+        and its own chunks are matched against documents with the new values.
+        Returns the chunks that are now canonical and must be (re)indexed.
+        """
+        stmt = (
+            select(DocumentChunk)
+            .where(DocumentChunk.document_id == document_id)
+            .order_by(DocumentChunk.id)
+        )
+        chunks = list((await db.execute(stmt)).scalars().all())
+        promoted = await self.release(db, [chunk.id for chunk in chunks])
+        for chunk in chunks:
+            chunk.canonical_chunk_id = None
+        await db.flush()
+        await self.link(db, chunks)
+        await db.flush()
+        return promoted + [
+            chunk for chunk in chunks if chunk.canonical_chunk_id is None
+        ]
+
+    async def release(
+        self, db: AsyncSession, chunk_ids: Iterable[int]
+    ) -> List[DocumentChunk]:
+        """Re-point duplicates of chunks about to be deleted.
+
+        The oldest duplicate of each removed chunk becomes canonical and the
+        rest follow it. Returns the promoted chunks, which the caller adds to
+        the ANN index.
+        """
+        removed = set(chunk_ids)
+        if not removed:
+            return []
+        stmt = (
+            select(DocumentChunk, DocumentChunk.canonical_chunk_id)
+            .where(DocumentChunk.canonical_chunk_id.in_(removed))
+            .where(DocumentChunk.id.not_in(removed))
+            .order_by(DocumentChunk.id)
+        )
+        followers: Dict[int, List[DocumentChunk]] = {}
+        for chunk, canonical_id in (await db.execute(stmt)).all():
+            followers.setdefault(canonical_id, []).append(chunk)
+        promoted: List[DocumentChunk] = []
+        for first, *rest in followers.values():
+            first.canonical_chunk_id = None
+            promoted.append(first)
+            for chunk in rest:
+                chunk.canonical_chunk_id = first.id
+        await db.flush()
+        return promoted
+
+    async def backfill(self, db: AsyncSession, *, batch_size: int = 500) -> int:
+        """Fingerprint and link chunks stored before fingerprinting, in id order.
+
+        Commits per batch; returns how many chunks were linked.
+        """
+        linked = 0
+        last_id = 0
+        while True:
+            stmt = (
+                select(DocumentChunk)
+                .where(DocumentChunk.simhash.is_(None))
+                .where(DocumentChunk.id > last_id)
+                .order_by(DocumentChunk.id)
+                .limit(batch_size)
+            )
+            chunks = list((await db.execute(stmt)).scalars().all())
+            if not chunks:
+                return linked
+            for chunk in chunks:
+                self.fingerprint(chunk)
+            await db.flush()
+            linked += await self.link(db, chunks)
+            await db.commit()
+            last_id = chunks[-1].id
+
+    def _closest(self, value: int, known: Sequence[Tuple[int, int]]) -> Optional[int]:
+        best: Optional[Tuple[int, int]] = None
+        for chunk_id, other in known:
+            distance = hamming_distance(value, other)
+            if distance <= self.max_distance and (
+                best is None or (distance, chunk_id) < best
+            ):
+                best = (distance, chunk_id)
+        return best[1] if best is not None else None
+
+
+near_duplicate_service = NearDuplicateService()
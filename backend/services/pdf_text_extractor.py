@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Optional, Sequence
+
+from backend.config.settings import settings
+from backend.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+PDFTOTEXT_OPTIONS = ("-layout",)
+_READ_BLOCK = 1 << 20
+
+
+def run_pdftotext(binary: str, path: str, options: Sequence[str]) -> str:
+    """Raw ``pdftotext`` output for ``path``; runs inside a pool worker."""
+    try:
+        result = subprocess.run(
+            [binary, *options, path, "-"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError as exc:
+        raise ValueError(
+            "PDF import requires the local 'pdftotext' command to be installed."
+        ) from exc
+    except subprocess.CalledProcessError as exc:
+        stderr = (exc.stderr or "").strip()
+        message = stderr or "pdftotext failed to extract PDF text."
+        raise ValueError(message) from exc
+    return result.stdout
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while block := handle.read(_READ_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfTextExtractor:
+    """Extracts PDF text with ``pdftotext`` in a process pool, with a disk cache.
+
+    Output is cached under ``cache_dir`` keyed by the PDF's sha256 and the
+    extractor options, so previewing or re-importing the same file never runs
+    ``pdftotext`` again, whatever its path. ``extract`` blocks its caller;
+    async code calls it from a worker thread, so the event loop never waits
+    on the subprocess. With ``workers=0`` extraction runs in the calling
+    thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_dir: Optional[str | Path] = None,
+        workers: Optional[int] = None,
+        binary: Optional[str] = None,
+        options: Sequence[str] = PDFTOTEXT_OPTIONS,
+    ) -> None:
+        self.cache_dir = Path(
+            settings.pdf_text_cache_path if cache_dir is None else cache_dir
+        )
+        self.workers = max(
+            0, settings.pdf_extract_workers if workers is None else workers
+        )
+        self.binary = binary or "pdftotext"
+        self.options = tuple(options)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = Lock()
+
+    @property
+    def options_key(self) -> str:
+        payload = json.dumps([Path(self.binary).name, *self.options])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def cache_path(self, digest: str) -> Path:
+        return self.cache_dir / digest[:2] / f"{digest}-{self.options_key}.txt"
+
+    def extract(self, path: Path) -> str:
+        """Raw ``pdftotext`` output for ``path`` (pages separated by form feeds)."""
+        start = perf_counter()
+        digest = file_sha256(path)
+        cached = self.cache_path(digest)
+        try:
+            text = cached.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            pass
+        else:
+            metrics_service.record(
+                "assets.pdf_text.cache_hit", latency_ms=(perf_counter() - start) * 1000
+            )
+            return text
+
+        if self.workers:
+            future = self.pool.submit(
+                run_pdftotext, self.binary, str(path), self.options
+            )
+            text = future.result()
+        else:
+            text = run_pdftotext(self.binary, str(path), self.options)
+        self._store(cached, text)
+        metrics_service.record(
+            "assets.pdf_text.cache_miss", latency_ms=(perf_counter() - start) * 1000
+        )
+        return text
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _store(self, target: Path, text: str) -> None:
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so concurrent imports never read a partial file.
+            fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(text)
+            os.replace(temp_name, target)
+        except OSError as exc:
+            logger.warning("Could not cache PDF text at %s: %s", target, exc)
+
+
+pdf_text_extractor = PdfTextExtractor()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.document import Document
+from backend.services.content_embedding_cache import content_hash
+from backend.services.context_service import context_service
+from backend.services.ingestion_service import DocumentInput, ingestion_service
+
+MIRROR_STATE_KEY = "private_index_mirror"
+URL_PREFIX = "private-index:"
+
+
+class PrivateIndexMirrorService:
+    """Mirrors ``rag-documents.jsonl`` into the search database incrementally.
+
+    The sha256 of each row's title, kind and content is kept per
+    ``external_id`` in the ``contexts`` table. Rows whose hash is unchanged and
+    whose document still exists are skipped; the rest go through
+    ``ingest_documents_bulk``. Documents whose external id is no longer in the
+    file are deleted.
+    """
+
+    async def mirror(self, db: AsyncSession, rag_path: Path) -> Dict[str, int]:
+        entry = await context_service.load(MIRROR_STATE_KEY, db)
+        state: Dict[str, Any] = dict(entry.data) if entry else {}
+        previous: Dict[str, str] = dict(state.get("hashes") or {})
+        stored_urls: Set[str] = {
+            url
+            for url in (
+                await db.execute(
+                    select(Document.url).where(Document.url.startswith(URL_PREFIX))
+                )
+            ).scalars()
+            if url
+        }
+        hashes: Dict[str, str] = {}
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+        def _changed_rows() -> Iterator[DocumentInput]:
+            for external_id, document in _read_rows(rag_path):
+                digest = _row_hash(document)
+                known = document.url in stored_urls
+                hashes[external_id] = digest
+                if known and previous.get(external_id) == digest:
+                    counts["unchanged"] += 1
+                    continue
+                counts["updated" if known else "added"] += 1
+                yield document
+
+        await ingestion_service.ingest_documents_bulk(db, _changed_rows())
+
+        removed = stored_urls - {URL_PREFIX + external_id for external_id in hashes}
+        if removed:
+            result = await db.execute(select(Document).where(Document.url.in_(removed)))
+            for document in result.scalars().all():
+                await ingestion_service.delete_document(db, document)
+                counts["removed"] += 1
+        await context_service.save(MIRROR_STATE_KEY, {"hashes": hashes}, db)
+        return counts
+
+
+def _read_rows(path: Path) -> Iterator[tuple[str, DocumentInput]]:
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row: Dict[str, Any] = json.loads(line)
+            external_id = str(row.get("external_id"))
+            yield external_id, DocumentInput(
+                title=str(
+                    row.get("title")
+                    or row.get("external_id")
+                    or "Private Index Document"
+                ),
+                kind=str(row.get("kind") or "campaign_index"),
+                content=str(row.get("content") or ""),
+                summary=None,
+                source_name="private-local-index",
+                url=URL_PREFIX + external_id,
+                source_class="private_local",
+                privacy_scope="private_local",
+                review_status="approved",
+                visibility_scope="gm_only",
+                rag_eligible=True,
+                train_eligible=False,
+            )
+
+
+def _row_hash(document: DocumentInput) -> str:
+    return content_hash(
+        json.dumps(
+            [document.title, document.kind, document.content], ensure_ascii=False
+        )
+    )
+
+
+private_index_mirror_service = PrivateIndexMirrorService()
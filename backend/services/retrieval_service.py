@@ -1,12 +1,18 @@
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncGenerator, List, Dict, Any, Optional, Sequence, Tuple
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlalchemy import select, desc
+from sqlalchemy.orm import defer, raiseload
+from sqlalchemy import case, desc, func, literal, select
 
 from backend.models.document import Document
 from backend.models.chunk import DocumentChunk
+from backend.models.embedding import decode_embedding
 from backend.services.embedding_service import embedding_service
+from backend.services.keyword_index_service import keyword_index_service
+from backend.services.vector_index_service import vector_index_service
 
 
 class RetrievalService:
@@ -14,6 +20,9 @@ class RetrievalService:
         # Tunable weights
         self.weight_embedding = 0.7
         self.weight_keyword = 0.3
+        self.recency_pool_size = 500
+        # Documents whose chunks are loaded and scored after the coarse stage.
+        self.chunk_stage_size = 30
         self.stopwords = {
             "a",
             "an",
@@ -164,6 +173,85 @@ class RetrievalService:
             train_eligible=train_eligible,
         )
 
+    async def search_documents_batch(
+        self, requests: Sequence["SearchRequest"], db: AsyncSession
+    ) -> List[List[Dict[str, Any]]]:
+        """Rank several queries at once, in request order.
+
+        All queries are embedded in one ``generate_embeddings_batch`` call.
+        Queries with the same filters share one candidate load and are scored
+        as a query matrix against the candidate document and chunk matrices.
+        """
+        if not requests:
+            return []
+        embeddings = await embedding_service.generate_embeddings_batch(
+            [request.query for request in requests]
+        )
+        q_vecs = [embedding_service.query_vector(e) for e in embeddings]
+        groups: Dict[Tuple[Any, ...], List[int]] = {}
+        for position, request in enumerate(requests):
+            groups.setdefault(tuple(request.filters.items()), []).append(position)
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in requests]
+        for positions in groups.values():
+            ranked = await self._rank_group(
+                db,
+                requests[positions[0]].filters,
+                [requests[p] for p in positions],
+                [q_vecs[p] for p in positions],
+            )
+            for position, items in zip(positions, ranked):
+                results[position] = items
+        return results
+
+    async def search_documents_progressive(
+        self,
+        query: str,
+        db: AsyncSession,
+        *,
+        top_k: int = 5,
+        kind: Optional[str] = None,
+        include_chunks: int = 0,
+        source_class: Optional[str] = None,
+        privacy_scope: Optional[str] = None,
+        review_status: Optional[str] = None,
+        visibility_scope: Optional[str] = None,
+        rag_eligible: Optional[bool] = None,
+        train_eligible: Optional[bool] = None,
+    ) -> AsyncGenerator[Tuple[str, List[Dict[str, Any]]], None]:
+        """Yield ``("keyword", results)`` and then ``("final", results)``.
+
+        The query embedding is requested first. The keyword/BM25 ranking is
+        yielded while it is pending. The final ranking equals
+        ``search_documents_detailed``. Closing the generator early cancels the
+        embedding request.
+        """
+        request = SearchRequest(
+            query,
+            top_k=top_k,
+            include_chunks=include_chunks,
+            kind=kind,
+            source_class=source_class,
+            privacy_scope=privacy_scope,
+            review_status=review_status,
+            visibility_scope=visibility_scope,
+            rag_eligible=rag_eligible,
+            train_eligible=train_eligible,
+        )
+        embedding = asyncio.ensure_future(embedding_service.generate_embedding(query))
+        try:
+            keyword = await self._rank_group(db, request.filters, [request], [None])
+            yield "keyword", keyword[0]
+            q_vec = embedding_service.query_vector(await embedding)
+            if q_vec is None:
+                # Without a query vector the hybrid blend is the keyword ranking.
+                yield "final", keyword[0]
+                return
+            final = await self._rank_group(db, request.filters, [request], [q_vec])
+            yield "final", final[0]
+        finally:
+            embedding.cancel()
+
     async def _rank_documents(
         self,
         query: str,
@@ -179,115 +267,481 @@ class RetrievalService:
         rag_eligible: Optional[bool],
         train_eligible: Optional[bool],
     ) -> List[Dict[str, Any]]:
-        terms = self._expand_query(query)
-
-        # Prefer docs with embeddings; fetch a candidate pool
-        stmt = (
-            select(Document)
-            .options(selectinload(Document.chunks))
-            .order_by(desc(Document.updated_at))
-            .limit(500)
+        request = SearchRequest(
+            query,
+            top_k=top_k,
+            include_chunks=include_chunks,
+            kind=kind,
+            source_class=source_class,
+            privacy_scope=privacy_scope,
+            review_status=review_status,
+            visibility_scope=visibility_scope,
+            rag_eligible=rag_eligible,
+            train_eligible=train_eligible,
         )
-        if kind:
-            stmt = stmt.where(Document.kind == kind)
-        if source_class:
-            stmt = stmt.where(Document.source_class == source_class)
-        if privacy_scope:
-            stmt = stmt.where(Document.privacy_scope == privacy_scope)
-        if review_status:
-            stmt = stmt.where(Document.review_status == review_status)
-        if visibility_scope:
-            stmt = stmt.where(Document.visibility_scope == visibility_scope)
-        if rag_eligible is not None:
-            stmt = stmt.where(Document.rag_eligible == rag_eligible)
-        if train_eligible is not None:
-            stmt = stmt.where(Document.train_eligible == train_eligible)
-
-        result = await db.execute(stmt)
-        docs = result.scalars().all()
-
         # Compute query embedding when available
         q_emb: Optional[List[float]] = await embedding_service.generate_embedding(query)
+        q_vec = embedding_service.query_vector(q_emb)
+        ranked = await self._rank_group(db, request.filters, [request], [q_vec])
+        return ranked[0]
 
-        scored: List[Tuple[float, Document, List[Dict[str, Any]]]] = []
-        for d in docs:
-            kscore = self._keyword_score(
-                (d.title or "") + "\n" + (d.summary or "") + "\n" + (d.content or ""),
-                terms,
+    async def _rank_group(
+        self,
+        db: AsyncSession,
+        filters: Dict[str, Any],
+        requests: Sequence["SearchRequest"],
+        q_vecs: Sequence[Optional[np.ndarray]],
+    ) -> List[List[Dict[str, Any]]]:
+        """Rank queries that share ``filters``; one result list per request."""
+        terms = [self._expand_query(request.query) for request in requests]
+        fts = await keyword_index_service.available(db)
+        matches = [
+            keyword_index_service.match_expression(t) if fts else None for t in terms
+        ]
+        query_matrix = _query_matrix(q_vecs)
+        use_snapshot = query_matrix is not None and vector_index_service.active
+
+        # Stage one: rank candidates on document vectors, keyword scores and
+        # ANN chunk hits without touching document content or chunk rows.
+        docs, ann_scores = await self._candidate_documents(
+            db, q_vecs, matches, filters, use_snapshot
+        )
+        doc_ids = [d.id for d in docs]
+        doc_escores = self._embedding_scores(
+            query_matrix, len(requests), [d.embedding_array for d in docs]
+        )
+        stage: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for q, request in enumerate(requests):
+            doc_kscores = await self._document_keyword_scores(
+                db, matches[q], terms[q], doc_ids
+            )
+            ann = np.array([ann_scores[q].get(i, 0.0) for i in doc_ids])
+            coarse = self.weight_embedding * np.maximum(
+                doc_escores[q], ann
+            ) + self.weight_keyword * np.asarray(doc_kscores)
+            pool = np.sort(
+                _stable_descending(coarse)[: max(request.top_k, self.chunk_stage_size)]
+            )
+            stage.append((pool, doc_kscores[pool], doc_escores[q][pool]))
+
+        # Stage two: chunks of the surviving documents, content still deferred.
+        pooled = sorted({int(i) for pool, _, _ in stage for i in pool})
+        chunks = await self._load_chunks(db, [doc_ids[i] for i in pooled], use_snapshot)
+        chunk_escores = await self._chunk_embedding_scores(
+            db, query_matrix, len(requests), chunks, use_snapshot
+        )
+        chunk_docs = np.array([c.document_id for c in chunks], dtype=np.int64)
+        chunk_ids = np.array([c.id for c in chunks], dtype=np.int64)
+        canonical_ids = np.array(
+            [c.canonical_chunk_id or 0 for c in chunks], dtype=np.int64
+        )
+
+        ranked: List[Tuple[List[Document], List[DocumentChunk], Any]] = []
+        for q, request in enumerate(requests):
+            pool, doc_kscores, pool_escores = stage[q]
+            pool_docs = [docs[i] for i in pool]
+            pool_ids = [d.id for d in pool_docs]
+            in_pool_docs = np.isin(chunk_docs, pool_ids)
+            # Near-duplicates give way to their canonical chunk when both are
+            # candidates, so copies do not take several result slots.
+            in_pool = np.flatnonzero(
+                in_pool_docs & ~np.isin(canonical_ids, chunk_ids[in_pool_docs])
+            )
+            pool_chunks = [chunks[i] for i in in_pool]
+            position = {doc_id: i for i, doc_id in enumerate(pool_ids)}
+            chunk_owner = np.array(
+                [position[c.document_id] for c in pool_chunks], dtype=np.intp
             )
-            escore = self._embedding_score(q_emb, d.embedding)
-            cscore, top_chunks = self._score_chunks(
-                q_emb, terms, d.chunks or [], include_chunks
+            chunk_kscores = await self._chunk_keyword_scores(
+                db, matches[q], terms[q], pool_ids, pool_chunks
             )
-            score = (
-                self.weight_embedding * max(escore, cscore)
-                + self.weight_keyword * kscore
+            chunk_scores = 0.6 * chunk_escores[q][in_pool] + 0.4 * chunk_kscores
+
+            # Best chunk score per document; documents without chunks keep 0.0.
+            doc_cscores = np.full(len(pool_docs), -np.inf, dtype=np.float32)
+            np.maximum.at(doc_cscores, chunk_owner, chunk_scores)
+            doc_cscores[np.isneginf(doc_cscores)] = 0.0
+
+            scores = (
+                self.weight_embedding * np.maximum(pool_escores, doc_cscores)
+                + self.weight_keyword * doc_kscores
             )
-            if score > 0:
-                scored.append((score, d, top_chunks))
+            top = _top_k_indices(scores, request.top_k)
+            selected = [
+                (
+                    int(i),
+                    self._top_chunk_positions(
+                        chunk_scores,
+                        np.flatnonzero(chunk_owner == i),
+                        request.include_chunks,
+                    ),
+                )
+                for i in top
+            ]
+            ranked.append((pool_docs, pool_chunks, (scores, chunk_scores, selected)))
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = scored[:top_k]
+        contents = await self._chunk_contents(
+            db,
+            [
+                pool_chunks[p].id
+                for _, pool_chunks, (_, _, selected) in ranked
+                for _, positions in selected
+                for p in positions
+            ],
+        )
         return [
-            {
-                "score": s,
-                "document": {
-                    "id": d.id,
-                    "title": d.title,
-                    "kind": d.kind,
-                    "summary": d.summary,
-                    "source_name": d.source_name,
-                    "url": d.url,
-                    "source_class": d.source_class,
-                    "privacy_scope": d.privacy_scope,
-                    "review_status": d.review_status,
-                    "visibility_scope": d.visibility_scope,
-                    "rag_eligible": d.rag_eligible,
-                    "train_eligible": d.train_eligible,
-                },
-                "chunks": chunks,
-            }
-            for s, d, chunks in top
+            [
+                {
+                    "score": float(scores[i]),
+                    "document": {
+                        "id": pool_docs[i].id,
+                        "title": pool_docs[i].title,
+                        "kind": pool_docs[i].kind,
+                        "summary": pool_docs[i].summary,
+                        "source_name": pool_docs[i].source_name,
+                        "url": pool_docs[i].url,
+                        "source_class": pool_docs[i].source_class,
+                        "privacy_scope": pool_docs[i].privacy_scope,
+                        "review_status": pool_docs[i].review_status,
+                        "visibility_scope": pool_docs[i].visibility_scope,
+                        "rag_eligible": pool_docs[i].rag_eligible,
+                        "train_eligible": pool_docs[i].train_eligible,
+                    },
+                    "chunks": [
+                        {
+                            "id": pool_chunks[pos].id,
+                            "chunk_index": pool_chunks[pos].chunk_index,
+                            "content": contents.get(pool_chunks[pos].id, ""),
+                            "score": float(chunk_scores[pos]),
+                        }
+                        for pos in positions
+                    ],
+                }
+                for i, positions in selected
+            ]
+            for pool_docs, pool_chunks, (scores, chunk_scores, selected) in ranked
         ]
 
-    def _embedding_score(
-        self, query_emb: Optional[List[float]], candidate_emb: Optional[List[float]]
-    ) -> float:
-        if not query_emb or not candidate_emb or not isinstance(candidate_emb, list):
-            return 0.0
-        try:
-            return embedding_service.compute_similarity(query_emb, candidate_emb)
-        except Exception:
-            return 0.0
+    async def _candidate_documents(
+        self,
+        db: AsyncSession,
+        query_vecs: Sequence[Optional[np.ndarray]],
+        matches: Sequence[Optional[str]],
+        filters: Dict[str, Any],
+        use_snapshot: bool,
+    ) -> Tuple[List[Document], List[Dict[int, float]]]:
+        """Candidate documents (content deferred, no chunks) and ANN scores.
 
-    def _score_chunks(
+        The ANN scores map, per query, each recalled document to its best
+        chunk score.
+        """
+        options = (
+            defer(Document.content, raiseload=True),
+            raiseload(Document.chunks),
+        )
+
+        # Recency pool keeps keyword-only matches reachable.
+        stmt = self._apply_filters(
+            select(Document)
+            .options(*options)
+            .order_by(desc(Document.updated_at))
+            .limit(self.recency_pool_size),
+            filters,
+        )
+        docs = list((await db.execute(stmt)).scalars().all())
+
+        # ANN and BM25 recall reach close documents outside that window.
+        recalled: List[int] = []
+        ann_scores: List[Dict[int, float]] = []
+        for query_vec, match in zip(query_vecs, matches):
+            best: Dict[int, float] = {}
+            if query_vec is not None and use_snapshot:
+                hits = vector_index_service.search(
+                    query_vec,
+                    kind=filters["kind"],
+                    rag_eligible=filters["rag_eligible"],
+                    visibility_scope=filters["visibility_scope"],
+                )
+                for hit in hits:
+                    recalled.append(hit.document_id)
+                    best[hit.document_id] = max(
+                        hit.score, best.get(hit.document_id, hit.score)
+                    )
+            if match is not None:
+                recalled.extend(await keyword_index_service.search_documents(db, match))
+            ann_scores.append(best)
+        seen = {d.id for d in docs}
+        missing = [doc_id for doc_id in dict.fromkeys(recalled) if doc_id not in seen]
+        if missing:
+            stmt = self._apply_filters(
+                select(Document).options(*options).where(Document.id.in_(missing)),
+                filters,
+            )
+            docs.extend((await db.execute(stmt)).scalars().all())
+        return docs, ann_scores
+
+    async def _load_chunks(
+        self, db: AsyncSession, doc_ids: List[int], use_snapshot: bool
+    ) -> List[DocumentChunk]:
+        if not doc_ids:
+            return []
+        options = [defer(DocumentChunk.content, raiseload=True)]
+        if use_snapshot:
+            # Chunk vectors are scored from the memory-mapped snapshot instead.
+            options += [
+                defer(DocumentChunk.embedding),
+                defer(DocumentChunk.embedding_vector),
+            ]
+        stmt = (
+            select(DocumentChunk)
+            .options(*options)
+            .where(DocumentChunk.document_id.in_(doc_ids))
+            .order_by(DocumentChunk.id)
+        )
+        return list((await db.execute(stmt)).scalars().all())
+
+    async def _chunk_contents(
+        self, db: AsyncSession, chunk_ids: List[int]
+    ) -> Dict[int, str]:
+        if not chunk_ids:
+            return {}
+        stmt = select(DocumentChunk.id, DocumentChunk.content).where(
+            DocumentChunk.id.in_(chunk_ids)
+        )
+        return {row.id: row.content for row in (await db.execute(stmt)).all()}
+
+    def _apply_filters(self, stmt: Any, filters: Dict[str, Any]) -> Any:
+        for field in (
+            "kind",
+            "source_class",
+            "privacy_scope",
+            "review_status",
+            "visibility_scope",
+        ):
+            if filters.get(field):
+                stmt = stmt.where(getattr(Document, field) == filters[field])
+        for field in ("rag_eligible", "train_eligible"):
+            if filters.get(field) is not None:
+                stmt = stmt.where(getattr(Document, field) == filters[field])
+        return stmt
+
+    def _embedding_scores(
+        self,
+        query_matrix: Optional[np.ndarray],
+        n_queries: int,
+        candidate_embs: Sequence[Any],
+    ) -> np.ndarray:
+        """Cosine scores of shape (queries, candidates); zeros without vectors."""
+        if query_matrix is None:
+            return np.zeros((n_queries, len(candidate_embs)), dtype=np.float32)
+        matrix = embedding_service.stack_embeddings(
+            candidate_embs, query_matrix.shape[1]
+        )
+        return embedding_service.cosine_score_matrix(query_matrix, matrix)
+
+    async def _document_keyword_scores(
+        self,
+        db: AsyncSession,
+        match: Optional[str],
+        terms: List[str],
+        doc_ids: List[int],
+    ) -> np.ndarray:
+        """Keyword scores in [0, 1] for documents.
+
+        With the FTS5 index these are BM25 scores divided by the best score
+        the query could reach, so a weak match stays weak however few
+        candidates match; otherwise the substring hit ratio of ``_keyword_score``,
+        counted in SQL so document content never leaves the database.
+        """
+        if match is None:
+            newline = literal("\n")
+            text = (
+                func.coalesce(Document.title, "")
+                + newline
+                + func.coalesce(Document.summary, "")
+                + newline
+                + func.coalesce(Document.content, "")
+            )
+            hits = await self._keyword_hits(
+                db, Document.id, text, Document.id.in_(doc_ids), terms
+            )
+            return np.array([hits.get(i, 0.0) for i in doc_ids], dtype=np.float32)
+        bm25 = await keyword_index_service.document_scores(db, match, doc_ids)
+        bound = 0.0
+        if bm25:
+            bound = await keyword_index_service.document_score_bound(
+                db, keyword_index_service.match_phrases(terms)
+            )
+        return _scale_to_bound(np.array([bm25.get(i, 0.0) for i in doc_ids]), bound)
+
+    async def _chunk_keyword_scores(
         self,
-        query_emb: Optional[List[float]],
+        db: AsyncSession,
+        match: Optional[str],
         terms: List[str],
+        doc_ids: List[int],
         chunks: List[DocumentChunk],
-        include_chunks: int,
-    ) -> Tuple[float, List[Dict[str, Any]]]:
+    ) -> np.ndarray:
         if not chunks:
-            return 0.0, []
-        scored_chunks: List[Tuple[float, DocumentChunk]] = []
-        for chunk in chunks:
-            kscore = self._keyword_score(chunk.content, terms)
-            escore = self._embedding_score(query_emb, chunk.embedding)
-            score = 0.6 * escore + 0.4 * kscore
-            scored_chunks.append((score, chunk))
-
-        scored_chunks.sort(key=lambda item: item[0], reverse=True)
-        best = scored_chunks[0][0]
-        top_chunks = [
-            {
-                "id": chunk.id,
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-                "score": score,
+            return np.zeros(0, dtype=np.float32)
+        if match is None:
+            hits = await self._keyword_hits(
+                db,
+                DocumentChunk.id,
+                DocumentChunk.content,
+                DocumentChunk.document_id.in_(doc_ids),
+                terms,
+            )
+            return np.array([hits.get(c.id, 0.0) for c in chunks], dtype=np.float32)
+        bm25 = await keyword_index_service.chunk_scores(db, match, doc_ids)
+        bound = 0.0
+        if bm25:
+            bound = await keyword_index_service.chunk_score_bound(
+                db, keyword_index_service.match_phrases(terms)
+            )
+        return _scale_to_bound(np.array([bm25.get(c.id, 0.0) for c in chunks]), bound)
+
+    async def _keyword_hits(
+        self,
+        db: AsyncSession,
+        id_column: Any,
+        text: Any,
+        where: Any,
+        terms: List[str],
+    ) -> Dict[int, float]:
+        """SQL version of ``_keyword_score`` for every row matching ``where``."""
+        if not terms:
+            return {}
+        lowered = func.lower(text)
+        hits = sum(
+            (
+                case((lowered.contains(term, autoescape=True), 1), else_=0)
+                for term in terms
+            ),
+            start=literal(0),
+        )
+        stmt = select(id_column, hits.label("hits")).where(where)
+        return {
+            int(row[0]): row.hits / len(terms) for row in (await db.execute(stmt)).all()
+        }
+
+    async def _chunk_embedding_scores(
+        self,
+        db: AsyncSession,
+        query_matrix: Optional[np.ndarray],
+        n_queries: int,
+        chunks: List[DocumentChunk],
+        use_snapshot: bool,
+    ) -> np.ndarray:
+        if query_matrix is not None and use_snapshot:
+            return await self._snapshot_chunk_scores(db, query_matrix, chunks)
+        return self._embedding_scores(
+            query_matrix, n_queries, [c.embedding_array for c in chunks]
+        )
+
+    async def _snapshot_chunk_scores(
+        self, db: AsyncSession, query_matrix: np.ndarray, chunks: List[DocumentChunk]
+    ) -> np.ndarray:
+        chunk_ids = [chunk.id for chunk in chunks]
+        scores, found = vector_index_service.score_chunks(query_matrix, chunk_ids)
+        positions = np.flatnonzero(~found)
+        if positions.size:
+            # Chunks the snapshot has not picked up yet are read from the DB.
+            stmt = select(
+                DocumentChunk.id,
+                DocumentChunk.embedding,
+                DocumentChunk.embedding_vector,
+                DocumentChunk.embedding_dtype,
+            ).where(DocumentChunk.id.in_([chunk_ids[p] for p in positions]))
+            stored = {
+                row.id: decode_embedding(
+                    row.embedding_vector, row.embedding_dtype, row.embedding
+                )
+                for row in (await db.execute(stmt)).all()
             }
-            for score, chunk in scored_chunks[:include_chunks]
-        ]
-        return best, top_chunks
+            scores[:, positions] = self._embedding_scores(
+                query_matrix,
+                query_matrix.shape[0],
+                [stored.get(chunk_ids[p]) for p in positions],
+            )
+        return scores
+
+    def _top_chunk_positions(
+        self, chunk_scores: np.ndarray, positions: np.ndarray, include_chunks: int
+    ) -> np.ndarray:
+        if include_chunks <= 0 or positions.size == 0:
+            return positions[:0]
+        order = positions[_stable_descending(chunk_scores[positions])]
+        return order[:include_chunks]
+
+
+@dataclass(frozen=True)
+class SearchRequest:
+    """One query of a batched search, with its own filters and limits."""
+
+    query: str
+    top_k: int = 5
+    include_chunks: int = 2
+    kind: Optional[str] = None
+    source_class: Optional[str] = None
+    privacy_scope: Optional[str] = None
+    review_status: Optional[str] = None
+    visibility_scope: Optional[str] = None
+    rag_eligible: Optional[bool] = None
+    train_eligible: Optional[bool] = None
+
+    @property
+    def filters(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "source_class": self.source_class,
+            "privacy_scope": self.privacy_scope,
+            "review_status": self.review_status,
+            "visibility_scope": self.visibility_scope,
+            "rag_eligible": self.rag_eligible,
+            "train_eligible": self.train_eligible,
+        }
+
+
+def _query_matrix(q_vecs: Sequence[Optional[np.ndarray]]) -> Optional[np.ndarray]:
+    """Stack query vectors; queries without a usable vector get zero rows."""
+    dims = [v.shape[0] for v in q_vecs if v is not None]
+    if not dims:
+        return None
+    return embedding_service.stack_embeddings(q_vecs, dims[0])
+
+
+def _scale_to_bound(scores: np.ndarray, bound: float) -> np.ndarray:
+    """Divide BM25 scores by the query's best possible score, into [0, 1].
+
+    The bound depends on the query and corpus, not on which candidates
+    matched, so a lone weak match is not scaled up to a full keyword match.
+    """
+    scores = scores.astype(np.float32)
+    if bound <= 0:
+        return np.zeros_like(scores)
+    return np.clip(scores / np.float32(bound), 0.0, 1.0)
+
+
+def _stable_descending(scores: np.ndarray) -> np.ndarray:
+    """Indices ordering ``scores`` high to low, ties kept in input order."""
+    return np.lexsort((np.arange(scores.size), -scores))
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best positive scores, ordered like a stable sort.
+
+    ``argpartition`` narrows the pool in O(n); every candidate tied with the
+    k-th best score is kept so the final stable ordering matches a full sort.
+    """
+    candidates = np.flatnonzero(scores > 0)
+    if k <= 0 or candidates.size == 0:
+        return candidates[:0]
+    if candidates.size > k:
+        kth = -np.partition(-scores[candidates], k - 1)[k - 1]
+        candidates = candidates[scores[candidates] >= kth]
+    ranked = candidates[_stable_descending(scores[candidates])]
+    return ranked[:k]
 
 
 retrieval_service = RetrievalService()
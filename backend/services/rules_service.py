@@ -1,17 +1,58 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import copy
+from collections import OrderedDict
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.config.settings import settings
+from backend.services.corpus_version_service import corpus_version_service
+from backend.services.embedding_cache import normalize_query_text
+from backend.services.embedding_service import embedding_service
+from backend.services.metrics_service import metrics_service
 from backend.services.retrieval_service import retrieval_service
 
+AnswerKey = Tuple[str, int, bool, str, str]
 
-class RulesService:
-    """Retrieval-backed rules answers with citations and strict mode handling."""
 
-    def __init__(self, confidence_threshold: float = 0.08) -> None:
+class _AnswerCache:
+    """Answers of one database, valid for a single rules-corpus version.
+
+    Entries hold the query-independent result; answers that quote the
+    question are composed for each caller (see ``_answer_for``).
+    """
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.entries: "OrderedDict[AnswerKey, Dict[str, Any]]" = OrderedDict()
+
+
+class RulesService:
+    """Retrieval-backed rules answers with citations and strict mode handling.
+
+    Answers are cached per database by normalized query, ``top_k``, ``strict``
+    and embedding model. Ingesting, editing or deleting a rule document, in
+    this process or another, changes the rules-corpus version checked on
+    every request, which drops every cached answer of that database.
+    The version is read once, before retrieval: an answer computed while a
+    rule write commits is stored under the older version, which later
+    requests no longer read.
+    """
+
+    def __init__(
+        self,
+        confidence_threshold: float = 0.08,
+        cache_size: Optional[int] = None,
+    ) -> None:
         self.confidence_threshold = confidence_threshold
+        self.cache_size = (
+            settings.rules_cache_size if cache_size is None else cache_size
+        )
+        self._caches: "WeakKeyDictionary[Engine, _AnswerCache]" = WeakKeyDictionary()
 
     async def answer_question(
         self,
@@ -20,6 +61,68 @@ class RulesService:
         *,
         top_k: int = 3,
         strict: bool = False,
+    ) -> Dict[str, Any]:
+        start = perf_counter()
+        cache = await self._cache_for(db)
+        key: AnswerKey = (
+            normalize_query_text(query),
+            top_k,
+            strict,
+            embedding_service.provider,
+            embedding_service.model,
+        )
+        cached = cache.entries.get(key) if cache is not None else None
+        if cache is not None and cached is not None:
+            cache.entries.move_to_end(key)
+            metrics_service.record(
+                "rules.cache.hit",
+                latency_ms=(perf_counter() - start) * 1000,
+                input_tokens=metrics_service.estimate_tokens(query),
+            )
+            return self._answer_for(query, cached, strict=strict)
+
+        entry = await self._answer_uncached(query, db, top_k=top_k, strict=strict)
+        if cache is not None:
+            cache.entries[key] = copy.deepcopy(entry)
+            while len(cache.entries) > self.cache_size:
+                cache.entries.popitem(last=False)
+        return self._answer_for(query, entry, strict=strict)
+
+    def clear_cache(self) -> None:
+        self._caches = WeakKeyDictionary()
+
+    async def _cache_for(self, db: AsyncSession) -> Optional[_AnswerCache]:
+        if self.cache_size <= 0:
+            return None
+        engine = db.get_bind()
+        if not isinstance(engine, Engine):
+            engine = engine.engine
+        # One primary-key read per request, so rule writes from other
+        # processes count.
+        version = await corpus_version_service.version(db, "rule")
+        cache = self._caches.get(engine)
+        if cache is None or cache.version != version:
+            cache = _AnswerCache(version)
+            self._caches[engine] = cache
+        return cache
+
+    def _answer_for(
+        self, query: str, entry: Dict[str, Any], *, strict: bool
+    ) -> Dict[str, Any]:
+        result = copy.deepcopy(entry["result"])
+        if entry["confident"] is not None:
+            result["answer"] = self._compose_answer(
+                query, result["citations"], strict=strict, confident=entry["confident"]
+            )
+        return result
+
+    async def _answer_uncached(
+        self,
+        query: str,
+        db: AsyncSession,
+        *,
+        top_k: int,
+        strict: bool,
     ) -> Dict[str, Any]:
         matches = await retrieval_service.search_documents_detailed(
             query,
@@ -39,31 +142,38 @@ class RulesService:
 
         if strict and not confident:
             return {
-                "answer": (
-                    "I couldn't find a confident answer in the ingested rules. "
-                    "Try a narrower query or verify the rule manually."
-                ),
-                "strict_mode": True,
-                "confidence": matches[0]["score"] if matches else 0.0,
-                "citations": citations,
+                "result": {
+                    "answer": (
+                        "I couldn't find a confident answer in the ingested rules. "
+                        "Try a narrower query or verify the rule manually."
+                    ),
+                    "strict_mode": True,
+                    "confidence": matches[0]["score"] if matches else 0.0,
+                    "citations": citations,
+                },
+                "confident": None,
             }
 
         if not citations:
             return {
-                "answer": "I couldn't find supporting rule text for that query yet.",
-                "strict_mode": strict,
-                "confidence": matches[0]["score"] if matches else 0.0,
-                "citations": [],
+                "result": {
+                    "answer": "I couldn't find supporting rule text for that query yet.",
+                    "strict_mode": strict,
+                    "confidence": matches[0]["score"] if matches else 0.0,
+                    "citations": [],
+                },
+                "confident": None,
             }
 
-        answer = self._compose_answer(
-            query, citations, strict=strict, confident=confident
-        )
+        # The answer text is composed per caller by ``_answer_for``.
         return {
-            "answer": answer,
-            "strict_mode": strict,
-            "confidence": matches[0]["score"] if matches else 0.0,
-            "citations": citations,
+            "result": {
+                "answer": "",
+                "strict_mode": strict,
+                "confidence": matches[0]["score"] if matches else 0.0,
+                "citations": citations,
+            },
+            "confident": confident,
         }
 
     def _build_citations(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
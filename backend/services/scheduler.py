@@ -1,6 +1,15 @@
+import asyncio
 import logging
-from datetime import datetime, timezone
+from typing import Optional
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from backend.config.settings import settings
+from backend.models.base import async_session_maker
+from backend.services.embedding_reindex_service import embedding_reindex_service
+from backend.services.embedding_service import embedding_service
+from backend.services.vector_index_service import vector_index_service
 
 logger = logging.getLogger(__name__)
 
@@ -11,13 +20,33 @@ class DmaScheduler:
     def __init__(self) -> None:
         self.scheduler = AsyncIOScheduler()
         self.is_running = False
+        self._reindex_task: Optional[asyncio.Task[None]] = None
 
     def start(self) -> None:
         if self.is_running:
             return
-        # Examples: adjust as features land
-        # self.scheduler.add_job(self.reindex_embeddings, CronTrigger(hour=3, minute=0))
-        # self.scheduler.add_job(self.maintenance, CronTrigger(hour="*/6"))
+        self.scheduler.add_job(self.maintenance, IntervalTrigger(hours=6))
+        if settings.embedding_provider != "disabled":
+            self.scheduler.add_job(
+                self.reindex_embeddings,
+                IntervalTrigger(minutes=settings.embedding_reindex_interval_minutes),
+                max_instances=1,
+                coalesce=True,
+            )
+        if embedding_service.query_cache.path is not None:
+            self.scheduler.add_job(
+                self.save_query_embedding_cache,
+                IntervalTrigger(minutes=settings.embedding_cache_save_minutes),
+                max_instances=1,
+                coalesce=True,
+            )
+        if vector_index_service.enabled:
+            self.scheduler.add_job(
+                self.refresh_vector_snapshot,
+                IntervalTrigger(minutes=settings.vector_snapshot_refresh_minutes),
+                max_instances=1,
+                coalesce=True,
+            )
         self.scheduler.start()
         self.is_running = True
         logger.info("DMA scheduler started")
@@ -30,12 +59,38 @@ class DmaScheduler:
         logger.info("DMA scheduler stopped")
 
     async def reindex_embeddings(self) -> None:
-        """Placeholder: regenerate embeddings for changed docs."""
+        """Re-embed stale rows and documents changed since the last run."""
+        async with async_session_maker() as db:
+            result = await embedding_reindex_service.run(db)
         logger.info(
-            "Running DMA embedding reindex job at %s",
-            datetime.now(timezone.utc).isoformat(),
+            "Embedding reindex %s: %s",
+            result.get("status"),
+            result.get("counts") or result.get("reason"),
         )
-        # Implement: diff documents changed since last run and refresh embeddings
+
+    def trigger_reindex(self) -> bool:
+        """Start a reindex in the background; False if one is already running."""
+        if self._reindex_task is not None and not self._reindex_task.done():
+            return False
+        self._reindex_task = asyncio.create_task(self.reindex_embeddings())
+        return True
+
+    async def refresh_vector_snapshot(self) -> None:
+        """Append new chunk embeddings to the memory-mapped snapshot."""
+        try:
+            async with async_session_maker() as db:
+                result = await vector_index_service.refresh_snapshot(db)
+        except RuntimeError as exc:
+            # Another worker holds the snapshot lock; it will publish the update.
+            logger.info("Skipping vector snapshot refresh: %s", exc)
+            return
+        logger.info("Vector snapshot refresh: %s", result)
+
+    async def save_query_embedding_cache(self) -> None:
+        """Write the query embedding cache to disk if it changed."""
+        # The file write runs off the event loop; save is a no-op when clean.
+        if await asyncio.to_thread(embedding_service.query_cache.save):
+            logger.info("Saved query embedding cache")
 
     async def maintenance(self) -> None:
         """Placeholder: periodic housekeeping, e.g., pruning old caches."""
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from backend.services.metrics_service import metrics_service
+
+StageHandler = Callable[[List[Any]], Awaitable[List[Any]]]
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStage:
+    """One step of a ``StagedPipeline``.
+
+    ``handler`` receives up to ``batch_size`` items at a time and returns the
+    items to pass on; ``concurrency`` handlers run at once.
+    """
+
+    name: str
+    handler: StageHandler
+    concurrency: int = 1
+    batch_size: int = 1
+    items_in: int = field(default=0, init=False)
+    items_out: int = field(default=0, init=False)
+    batches: int = field(default=0, init=False)
+    busy_ms: float = field(default=0.0, init=False)
+    _started: Optional[float] = field(default=None, init=False, repr=False)
+    _finished: Optional[float] = field(default=None, init=False, repr=False)
+
+    def stats(self) -> Dict[str, Any]:
+        wall_ms = (
+            ((self._finished or perf_counter()) - self._started) * 1000
+            if self._started is not None
+            else 0.0
+        )
+        return {
+            "concurrency": self.concurrency,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "busy_ms": round(self.busy_ms, 3),
+            "wall_ms": round(wall_ms, 3),
+            "items_per_second": (
+                round(self.items_in / (wall_ms / 1000), 3) if wall_ms > 0 else 0.0
+            ),
+        }
+
+
+class StagedPipeline:
+    """Runs items through stages connected by bounded ``asyncio.Queue``s.
+
+    A full queue blocks the stage feeding it, so a slow stage holds back the
+    ones before it instead of letting work pile up in memory. Every handler
+    call is recorded as ``<metrics_prefix>.<stage>`` in the metrics service.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[PipelineStage],
+        *,
+        queue_size: int = 32,
+        metrics_prefix: str = "pipeline",
+    ) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.metrics_prefix = metrics_prefix
+        self.stopped = False
+
+    def stop(self) -> None:
+        """Stop feeding new items; items already queued still finish."""
+        self.stopped = True
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def run(self, source: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        queues: List[asyncio.Queue[Any]] = [
+            asyncio.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+
+        async def _feed() -> None:
+            for item in source:
+                if self.stopped:
+                    break
+                await queues[0].put(item)
+            await queues[0].put(_DONE)
+
+        tasks = [asyncio.ensure_future(_feed())]
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            remaining = [max(1, stage.concurrency)]
+            tasks.extend(
+                asyncio.ensure_future(
+                    self._work(stage, queues[index], outbox, remaining)
+                )
+                for _ in range(remaining[0])
+            )
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self.stats()
+
+    async def _work(
+        self,
+        stage: PipelineStage,
+        inbox: asyncio.Queue[Any],
+        outbox: Optional[asyncio.Queue[Any]],
+        remaining: List[int],
+    ) -> None:
+        done = False
+        while not done:
+            first = await inbox.get()
+            if first is _DONE:
+                break
+            batch = [first]
+            while len(batch) < max(1, stage.batch_size) and not inbox.empty():
+                item = inbox.get_nowait()
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            if stage._started is None:
+                stage._started = perf_counter()
+            start = perf_counter()
+            results = await stage.handler(batch)
+            elapsed_ms = (perf_counter() - start) * 1000
+            stage.items_in += len(batch)
+            stage.items_out += len(results)
+            stage.batches += 1
+            stage.busy_ms += elapsed_ms
+            metrics_service.record(
+                f"{self.metrics_prefix}.{stage.name}", latency_ms=elapsed_ms
+            )
+            if outbox is not None:
+                for result in results:
+                    await outbox.put(result)
+        # Let sibling workers see the end too; the last one passes it on.
+        await inbox.put(_DONE)
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            stage._finished = perf_counter()
+            if outbox is not None:
+                await outbox.put(_DONE)
@@ -0,0 +1,995 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from threading import RLock
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config.settings import settings
+from backend.models.chunk import DocumentChunk
+from backend.models.document import Document
+from backend.models.embedding import decode_embedding
+from backend.services.vector_quantization import QUANTIZATION_MODES, QuantizedCodes
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+LOCK_FILENAME = "snapshot.lock"
+LOCK_STALE_SECONDS = 600
+REBUILD_TOMBSTONE_RATIO = 0.1
+ASSIGN_BLOCK_ROWS = 65536
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    chunk_id: int
+    document_id: int
+    embedding: np.ndarray | Sequence[float]
+    kind: str
+    rag_eligible: bool
+    visibility_scope: str
+
+
+@dataclass(frozen=True)
+class IndexHit:
+    chunk_id: int
+    document_id: int
+    score: float
+
+
+class Segment:
+    """A block of index rows: unit vectors plus per-row filter metadata.
+
+    Snapshot segments wrap a read-only ``np.memmap`` so every worker process
+    shares the same page-cache pages. The index keeps one extra in-memory
+    segment for rows ingested since the snapshot was written.
+    """
+
+    GROWABLE = (
+        "vectors",
+        "chunk_ids",
+        "document_ids",
+        "kinds",
+        "visibility",
+        "rag_eligible",
+        "alive",
+        "assignments",
+    )
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        *,
+        chunk_ids: np.ndarray,
+        document_ids: np.ndarray,
+        kinds: np.ndarray,
+        visibility: np.ndarray,
+        rag_eligible: np.ndarray,
+        assignments: Optional[np.ndarray] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        self.vectors = vectors
+        self.chunk_ids = chunk_ids
+        self.document_ids = document_ids
+        self.kinds = kinds
+        self.visibility = visibility
+        self.rag_eligible = rag_eligible
+        self.size = int(chunk_ids.shape[0])
+        self.alive = np.ones(self.size, dtype=bool)
+        self.assignments = (
+            assignments
+            if assignments is not None
+            else np.full(self.size, -1, dtype=np.int32)
+        )
+        self.name = name
+        self.quantized: Optional[QuantizedCodes] = None
+
+    def quantized_codes(self, mode: str) -> QuantizedCodes:
+        """Codes for every row so far, quantizing only rows added since."""
+        if self.quantized is None or self.quantized.mode != mode:
+            self.quantized = QuantizedCodes(mode, int(self.vectors.shape[1]))
+        self.quantized.extend(self.vectors, self.size)
+        return self.quantized
+
+    @classmethod
+    def empty(cls, dim: int) -> "Segment":
+        return cls(
+            np.zeros((0, dim), dtype=np.float32),
+            chunk_ids=np.zeros(0, dtype=np.int64),
+            document_ids=np.zeros(0, dtype=np.int64),
+            kinds=np.zeros(0, dtype="<U50"),
+            visibility=np.zeros(0, dtype="<U32"),
+            rag_eligible=np.zeros(0, dtype=bool),
+        )
+
+    def append(self, entry: IndexEntry, vector: np.ndarray, assignment: int) -> int:
+        if self.name is not None:
+            raise RuntimeError("Snapshot segments are read-only")
+        self._grow(self.size + 1)
+        row = self.size
+        self.vectors[row] = vector
+        self.chunk_ids[row] = entry.chunk_id
+        self.document_ids[row] = entry.document_id
+        self.kinds[row] = entry.kind
+        self.visibility[row] = entry.visibility_scope
+        self.rag_eligible[row] = entry.rag_eligible
+        self.alive[row] = True
+        self.assignments[row] = assignment
+        self.size += 1
+        return row
+
+    def _grow(self, needed: int) -> None:
+        capacity = self.chunk_ids.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 256)
+        for name in self.GROWABLE:
+            current = getattr(self, name)
+            fill = -1 if name == "assignments" else 0
+            grown = np.full(
+                (new_capacity,) + current.shape[1:], fill, dtype=current.dtype
+            )
+            grown[: self.size] = current[: self.size]
+            setattr(self, name, grown)
+
+    def relabel(self, metadata: Mapping[int, Tuple[str, bool, str]]) -> bool:
+        """Overwrite kind/rag_eligible/visibility rows that differ from
+        ``metadata`` (keyed by chunk id); returns whether any row changed."""
+        changed = False
+        for row, chunk_id in enumerate(self.chunk_ids[: self.size].tolist()):
+            current = metadata.get(chunk_id)
+            if current is None:
+                continue
+            kind, rag_eligible, visibility_scope = current
+            if (
+                self.kinds[row] != kind
+                or bool(self.rag_eligible[row]) != rag_eligible
+                or self.visibility[row] != visibility_scope
+            ):
+                self.kinds[row] = kind
+                self.rag_eligible[row] = rag_eligible
+                self.visibility[row] = visibility_scope
+                changed = True
+        return changed
+
+    def candidate_rows(
+        self,
+        *,
+        kind: Optional[str],
+        rag_eligible: Optional[bool],
+        visibility_scope: Optional[str],
+        probes: Optional[np.ndarray],
+    ) -> np.ndarray:
+        n = self.size
+        mask = self.alive[:n].copy()
+        if kind is not None:
+            mask &= self.kinds[:n] == kind
+        if rag_eligible is not None:
+            mask &= self.rag_eligible[:n] == rag_eligible
+        if visibility_scope is not None:
+            mask &= self.visibility[:n] == visibility_scope
+        if probes is not None:
+            mask &= np.isin(self.assignments[:n], probes)
+        return np.flatnonzero(mask)
+
+    def assign(self, centroids: Optional[np.ndarray]) -> None:
+        if centroids is None:
+            self.assignments[: self.size] = -1
+            return
+        for start in range(0, self.size, ASSIGN_BLOCK_ROWS):
+            block = self.vectors[start : min(self.size, start + ASSIGN_BLOCK_ROWS)]
+            self.assignments[start : start + block.shape[0]] = np.argmax(
+                block @ centroids.T, axis=1
+            )
+
+
+class VectorIndex:
+    """IVF (inverted file) approximate-nearest-neighbour index over chunk vectors.
+
+    Vectors are stored unit-normalised so inner product equals cosine similarity.
+    Below ``train_threshold`` live vectors the index answers with an exact flat
+    scan; above it, k-means centroids partition the vectors into ``nlist`` lists
+    and a query only scores the ``nprobe`` lists closest to it.
+
+    With ``quantization`` set to ``"int8"`` or ``"binary"``, candidates are
+    ranked on per-segment int8 or sign-bit codes kept in memory, and only the
+    best ``k * rerank_factor`` rows are re-scored against the float vectors.
+    For snapshot segments those stay on disk and only re-ranked rows are read.
+    """
+
+    def __init__(
+        self,
+        *,
+        nprobe: int = 8,
+        train_threshold: int = 4096,
+        kmeans_iterations: int = 12,
+        seed: int = 13,
+        quantization: str = "none",
+        rerank_factor: int = 8,
+    ) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.nprobe = max(1, nprobe)
+        self.train_threshold = max(1, train_threshold)
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._lock = RLock()
+        self.dim = 0
+        self.trained_size = 0
+        self.generation = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.segments: List[Segment] = []
+        self.delta: Optional[Segment] = None
+        self._locations: Dict[int, Tuple[Segment, int]] = {}
+
+    @property
+    def live_count(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return chunk_id in self._locations
+
+    def all_segments(self) -> List[Segment]:
+        return self.segments + ([self.delta] if self.delta is not None else [])
+
+    @property
+    def vector_nbytes(self) -> int:
+        return sum(int(s.vectors[: s.size].nbytes) for s in self.all_segments())
+
+    @property
+    def quantized_nbytes(self) -> int:
+        return sum(
+            s.quantized.nbytes for s in self.all_segments() if s.quantized is not None
+        )
+
+    def add_segment(self, segment: Segment) -> None:
+        """Attach a read-only snapshot segment."""
+        with self._lock:
+            if segment.size == 0:
+                return
+            if self.dim == 0:
+                self.dim = int(segment.vectors.shape[1])
+            self.segments.append(segment)
+            for row, chunk_id in enumerate(segment.chunk_ids[: segment.size]):
+                self._remove_chunk(int(chunk_id))
+                self._locations[int(chunk_id)] = (segment, row)
+
+    def upsert(self, entries: Iterable[IndexEntry]) -> int:
+        added = 0
+        with self._lock:
+            for entry in entries:
+                vector = np.asarray(entry.embedding, dtype=np.float32)
+                norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+                if norm == 0.0:
+                    self._remove_chunk(entry.chunk_id)
+                    continue
+                if self.dim == 0:
+                    self.dim = int(vector.shape[0])
+                if vector.shape[0] != self.dim:
+                    logger.warning(
+                        "Skipping chunk %s: embedding dim %s != index dim %s",
+                        entry.chunk_id,
+                        vector.shape[0],
+                        self.dim,
+                    )
+                    continue
+                if self.delta is None:
+                    self.delta = Segment.empty(self.dim)
+                self._remove_chunk(entry.chunk_id)
+                unit = vector / norm
+                row = self.delta.append(entry, unit, self._assign(unit))
+                self._locations[entry.chunk_id] = (self.delta, row)
+                added += 1
+            self._maybe_train()
+        return added
+
+    def remove_chunks(self, chunk_ids: Iterable[int]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove_chunk(int(chunk_id))
+
+    def remove_document(self, document_id: int) -> int:
+        removed = 0
+        with self._lock:
+            for segment in self.all_segments():
+                n = segment.size
+                rows = np.flatnonzero(
+                    segment.alive[:n] & (segment.document_ids[:n] == document_id)
+                )
+                for row in rows:
+                    self._locations.pop(int(segment.chunk_ids[row]), None)
+                segment.alive[rows] = False
+                removed += int(rows.size)
+        return removed
+
+    def update_document_metadata(
+        self,
+        document_id: int,
+        *,
+        kind: str,
+        rag_eligible: bool,
+        visibility_scope: str,
+    ) -> None:
+        with self._lock:
+            for segment in self.all_segments():
+                rows = segment.document_ids[: segment.size] == document_id
+                segment.kinds[: segment.size][rows] = kind
+                segment.rag_eligible[: segment.size][rows] = rag_eligible
+                segment.visibility[: segment.size][rows] = visibility_scope
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        kind: Optional[str] = None,
+        rag_eligible: Optional[bool] = None,
+        visibility_scope: Optional[str] = None,
+    ) -> List[IndexHit]:
+        with self._lock:
+            if k <= 0 or self.live_count == 0 or query.shape[0] != self.dim:
+                return []
+            probes = None
+            if self.centroids is not None:
+                probes = np.argsort(-(self.centroids @ query))[: self.nprobe]
+            quantized = self.quantization != "none"
+            owners: List[np.ndarray] = []
+            row_ids: List[np.ndarray] = []
+            scores: List[np.ndarray] = []
+            segments = self.all_segments()
+            for position, segment in enumerate(segments):
+                rows = segment.candidate_rows(
+                    kind=kind,
+                    rag_eligible=rag_eligible,
+                    visibility_scope=visibility_scope,
+                    probes=probes,
+                )
+                if rows.size == 0:
+                    continue
+                owners.append(np.full(rows.size, position, dtype=np.intp))
+                row_ids.append(rows)
+                if quantized:
+                    codes = segment.quantized_codes(self.quantization)
+                    scores.append(codes.scores(rows, query))
+                else:
+                    scores.append(segment.vectors[rows] @ query)
+            if not scores:
+                return []
+            all_scores = np.concatenate(scores)
+            all_owners = np.concatenate(owners)
+            all_rows = np.concatenate(row_ids)
+            if quantized:
+                pool = min(all_scores.size, k * self.rerank_factor)
+                if all_scores.size > pool:
+                    keep = np.sort(np.argpartition(-all_scores, pool - 1)[:pool])
+                    all_owners, all_rows = all_owners[keep], all_rows[keep]
+                # Exact re-rank of the shortlist against the float vectors.
+                all_scores = np.empty(all_rows.size, dtype=np.float32)
+                for position in np.unique(all_owners):
+                    picked = all_owners == position
+                    all_scores[picked] = (
+                        segments[position].vectors[all_rows[picked]] @ query
+                    )
+            if all_scores.size > k:
+                best = np.argpartition(-all_scores, k - 1)[:k]
+                all_scores = all_scores[best]
+                all_owners = all_owners[best]
+                all_rows = all_rows[best]
+            all_chunks = np.array(
+                [segments[o].chunk_ids[r] for o, r in zip(all_owners, all_rows)],
+                dtype=np.int64,
+            )
+            all_docs = np.array(
+                [segments[o].document_ids[r] for o, r in zip(all_owners, all_rows)],
+                dtype=np.int64,
+            )
+            order = np.argsort(-all_scores, kind="stable")
+            return [
+                IndexHit(
+                    chunk_id=int(all_chunks[i]),
+                    document_id=int(all_docs[i]),
+                    score=float(all_scores[i]),
+                )
+                for i in order
+            ]
+
+    def score_chunks(
+        self, query: np.ndarray, chunk_ids: Sequence[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact cosine scores for indexed chunk ids; ``found`` flags hits.
+
+        ``query`` may be one vector or a (queries, dim) matrix, in which case
+        scores have shape (queries, chunks).
+        """
+        queries = np.atleast_2d(query)
+        scores = np.zeros((queries.shape[0], len(chunk_ids)), dtype=np.float32)
+        found = np.zeros(len(chunk_ids), dtype=bool)
+        with self._lock:
+            if queries.shape[1] == self.dim:
+                for pos, chunk_id in enumerate(chunk_ids):
+                    location = self._locations.get(chunk_id)
+                    if location is None:
+                        continue
+                    segment, row = location
+                    scores[:, pos] = queries @ segment.vectors[row]
+                    found[pos] = True
+        return (scores[0] if query.ndim == 1 else scores), found
+
+    def _remove_chunk(self, chunk_id: int) -> None:
+        location = self._locations.pop(chunk_id, None)
+        if location is not None:
+            segment, row = location
+            segment.alive[row] = False
+
+    def _assign(self, vector: np.ndarray) -> int:
+        if self.centroids is None:
+            return -1
+        return int(np.argmax(self.centroids @ vector))
+
+    def needs_training(self) -> bool:
+        live = self.live_count
+        if self.centroids is None:
+            return live >= self.train_threshold
+        return live >= 2 * self.trained_size
+
+    def _maybe_train(self) -> None:
+        if self.needs_training():
+            self.train()
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """(Re)build IVF centroids with spherical k-means over the live vectors."""
+        with self._lock:
+            live = [
+                (segment, np.flatnonzero(segment.alive[: segment.size]))
+                for segment in self.all_segments()
+            ]
+            total = sum(rows.size for _, rows in live)
+            if total == 0:
+                self.centroids = None
+                return
+            nlist = min(nlist or max(1, int(np.sqrt(total))), total)
+            rng = np.random.default_rng(self.seed)
+            sample_size = min(total, nlist * 64)
+            picks = np.sort(rng.choice(total, sample_size, replace=False))
+            parts: List[np.ndarray] = []
+            offset = 0
+            for segment, rows in live:
+                local = picks[(picks >= offset) & (picks < offset + rows.size)]
+                if local.size:
+                    parts.append(np.asarray(segment.vectors[rows[local - offset]]))
+                offset += rows.size
+            sample = np.concatenate(parts)
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+            for _ in range(self.kmeans_iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[labels == c]
+                    if members.shape[0] == 0:
+                        continue
+                    centroid = members.sum(axis=0)
+                    norm = float(np.linalg.norm(centroid))
+                    if norm > 0:
+                        centroids[c] = centroid / norm
+            self.centroids = centroids.astype(np.float32)
+            for segment in self.all_segments():
+                segment.assign(self.centroids)
+            self.trained_size = total
+
+    def delta_entries(self) -> List[IndexEntry]:
+        """Live in-memory rows, used to carry them across snapshot reloads."""
+        delta = self.delta
+        if delta is None:
+            return []
+        return [
+            IndexEntry(
+                chunk_id=int(delta.chunk_ids[row]),
+                document_id=int(delta.document_ids[row]),
+                embedding=delta.vectors[row],
+                kind=str(delta.kinds[row]),
+                rag_eligible=bool(delta.rag_eligible[row]),
+                visibility_scope=str(delta.visibility[row]),
+            )
+            for row in np.flatnonzero(delta.alive[: delta.size])
+        ]
+
+
+class SnapshotStore:
+    """On-disk snapshot layout: memory-mapped ``.npy`` vectors plus sidecars.
+
+    ``manifest.json`` lists the segments of the current generation. Each
+    segment is ``vectors-<name>.npy`` (float32 rows, opened with
+    ``mmap_mode="r"``) and ``meta-<name>.npz`` (chunk/document ids, filter
+    columns and IVF assignments). The manifest is replaced atomically, so
+    readers always see a complete generation.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.manifest_path = directory / MANIFEST_FILENAME
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return None
+        return json.loads(self.manifest_path.read_text())
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_path, self.manifest_path)
+
+    def vectors_path(self, name: str) -> Path:
+        return self.directory / f"vectors-{name}.npy"
+
+    def meta_path(self, name: str) -> Path:
+        return self.directory / f"meta-{name}.npz"
+
+    def centroids_path(self, generation: int) -> Path:
+        return self.directory / f"centroids-{generation:06d}.npy"
+
+    def load(self, **index_kwargs: Any) -> Optional[VectorIndex]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        index = VectorIndex(**index_kwargs)
+        index.generation = int(manifest["generation"])
+        index.trained_size = int(manifest.get("trained_size", 0))
+        if manifest.get("centroids"):
+            index.centroids = np.load(self.directory / manifest["centroids"])
+        for entry in manifest["segments"]:
+            index.add_segment(self.load_segment(entry["name"], int(entry["count"])))
+        index.remove_chunks(manifest.get("tombstones", []))
+        return index
+
+    def load_segment(self, name: str, count: int) -> Segment:
+        vectors = np.load(self.vectors_path(name), mmap_mode="r")[:count]
+        with np.load(self.meta_path(name)) as meta:
+            return Segment(
+                vectors,
+                chunk_ids=meta["chunk_ids"],
+                document_ids=meta["document_ids"],
+                kinds=meta["kinds"],
+                visibility=meta["visibility"],
+                rag_eligible=meta["rag_eligible"],
+                assignments=meta["assignments"],
+                name=name,
+            )
+
+    def write_meta(self, segment: Segment) -> None:
+        assert segment.name is not None
+        n = segment.size
+        tmp_path = self.directory / f"meta-{segment.name}.tmp.npz"
+        np.savez(
+            tmp_path,
+            chunk_ids=segment.chunk_ids[:n],
+            document_ids=segment.document_ids[:n],
+            kinds=segment.kinds[:n],
+            visibility=segment.visibility[:n],
+            rag_eligible=segment.rag_eligible[:n],
+            assignments=segment.assignments[:n],
+        )
+        os.replace(tmp_path, self.meta_path(segment.name))
+
+    def remove_unreferenced(self, manifest: Dict[str, Any]) -> None:
+        keep = set()
+        for entry in manifest["segments"]:
+            keep.add(self.vectors_path(entry["name"]).name)
+            keep.add(self.meta_path(entry["name"]).name)
+        if manifest.get("centroids"):
+            keep.add(manifest["centroids"])
+        for path in self.directory.glob("*.np[yz]"):
+            if path.name in keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Another worker may still have the old generation mapped.
+                logger.debug("Could not remove stale snapshot file %s", path)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_path = self.directory / LOCK_FILENAME
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - lock_path.stat().st_mtime < LOCK_STALE_SECONDS:
+                raise RuntimeError("Vector snapshot is being written elsewhere")
+            lock_path.unlink()
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            yield
+        finally:
+            os.close(fd)
+            lock_path.unlink(missing_ok=True)
+
+
+class VectorIndexService:
+    """Process-wide owner of the chunk index used for candidate recall.
+
+    The database stays the source of truth: the scheduler snapshot job exports
+    chunk embeddings into a memory-mapped snapshot that every worker maps, and
+    each worker layers its own fresh ingests on top in memory until the next
+    snapshot generation picks them up.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = settings.vector_index_enabled
+        self.store = SnapshotStore(Path(settings.vector_index_path))
+        self._index: Optional[VectorIndex] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def _new_index(self) -> VectorIndex:
+        return VectorIndex(**self._index_kwargs())
+
+    def _index_kwargs(self) -> Dict[str, Any]:
+        return {
+            "nprobe": settings.vector_index_nprobe,
+            "quantization": settings.vector_index_quantization,
+            "rerank_factor": settings.vector_index_rerank_factor,
+        }
+
+    @property
+    def index(self) -> VectorIndex:
+        stamp = self.store.stamp()
+        if self._index is None or stamp != self._stamp:
+            self._reload(stamp)
+        assert self._index is not None
+        return self._index
+
+    def _reload(self, stamp: Optional[Tuple[int, int]]) -> None:
+        fresh = self.store.load(**self._index_kwargs())
+        if fresh is None:
+            fresh = self._index or self._new_index()
+        elif self._index is not None:
+            fresh.upsert(
+                entry
+                for entry in self._index.delta_entries()
+                if entry.chunk_id not in fresh
+            )
+        self._index = fresh
+        self._stamp = stamp
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.index.live_count > 0
+
+    def index_chunks(self, document: Document, chunks: Sequence[DocumentChunk]) -> None:
+        self.index_vectors(
+            document.id,
+            ((chunk.id, chunk.embedding_array) for chunk in chunks),
+            kind=document.kind,
+            rag_eligible=document.rag_eligible,
+            visibility_scope=document.visibility_scope,
+        )
+
+    def index_vectors(
+        self,
+        document_id: int,
+        vectors: Iterable[Tuple[int, Any]],
+        *,
+        kind: str,
+        rag_eligible: bool,
+        visibility_scope: str,
+    ) -> None:
+        """Index ``(chunk_id, embedding)`` pairs of one document."""
+        if not self.enabled:
+            return
+        self.index.upsert(
+            IndexEntry(
+                chunk_id=chunk_id,
+                document_id=document_id,
+                embedding=embedding,
+                kind=kind,
+                rag_eligible=rag_eligible,
+                visibility_scope=visibility_scope,
+            )
+            for chunk_id, embedding in vectors
+            if embedding is not None
+        )
+
+    def remove_document(self, document_id: int) -> None:
+        if not self.enabled:
+            return
+        self.index.remove_document(document_id)
+
+    def update_document(self, document: Document) -> None:
+        if not self.enabled:
+            return
+        self.index.update_document_metadata(
+            document.id,
+            kind=document.kind,
+            rag_eligible=document.rag_eligible,
+            visibility_scope=document.visibility_scope,
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        *,
+        k: Optional[int] = None,
+        kind: Optional[str] = None,
+        rag_eligible: Optional[bool] = None,
+        visibility_scope: Optional[str] = None,
+    ) -> List[IndexHit]:
+        if not self.enabled:
+            return []
+        return self.index.search(
+            query,
+            k or settings.vector_index_candidates,
+            kind=kind,
+            rag_eligible=rag_eligible,
+            visibility_scope=visibility_scope,
+        )
+
+    def score_chunks(
+        self, query: np.ndarray, chunk_ids: Sequence[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.enabled:
+            return (
+                np.zeros(query.shape[:-1] + (len(chunk_ids),), dtype=np.float32),
+                np.zeros(len(chunk_ids), dtype=bool),
+            )
+        return self.index.score_chunks(query, chunk_ids)
+
+    async def build_snapshot(self, db: AsyncSession) -> Dict[str, Any]:
+        """Export every embedded chunk into a fresh snapshot generation."""
+        with self.store.lock():
+            manifest = self.store.read_manifest() or {"generation": 0}
+            return await self._build_locked(db, int(manifest["generation"]) + 1)
+
+    async def refresh_snapshot(self, db: AsyncSession) -> Dict[str, Any]:
+        """Append chunks added since the last generation, or rebuild if stale.
+
+        Tombstones deleted chunks and rewrites the metadata of existing
+        segments whose documents changed kind, visibility or RAG eligibility.
+        """
+        with self.store.lock():
+            manifest = self.store.read_manifest()
+            current = self.store.load(**self._index_kwargs())
+            if manifest is None or current is None:
+                generation = int((manifest or {}).get("generation", 0)) + 1
+                return await self._build_locked(db, generation)
+            generation = int(manifest["generation"]) + 1
+
+            max_chunk_id = max(
+                (int(entry["max_chunk_id"]) for entry in manifest["segments"]),
+                default=0,
+            )
+            snapshot_ids = {
+                int(chunk_id)
+                for segment in current.segments
+                for chunk_id in segment.chunk_ids[: segment.size]
+            }
+            stored = {
+                row.id: (row.kind, row.rag_eligible, row.visibility_scope)
+                for row in await db.execute(
+                    select(
+                        DocumentChunk.id,
+                        Document.kind,
+                        Document.rag_eligible,
+                        Document.visibility_scope,
+                    )
+                    .join(Document, Document.id == DocumentChunk.document_id)
+                    .where(DocumentChunk.id <= max_chunk_id)
+                    .where(_indexable())
+                )
+            }
+            tombstones = sorted(snapshot_ids - stored.keys())
+            if len(tombstones) > REBUILD_TOMBSTONE_RATIO * max(1, len(snapshot_ids)):
+                return await self._build_locked(db, generation)
+            current.remove_chunks(tombstones)
+            # Document metadata edits leave chunk ids alone; rewrite the filter
+            # metadata of snapshot segments whose rows no longer match.
+            relabelled = [s for s in current.segments if s.relabel(stored)]
+
+            segment = await self._export_segment(
+                db,
+                f"{generation:06d}-{len(current.segments)}",
+                after_id=max_chunk_id,
+                dim=current.dim,
+            )
+            if (
+                segment is None
+                and not relabelled
+                and tombstones == manifest.get("tombstones", [])
+            ):
+                return {"status": "unchanged", "generation": current.generation}
+            if segment is not None:
+                segment.assign(current.centroids)
+                current.add_segment(segment)
+            if current.needs_training():
+                return await self._build_locked(db, generation + 1)
+            return self._commit_generation(
+                current,
+                generation,
+                new_segments=relabelled + ([segment] if segment is not None else []),
+                tombstones=tombstones,
+            )
+
+    async def _build_locked(self, db: AsyncSession, generation: int) -> Dict[str, Any]:
+        segment = await self._export_segment(
+            db, f"{generation:06d}-0", after_id=0, dim=0
+        )
+        index = self._new_index()
+        if segment is not None:
+            index.add_segment(segment)
+        if index.needs_training():
+            index.train()
+        return self._commit_generation(
+            index,
+            generation,
+            new_segments=index.segments,
+            tombstones=[],
+        )
+
+    def _commit_generation(
+        self,
+        index: VectorIndex,
+        generation: int,
+        *,
+        new_segments: List[Segment],
+        tombstones: List[int],
+    ) -> Dict[str, Any]:
+        centroids_name = None
+        if index.centroids is not None:
+            centroids_path = self.store.centroids_path(generation)
+            np.save(centroids_path, index.centroids)
+            centroids_name = centroids_path.name
+        for segment in new_segments:
+            self.store.write_meta(segment)
+        manifest = {
+            "generation": generation,
+            "dim": index.dim,
+            "trained_size": index.trained_size,
+            "centroids": centroids_name,
+            "segments": [
+                {
+                    "name": segment.name,
+                    "count": segment.size,
+                    "max_chunk_id": int(segment.chunk_ids[: segment.size].max()),
+                }
+                for segment in index.segments
+            ],
+            "tombstones": tombstones,
+        }
+        self.store.write_manifest(manifest)
+        self.store.remove_unreferenced(manifest)
+        return {
+            "status": "ok",
+            "generation": generation,
+            "segments": len(index.segments),
+            "vectors": index.live_count,
+            "dim": index.dim,
+            "path": str(self.store.directory),
+        }
+
+    async def _export_segment(
+        self,
+        db: AsyncSession,
+        name: str,
+        *,
+        after_id: int,
+        dim: int,
+        batch_size: int = 1000,
+    ) -> Optional[Segment]:
+        """Stream chunk embeddings with ``id > after_id`` into a new segment."""
+        expected = (
+            await db.execute(
+                select(func.count(DocumentChunk.id))
+                .where(DocumentChunk.id > after_id)
+                .where(_indexable())
+            )
+        ).scalar() or 0
+        if expected == 0:
+            return None
+
+        path = self.store.vectors_path(name)
+        vectors: Optional[np.memmap] = None
+        meta: Dict[str, List[Any]] = {
+            "chunk_ids": [],
+            "document_ids": [],
+            "kinds": [],
+            "visibility": [],
+            "rag_eligible": [],
+        }
+        last_id = after_id
+        written = 0
+        while written < expected:
+            stmt = (
+                select(
+                    DocumentChunk.id,
+                    DocumentChunk.document_id,
+                    DocumentChunk.embedding,
+                    DocumentChunk.embedding_vector,
+                    DocumentChunk.embedding_dtype,
+                    Document.kind,
+                    Document.rag_eligible,
+                    Document.visibility_scope,
+                )
+                .join(Document, Document.id == DocumentChunk.document_id)
+                .where(DocumentChunk.id > last_id)
+                .where(_indexable())
+                .order_by(DocumentChunk.id)
+                .limit(min(batch_size, expected - written))
+            )
+            rows = (await db.execute(stmt)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                embedding = decode_embedding(
+                    row.embedding_vector, row.embedding_dtype, row.embedding
+                )
+                if embedding is None:
+                    continue
+                if vectors is None:
+                    dim = dim or int(embedding.shape[0])
+                    vectors = np.lib.format.open_memmap(
+                        path, mode="w+", dtype=np.float32, shape=(expected, dim)
+                    )
+                norm = float(np.linalg.norm(embedding))
+                if embedding.shape[0] != dim or norm == 0.0:
+                    continue
+                vectors[written] = embedding / norm
+                meta["chunk_ids"].append(row.id)
+                meta["document_ids"].append(row.document_id)
+                meta["kinds"].append(row.kind)
+                meta["visibility"].append(row.visibility_scope)
+                meta["rag_eligible"].append(row.rag_eligible)
+                written += 1
+        if vectors is None:
+            return None
+        vectors.flush()
+        del vectors
+        if written == 0:
+            path.unlink(missing_ok=True)
+            return None
+        return Segment(
+            np.load(path, mmap_mode="r")[:written],
+            chunk_ids=np.asarray(meta["chunk_ids"], dtype=np.int64),
+            document_ids=np.asarray(meta["document_ids"], dtype=np.int64),
+            kinds=np.asarray(meta["kinds"], dtype="<U50"),
+            visibility=np.asarray(meta["visibility"], dtype="<U32"),
+            rag_eligible=np.asarray(meta["rag_eligible"], dtype=bool),
+            name=name,
+        )
+
+
+def _indexable() -> Any:
+    # Near-duplicates are reached through their canonical chunk.
+    has_embedding = DocumentChunk.embedding_vector.is_not(
+        None
+    ) | DocumentChunk.embedding.is_not(None)
+    return has_embedding & DocumentChunk.canonical_chunk_id.is_(None)
+
+
+vector_index_service = VectorIndexService()
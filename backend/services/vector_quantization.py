@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+SCORE_BLOCK_ROWS = 65536
+
+# Set bits per byte value, for Hamming distances over packed sign bits.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and the scale that maps them back."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    peak = np.abs(vectors).max(axis=1) if vectors.size else np.zeros(0, np.float32)
+    scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Approximate inner products of int8 rows with a float query."""
+    scores = np.empty(codes.shape[0], dtype=np.float32)
+    for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+        block = codes[start : start + SCORE_BLOCK_ROWS].astype(np.float32)
+        scores[start : start + block.shape[0]] = block @ query
+    return scores * scales
+
+
+def pack_signs(vectors: np.ndarray) -> np.ndarray:
+    """One bit per dimension (set when positive), packed eight to a byte."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def hamming_scores(packed: np.ndarray, query: np.ndarray, dim: int) -> np.ndarray:
+    """Cosine estimates from sign-bit Hamming distance (SimHash angle)."""
+    query_bits = pack_signs(query)
+    distances = np.empty(packed.shape[0], dtype=np.int32)
+    for start in range(0, packed.shape[0], SCORE_BLOCK_ROWS):
+        block = packed[start : start + SCORE_BLOCK_ROWS]
+        distances[start : start + block.shape[0]] = POPCOUNT[
+            np.bitwise_xor(block, query_bits)
+        ].sum(axis=1, dtype=np.int32)
+    return np.cos(np.pi * distances / max(1, dim)).astype(np.float32)
+
+
+class QuantizedCodes:
+    """Quantized copy of the first ``size`` rows of a segment's vectors.
+
+    Codes are extended in place as rows are appended, so the in-memory delta
+    segment only quantizes its new rows.
+    """
+
+    def __init__(self, mode: str, dim: int) -> None:
+        if mode not in QUANTIZATION_MODES[1:]:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.dim = dim
+        self.size = 0
+        width = dim if mode == "int8" else (dim + 7) // 8
+        self.codes = np.zeros((0, width), dtype=np.int8 if mode == "int8" else np.uint8)
+        self.scales = np.zeros(0, dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes[: self.size].nbytes + self.scales[: self.size].nbytes)
+
+    def extend(self, vectors: np.ndarray, size: int) -> None:
+        if size <= self.size:
+            return
+        parts, scales = [self.codes[: self.size]], [self.scales[: self.size]]
+        for start in range(self.size, size, SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start : min(size, start + SCORE_BLOCK_ROWS)])
+            if self.mode == "int8":
+                codes, block_scales = quantize_int8(block)
+                parts.append(codes)
+                scales.append(block_scales)
+            else:
+                parts.append(pack_signs(block))
+        self.codes = np.concatenate(parts)
+        if self.mode == "int8":
+            self.scales = np.concatenate(scales)
+        self.size = size
+
+    def scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if self.mode == "int8":
+            return int8_scores(self.codes[rows], self.scales[rows], query)
+        return hamming_scores(self.codes[rows], query, self.dim)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Fingerprint chunks ingested before near-duplicate detection and link copies
+to their canonical chunk. Rebuild the vector snapshot afterwards
+(POST /api/admin/vector-index/rebuild) so linked chunks leave the ANN index.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+# Ensure project root on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.models.base import async_session_maker  # noqa: E402
+from backend.services.near_duplicate_service import (  # noqa: E402
+    near_duplicate_service,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("backfill_chunk_fingerprints")
+
+
+async def main():
+    if not near_duplicate_service.enabled:
+        logger.warning("CHUNK_DEDUPE_ENABLED is false; nothing to do.")
+        return
+    async with async_session_maker() as db:
+        linked = await near_duplicate_service.backfill(db)
+    logger.info("Linked %s near-duplicate chunks.", linked)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import select
+
+from backend.models.base import async_session_maker
+from backend.models.chunk import DocumentChunk
+from backend.services.vector_index_service import IndexEntry, VectorIndex
+from scripts.benchmark_phase1 import summarize_latencies
+
+MODES = ("int8", "binary")
+
+
+def synthetic_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    """Clustered Gaussian vectors, a rough stand-in for topical chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 100), dim))
+    picks = rng.integers(0, centers.shape[0], count)
+    return (centers[picks] + 0.6 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+async def load_chunk_vectors() -> np.ndarray:
+    """Chunk embeddings from the configured database (``DATABASE_URL``)."""
+    async with async_session_maker() as db:
+        result = await db.stream(
+            select(DocumentChunk).where(DocumentChunk.embedding_vector.is_not(None))
+        )
+        rows: List[np.ndarray] = []
+        async for chunk in result.scalars():
+            vector = chunk.embedding_array
+            if vector is not None and (not rows or vector.shape == rows[0].shape):
+                rows.append(np.asarray(vector, dtype=np.float32))
+    if not rows:
+        raise SystemExit("No chunk embeddings found; run generate_embeddings first.")
+    return np.stack(rows)
+
+
+def build_index(vectors: np.ndarray, **index_kwargs: Any) -> VectorIndex:
+    # A flat scan isolates the quantization error from IVF probing.
+    index = VectorIndex(train_threshold=vectors.shape[0] + 1, **index_kwargs)
+    index.upsert(
+        IndexEntry(
+            chunk_id=i + 1,
+            document_id=i + 1,
+            embedding=vector,
+            kind="rule",
+            rag_eligible=True,
+            visibility_scope="gm_only",
+        )
+        for i, vector in enumerate(vectors)
+    )
+    return index
+
+
+def run_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    *,
+    k: int,
+    rerank_factors: List[int],
+) -> Dict[str, Any]:
+    exact = build_index(vectors)
+    expected: List[set[int]] = []
+    exact_latencies: List[float] = []
+    for query in queries:
+        start = perf_counter()
+        hits = exact.search(query, k)
+        exact_latencies.append((perf_counter() - start) * 1000)
+        expected.append({hit.chunk_id for hit in hits})
+
+    tiers: List[Dict[str, Any]] = []
+    for mode in MODES:
+        for factor in rerank_factors:
+            index = build_index(vectors, quantization=mode, rerank_factor=factor)
+            recalls: List[float] = []
+            latencies: List[float] = []
+            for query, truth in zip(queries, expected):
+                start = perf_counter()
+                hits = index.search(query, k)
+                latencies.append((perf_counter() - start) * 1000)
+                found = {hit.chunk_id for hit in hits}
+                recalls.append(len(found & truth) / max(1, len(truth)))
+            tiers.append(
+                {
+                    "mode": mode,
+                    "rerank_factor": factor,
+                    "recall_at_k": round(float(np.mean(recalls)), 4),
+                    "min_recall": round(float(np.min(recalls)), 4),
+                    "code_bytes": index.quantized_nbytes,
+                    "memory_ratio": round(
+                        index.quantized_nbytes / max(1, exact.vector_nbytes), 4
+                    ),
+                    "latency_ms": summarize_latencies(latencies),
+                }
+            )
+    return {
+        "vectors": int(vectors.shape[0]),
+        "dim": int(vectors.shape[1]),
+        "queries": int(queries.shape[0]),
+        "k": k,
+        "exact": {
+            "vector_bytes": exact.vector_nbytes,
+            "latency_ms": summarize_latencies(exact_latencies),
+        },
+        "tiers": tiers,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Report recall@k and memory of the quantized vector tiers against exact search."
+    )
+    parser.add_argument("--json", action="store_true", help="Emit the report as JSON.")
+    parser.add_argument(
+        "--from-db",
+        action="store_true",
+        help="Use chunk embeddings from DATABASE_URL instead of synthetic vectors.",
+    )
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factors", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    if args.from_db:
+        vectors = asyncio.run(load_chunk_vectors())
+        rng = np.random.default_rng(args.seed)
+        picks = rng.choice(vectors.shape[0], min(args.queries, vectors.shape[0]))
+        # Perturbed chunk vectors stand in for queries about the same text.
+        queries = vectors[picks] + 0.3 * np.abs(vectors[picks]).mean() * rng.normal(
+            size=(picks.size, vectors.shape[1])
+        ).astype(np.float32)
+    else:
+        sample = synthetic_vectors(args.count + args.queries, args.dim, args.seed)
+        vectors, queries = sample[: args.count], sample[args.count :]
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+    report = run_report(vectors, queries, k=args.k, rerank_factors=args.rerank_factors)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("Quantized vector tier report")
+    print(
+        f"Vectors: {report['vectors']} x {report['dim']}, "
+        f"queries: {report['queries']}, k={report['k']}"
+    )
+    print(
+        f"exact: {report['exact']['vector_bytes']} bytes, "
+        f"p95={report['exact']['latency_ms']['p95_latency_ms']} ms"
+    )
+    for tier in report["tiers"]:
+        print(
+            f"{tier['mode']:>6} x{tier['rerank_factor']:<2} "
+            f"recall@{report['k']}={tier['recall_at_k']:.4f} "
+            f"(min {tier['min_recall']:.2f}), "
+            f"{tier['code_bytes']} bytes ({tier['memory_ratio']:.1%}), "
+            f"p95={tier['latency_ms']['p95_latency_ms']} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -656,3 +656,63 @@ Hooks:
         )
     finally:
         asyncio.run(engine.dispose())
+
+
+def test_entity_neighborhood_walks_relationship_hops_in_one_request():
+    app, engine, _ = create_documents_test_app()
+    client = TestClient(app)
+
+    try:
+        guild = _create_entity(client, entity_type="faction", name="Lantern Guild")
+        talia = _create_entity(client, entity_type="pc", name="Talia Stormborn")
+        mira = _create_entity(client, entity_type="npc", name="Captain Mira")
+        voss = _create_entity(client, entity_type="npc", name="Voss")
+        _create_entity(client, entity_type="npc", name="Unrelated Hermit")
+        for source, target, relationship_type in (
+            (talia, guild, "member"),
+            (mira, guild, "member"),
+            (voss, mira, "rival"),
+        ):
+            response = client.post(
+                "/api/campaign/relationships",
+                json={
+                    "source_entity_id": source["id"],
+                    "target_entity_id": target["id"],
+                    "relationship_type": relationship_type,
+                },
+            )
+            assert response.status_code == 200
+
+        one_hop = client.get(f"/api/campaign/entities/{guild['id']}/neighborhood")
+        assert one_hop.status_code == 200
+        payload = one_hop.json()
+        assert [(node["name"], node["depth"]) for node in payload["nodes"]] == [
+            ("Lantern Guild", 0),
+            ("Captain Mira", 1),
+            ("Talia Stormborn", 1),
+        ]
+        assert {edge["relationship_type"] for edge in payload["edges"]} == {"member"}
+        assert set(payload["nodes"][0]) == {
+            "id",
+            "stable_key",
+            "entity_type",
+            "name",
+            "depth",
+        }
+
+        two_hops = client.get(
+            f"/api/campaign/entities/{guild['id']}/neighborhood", params={"depth": 2}
+        ).json()
+        assert [node["name"] for node in two_hops["nodes"]][-1] == "Voss"
+        assert len(two_hops["edges"]) == 3
+
+        members_only = client.get(
+            f"/api/campaign/entities/{guild['id']}/neighborhood",
+            params={"depth": 2, "types": "member"},
+        ).json()
+        assert "Voss" not in {node["name"] for node in members_only["nodes"]}
+
+        missing = client.get("/api/campaign/entities/999/neighborhood")
+        assert missing.status_code == 404
+    finally:
+        asyncio.run(engine.dispose())
@@ -7,6 +7,7 @@ import zipfile
 
 from fastapi.testclient import TestClient
 
+from backend.services.pdf_text_extractor import PdfTextExtractor
 from tests.support.app_factory import create_documents_test_app
 
 
@@ -550,9 +551,10 @@ def test_local_reference_import_supports_pdf_via_pdftotext(
             stderr="",
         )
 
+    monkeypatch.setattr("backend.services.pdf_text_extractor.subprocess.run", fake_run)
     monkeypatch.setattr(
-        "backend.services.campaign_asset_import_service.subprocess.run",
-        fake_run,
+        "backend.services.campaign_asset_import_service.pdf_text_extractor",
+        PdfTextExtractor(cache_dir=tmp_path / "pdf-cache", workers=0),
     )
 
     try:
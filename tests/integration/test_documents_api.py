@@ -1,4 +1,5 @@
 import asyncio
+import json
 
 from fastapi.testclient import TestClient
 from sqlalchemy import select
@@ -157,3 +158,92 @@ def test_document_filters_support_governance_metadata():
         )
     finally:
         asyncio.run(engine.dispose())
+
+
+def test_batch_search_applies_per_query_filters():
+    app, engine, _ = create_documents_test_app()
+    client = TestClient(app)
+
+    try:
+        for title, kind, content in (
+            ("Fireball", "rule", "Fireball explodes in a 20-foot-radius sphere."),
+            ("Grappling", "rule", "Grabbed creatures are off-guard and immobilized."),
+            ("Bridge ambush", "campaign_note", "Cultists ambush the party at a fire."),
+        ):
+            created = client.post(
+                "/api/documents",
+                json={"title": title, "kind": kind, "content": content},
+            )
+            assert created.status_code == 200
+
+        response = client.post(
+            "/api/documents/search/batch",
+            json={
+                "queries": [
+                    {"q": "fireball", "kind": "rule", "top_k": 1},
+                    {"q": "grabbed", "include_chunks": 1},
+                    {"q": "ambush", "kind": "campaign_note"},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        fireball, grabbed, ambush = response.json()["results"]
+        assert fireball["query"] == "fireball"
+        assert [r["document"]["title"] for r in fireball["results"]] == ["Fireball"]
+        assert "chunks" not in fireball["results"][0]
+        assert grabbed["results"][0]["document"]["title"] == "Grappling"
+        assert "off-guard" in grabbed["results"][0]["chunks"][0]["content"]
+        assert [r["document"]["title"] for r in ambush["results"]] == ["Bridge ambush"]
+
+        single = client.get(
+            "/api/documents/search", params={"q": "fireball", "kind": "rule"}
+        ).json()
+        batch = client.post(
+            "/api/documents/search/batch",
+            json={"queries": [{"q": "fireball", "kind": "rule"}]},
+        ).json()
+        assert batch["results"][0] == single
+
+        empty = client.post("/api/documents/search/batch", json={"queries": []})
+        assert empty.status_code == 422
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_search_stream_sends_keyword_then_final_events():
+    app, engine, _ = create_documents_test_app()
+    client = TestClient(app)
+
+    try:
+        client.post(
+            "/api/documents",
+            json={
+                "title": "Fireball",
+                "kind": "rule",
+                "content": "Fireball explodes in a 20-foot-radius sphere.",
+            },
+        )
+        with client.stream(
+            "GET",
+            "/api/documents/search/stream",
+            params={"q": "fireball", "include_chunks": 1},
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+
+        events = []
+        for block in body.strip().split("\n\n"):
+            name, data = block.split("\n")
+            events.append((name.removeprefix("event: "), json.loads(data[6:])))
+        assert [name for name, _ in events] == ["keyword", "final"]
+        final = events[1][1]
+        assert final["results"][0]["document"]["title"] == "Fireball"
+        assert "20-foot" in final["results"][0]["chunks"][0]["content"]
+
+        single = client.get("/api/documents/search", params={"q": "fireball"}).json()
+        assert [r["document"] for r in final["results"]] == [
+            r["document"] for r in single["results"]
+        ]
+    finally:
+        asyncio.run(engine.dispose())
@@ -11,7 +11,7 @@ from backend.api.routes.live import (
     page_router as live_page_router,
 )
 from backend.api.routes.prep import router as prep_router
-from backend.models.base import Base, get_db
+from backend.models.base import Base, get_db, get_session_maker
 import backend.models.campaign  # noqa: F401
 import backend.models.context  # noqa: F401
 import backend.models.document  # noqa: F401
@@ -46,4 +46,5 @@ def create_documents_test_app():
                 await session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_maker] = lambda: session_local
     return app, engine, session_local
@@ -1,8 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import subprocess
 
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.config.settings import settings
+from backend.models.base import Base
+from backend.models.document import Document
+from backend.models.embedding_cache import EmbeddingCacheEntry
 from backend.services.campaign_asset_import_service import CampaignAssetImportService
+from backend.services.content_embedding_cache import (
+    content_embedding_cache,
+    content_hash,
+)
+from backend.services.embedding_service import embedding_service
+from backend.services.ingestion_service import ingestion_service
+from backend.services.pdf_text_extractor import PdfTextExtractor
 
 
 def test_extract_pdf_text_preserves_page_markers(monkeypatch, tmp_path):
@@ -20,9 +36,10 @@ def test_extract_pdf_text_preserves_page_markers(monkeypatch, tmp_path):
             stderr="",
         )
 
+    monkeypatch.setattr("backend.services.pdf_text_extractor.subprocess.run", fake_run)
     monkeypatch.setattr(
-        "backend.services.campaign_asset_import_service.subprocess.run",
-        fake_run,
+        "backend.services.campaign_asset_import_service.pdf_text_extractor",
+        PdfTextExtractor(cache_dir=tmp_path / "pdf-cache", workers=0),
     )
 
     content, non_empty_lines = service._extract_pdf_text(pdf_path)
@@ -32,3 +49,173 @@ def test_extract_pdf_text_preserves_page_markers(monkeypatch, tmp_path):
     assert "[Page 2]" in content
     assert "Second page text" in content
     assert non_empty_lines >= 4
+
+
+def test_import_batch_pipelines_documents_and_keeps_discovery_order(
+    monkeypatch, tmp_path
+):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    embedded = []
+
+    async def _fake_batch(texts):
+        embedded.extend(texts)
+        return [[1.0, float(len(text)), 0.5] for text in texts]
+
+    monkeypatch.setattr(embedding_service, "provider", "local")
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    monkeypatch.setattr(settings, "asset_import_batch_size", 2)
+    monkeypatch.setattr(settings, "asset_import_queue_size", 1)
+
+    guides = tmp_path / "misc/pf2e-reference/raw"
+    guides.mkdir(parents=True)
+    for n in range(5):
+        (guides / f"guide-{n}.md").write_text(
+            f"# Guide {n}\n\nTactics note {n}: flank the ghoul.", encoding="utf-8"
+        )
+    (guides / "empty.md").write_text("", encoding="utf-8")
+    notes = tmp_path / "campaign-notes"
+    notes.mkdir()
+    (notes / "otari.md").write_text(
+        "## Location: Otari\nCategory: town\n", encoding="utf-8"
+    )
+    service = CampaignAssetImportService()
+
+    async def _run():
+        async with SessionLocal() as session:
+            first = await service.import_batch(session, root_path=str(tmp_path))
+            first_embedded = list(embedded)
+            embedded.clear()
+            second = await service.import_batch(session, root_path=str(tmp_path))
+            return first, first_embedded, second, list(embedded)
+
+    try:
+        first, first_embedded, second, second_embedded = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert [item["path"] for item in first["files"]] == [
+        "campaign-notes/otari.md",
+        *(f"misc/pf2e-reference/raw/guide-{n}.md" for n in range(5)),
+        "misc/pf2e-reference/raw/empty.md",
+    ]
+    assert first["summary"]["files_imported"] == 6
+    assert first["summary"]["files_failed"] == 1
+    assert first["summary"]["created_documents"] == 5
+    assert list(first["pipeline"]) == ["discover", "parse", "chunk", "embed", "persist"]
+    assert first["pipeline"]["parse"]["items_in"] == 7
+    assert first["pipeline"]["persist"]["items_in"] == 5
+    assert first["pipeline"]["persist"]["batches"] >= 3
+    # Persist reads the embed stage's vectors from the content cache.
+    assert len(first_embedded) == len(set(first_embedded))
+
+    assert second["summary"]["updated_documents"] == 5
+    assert second_embedded == []
+
+
+def test_import_batch_retries_failed_batches_and_stops_after_the_first_failure(
+    monkeypatch, tmp_path
+):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    bulk_ingest = ingestion_service.ingest_documents_bulk
+
+    async def _ingest(db, documents, **kwargs):
+        documents = list(documents)
+        if any(document.title == "Guide 2" for document in documents):
+            # A failed flush leaves the session needing a rollback.
+            db.add(Document(title=None, content="x", kind="guide"))
+            try:
+                await db.flush()
+            except IntegrityError as exc:
+                raise ValueError("Guide 2 is malformed") from exc
+        return await bulk_ingest(db, documents, **kwargs)
+
+    embed_texts = content_embedding_cache.embed_texts
+    embed_stage_texts = []
+
+    async def _embed_texts(db, texts, **kwargs):
+        if kwargs.get("commit"):
+            embed_stage_texts.extend(texts)
+        return await embed_texts(db, texts, **kwargs)
+
+    async def _fake_batch(texts):
+        return [[1.0, float(len(text)), 0.5] for text in texts]
+
+    monkeypatch.setattr(embedding_service, "provider", "local")
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    monkeypatch.setattr(ingestion_service, "ingest_documents_bulk", _ingest)
+    monkeypatch.setattr(content_embedding_cache, "embed_texts", _embed_texts)
+    # One worker per stage, so files reach persist in discovery order.
+    monkeypatch.setattr(settings, "asset_import_parse_concurrency", 1)
+    monkeypatch.setattr(settings, "asset_import_embed_concurrency", 1)
+    monkeypatch.setattr(settings, "asset_import_batch_size", 2)
+    monkeypatch.setattr(settings, "asset_import_queue_size", 1)
+
+    guides = tmp_path / "misc/pf2e-reference/raw"
+    guides.mkdir(parents=True)
+    for n in range(5):
+        (guides / f"guide-{n}.md").write_text(
+            f"# Guide {n}\n\nTactics note {n}: flank the ghoul.", encoding="utf-8"
+        )
+    (guides / "empty.md").write_text("", encoding="utf-8")
+    notes = tmp_path / "campaign-notes"
+    notes.mkdir()
+    (notes / "otari.md").write_text(
+        "## Location: Otari\nCategory: town\n", encoding="utf-8"
+    )
+    service = CampaignAssetImportService()
+
+    async def _run(stop_on_error):
+        async with SessionLocal() as session:
+            return await service.import_batch(
+                session, root_path=str(tmp_path), stop_on_error=stop_on_error
+            )
+
+    async def _cached_hashes():
+        async with SessionLocal() as session:
+            rows = await session.execute(select(EmbeddingCacheEntry.content_hash))
+            return set(rows.scalars().all())
+
+    def _statuses(response):
+        return {item["path"]: item["status"] for item in response["files"]}
+
+    try:
+        kept_going = asyncio.run(_run(False))
+        cached = asyncio.run(_cached_hashes())
+        stopped = asyncio.run(_run(True))
+    finally:
+        asyncio.run(engine.dispose())
+
+    raw = "misc/pf2e-reference/raw"
+    assert _statuses(kept_going) == {
+        "campaign-notes/otari.md": "imported",
+        f"{raw}/empty.md": "failed",
+        **{f"{raw}/guide-{n}.md": "imported" for n in (0, 1, 3, 4)},
+        f"{raw}/guide-2.md": "failed",
+    }
+    # Rolling back the failed batch kept the vectors the embed stage cached,
+    # including those of the guide that failed to persist.
+    assert embed_stage_texts
+    assert {content_hash(text) for text in embed_stage_texts if text} <= cached
+    # The unparseable empty.md comes first but does not stop the batch; the
+    # entity note discovered before the failed guide is still imported.
+    assert _statuses(stopped) == {
+        "campaign-notes/otari.md": "imported",
+        f"{raw}/empty.md": "failed",
+        f"{raw}/guide-0.md": "imported",
+        f"{raw}/guide-1.md": "imported",
+        f"{raw}/guide-2.md": "failed",
+    }
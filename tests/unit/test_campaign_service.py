@@ -1,10 +1,14 @@
 import asyncio
+from datetime import datetime
 
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from backend.models.base import Base
-import backend.models.campaign  # noqa: F401
+from backend.models.campaign import CampaignEntityLanguage
+from backend.models.document import Document
 from backend.services.campaign_service import campaign_service
+from backend.services.entity_graph_cache import entity_graph_cache
 
 
 def test_campaign_service_generates_stable_keys_per_entity_type():
@@ -69,3 +73,424 @@ def test_campaign_service_rejects_non_location_current_location_references():
             await engine.dispose()
 
     asyncio.run(_run())
+
+
+def test_campaign_overview_is_served_from_the_patched_entity_graph():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        statements = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        try:
+            async with session_local() as session:
+                dock = await campaign_service.create_entity(
+                    session, entity_type="location", name="Dock"
+                )
+                pc = await campaign_service.create_entity(
+                    session, entity_type="pc", name="Aster", current_location_id=dock.id
+                )
+                await campaign_service.get_overview(session)
+
+                statements.clear()
+                await campaign_service.get_overview(session)
+                assert len(statements) == 1
+                assert "campaign_graph_version" in statements[0]
+
+                await campaign_service.update_entity(dock.id, session, name="Old Dock")
+                await campaign_service.add_sheet_version(
+                    pc.id, session, payload={"level": 3, "languages": ["Common"]}
+                )
+                npc = await campaign_service.create_entity(
+                    session, entity_type="npc", name="Mira"
+                )
+                await campaign_service.create_relationship(
+                    session,
+                    source_entity_id=pc.id,
+                    target_entity_id=npc.id,
+                    relationship_type="ally",
+                )
+                statements.clear()
+                patched = await campaign_service.get_overview(session)
+                assert len(statements) == 1
+                assert patched["pcs"][0]["current_location"]["name"] == "Old Dock"
+                assert patched["pcs"][0]["details"]["level"] == 3
+                assert patched["pcs"][0]["latest_sheet_version"]["version_number"] == 1
+
+                await campaign_service.delete_entity(dock.id, session)
+                patched = await campaign_service.get_overview(session)
+                assert patched["counts"] == {"npc": 1, "pc": 1}
+                assert patched["pcs"][0]["current_location"] is None
+
+            entity_graph_cache.invalidate(session)
+            async with session_local() as session:
+                reloaded = await campaign_service.get_overview(session)
+            assert reloaded == patched
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
+
+
+def test_campaign_overview_reloads_after_writes_from_another_process(tmp_path):
+    async def _run():
+        url = f"sqlite+aiosqlite:///{tmp_path / 'campaign.db'}"
+        # Two engines on one file stand in for the API and a CLI process.
+        api_engine = create_async_engine(url, future=True)
+        cli_engine = create_async_engine(url, future=True)
+        async with api_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        api_session = async_sessionmaker(
+            api_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        cli_session = async_sessionmaker(
+            cli_engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        try:
+            async with api_session() as session:
+                dock = await campaign_service.create_entity(
+                    session, entity_type="location", name="Dock"
+                )
+                await campaign_service.get_overview(session)
+
+            async with cli_session() as session:
+                await campaign_service.update_entity(dock.id, session, name="Old Dock")
+                await campaign_service.create_entity(
+                    session, entity_type="npc", name="Mira"
+                )
+
+            async with api_session() as session:
+                overview = await campaign_service.get_overview(session)
+                assert overview["counts"] == {"location": 1, "npc": 1}
+                assert overview["locations"][0]["name"] == "Old Dock"
+
+                # The graph is current again, so this process's writes patch it.
+                await campaign_service.create_entity(
+                    session, entity_type="pc", name="Aster", current_location_id=dock.id
+                )
+                overview = await campaign_service.get_overview(session)
+                assert overview["pcs"][0]["current_location"]["name"] == "Old Dock"
+        finally:
+            await api_engine.dispose()
+            await cli_engine.dispose()
+
+    asyncio.run(_run())
+
+
+def test_list_entities_pages_in_sql_and_filters_languages_from_the_side_table():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        try:
+            async with session_local() as session:
+                for name in ("Brin", "Aster", "Cora", "Aster"):
+                    await campaign_service.create_entity(
+                        session,
+                        entity_type="npc",
+                        name=name,
+                        details={"languages": ["Common"]},
+                    )
+                pc = await campaign_service.create_entity(
+                    session,
+                    entity_type="pc",
+                    name="Dain",
+                    details={"languages": ["Dwarvish"]},
+                )
+
+                offset_page = await campaign_service.list_entities(
+                    session, page=2, page_size=2
+                )
+                walked = []
+                cursor = None
+                while True:
+                    payload = await campaign_service.list_entities(
+                        session, page_size=2, cursor=cursor
+                    )
+                    walked.extend(item["id"] for item in payload["items"])
+                    cursor = payload["next_cursor"]
+                    if cursor is None:
+                        break
+
+                await campaign_service.update_entity(
+                    pc.id, session, details={"scripts": ["Elven"]}
+                )
+                elven = await campaign_service.list_entities(session, language="elven")
+                dwarvish = await campaign_service.list_entities(
+                    session, language="Dwarvish"
+                )
+                await campaign_service.delete_entity(pc.id, session)
+                remaining = (
+                    await session.execute(
+                        select(CampaignEntityLanguage.language).distinct()
+                    )
+                ).scalars()
+                return offset_page, walked, elven, dwarvish, set(remaining)
+        finally:
+            await engine.dispose()
+
+    offset_page, walked, elven, dwarvish, remaining = asyncio.run(_run())
+
+    assert offset_page["total"] == 5
+    assert offset_page["pages"] == 3
+    assert [item["name"] for item in offset_page["items"]] == ["Brin", "Cora"]
+    assert offset_page["next_cursor"] is not None
+    # The two Asters tie on (entity_type, name) and are ordered by id.
+    assert walked == [2, 4, 1, 3, 5]
+    assert [item["name"] for item in elven["items"]] == ["Dain"]
+    assert dwarvish["total"] == 0
+    assert remaining == {"common"}
+
+
+def test_session_history_pairs_pages_and_filters_in_sql_without_content():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        statements = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        try:
+            async with session_local() as session:
+                for day, title in enumerate(
+                    ["Session 1", "Session 2", "session 2 ", "Downtime"], start=1
+                ):
+                    session.add(
+                        Document(
+                            title=title,
+                            kind="session_log",
+                            content=f"{title} notes",
+                            summary="Harbor fire" if day == 4 else None,
+                            updated_at=datetime(2026, 7, day),
+                        )
+                    )
+                await session.commit()
+                await campaign_service.create_entity(
+                    session,
+                    entity_type="event",
+                    name="Session 2",
+                    details={"timeline_position": "Day 2"},
+                )
+
+                statements.clear()
+                first = await campaign_service.get_session_history(
+                    session, page=1, page_size=2
+                )
+                second = await campaign_service.get_session_history(
+                    session, page=2, page_size=2
+                )
+                matched = await campaign_service.get_session_history(
+                    session, q="harbor"
+                )
+                by_position = await campaign_service.get_session_history(
+                    session, q="day 2"
+                )
+                wildcards = [
+                    await campaign_service.get_session_history(session, q=q)
+                    for q in ("%", "session_2")
+                ]
+                return first, second, matched, by_position, wildcards, statements
+        finally:
+            await engine.dispose()
+
+    first, second, matched, by_position, wildcards, statements = asyncio.run(_run())
+
+    assert first["total"] == 4
+    assert first["pages"] == 2
+    # The event was written last and took the newest "Session 2" log.
+    assert first["items"][0]["event"]["name"] == "Session 2"
+    assert first["items"][0]["document"]["title"] == "session 2 "
+    assert first["items"][0]["timeline_position"] == "Day 2"
+    assert [item["title"] for item in first["items"][1:] + second["items"]] == [
+        "Downtime",
+        "Session 2",
+        "Session 1",
+    ]
+    assert [item["title"] for item in matched["items"]] == ["Downtime"]
+    assert by_position["total"] == 1
+    # LIKE wildcards in q match literally.
+    assert [history["total"] for history in wildcards] == [0, 0]
+    assert not any("documents.content" in statement for statement in statements)
+    assert not any("FULL OUTER" in statement for statement in statements)
+
+
+def test_session_history_pairs_titles_with_unicode_casefolding():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        try:
+            async with session_local() as session:
+                for day, title in enumerate(["STRASSE AMBUSH\n", "ÜBERFALL"], start=1):
+                    session.add(
+                        Document(
+                            title=title,
+                            kind="session_log",
+                            updated_at=datetime(2026, 7, day),
+                        )
+                    )
+                await session.commit()
+                ambush = await campaign_service.create_entity(
+                    session, entity_type="event", name="Straße Ambush"
+                )
+                before = await campaign_service.get_session_history(session)
+                await campaign_service.update_entity(
+                    ambush.id, session, name="Überfall"
+                )
+                after = await campaign_service.get_session_history(session)
+                return before, after
+        finally:
+            await engine.dispose()
+
+    before, after = asyncio.run(_run())
+
+    # SQLite's lower(trim()) folds neither "ß" nor "Ü" and keeps the newline.
+    assert before["total"] == 2
+    assert before["items"][0]["document"]["title"] == "STRASSE AMBUSH\n"
+    assert after["total"] == 2
+    assert after["items"][0]["event"]["name"] == "Überfall"
+    assert after["items"][0]["document"]["title"] == "ÜBERFALL"
+
+
+def test_list_entities_search_uses_ranked_prefix_fulltext_kept_in_sync():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        try:
+            async with session_local() as session:
+                mira = await campaign_service.create_entity(
+                    session,
+                    entity_type="npc",
+                    name="Captain Mira",
+                    details={"languages": ["Dwarvish"], "role": "harbor master"},
+                )
+                await campaign_service.create_entity(
+                    session,
+                    entity_type="location",
+                    name="Harbor",
+                    description="Captain Mira keeps the harbor ledgers here.",
+                )
+                await campaign_service.create_entity(
+                    session,
+                    entity_type="faction",
+                    name="Lantern Guild",
+                    tags=["smugglers"],
+                )
+
+                ranked = await campaign_service.list_entities(session, q="capt mir")
+                by_details = await campaign_service.list_entities(session, q="dwarv")
+                by_tag = await campaign_service.list_entities(session, q="smuggler")
+                first = await campaign_service.list_entities(
+                    session, q="harbor", page_size=1
+                )
+                rest = await campaign_service.list_entities(
+                    session, q="harbor", page_size=1, cursor=first["next_cursor"]
+                )
+
+                await campaign_service.update_entity(
+                    mira.id, session, details={"role": "retired"}
+                )
+                after_update = await campaign_service.list_entities(
+                    session, q="dwarvish"
+                )
+                await campaign_service.delete_entity(mira.id, session)
+                after_delete = await campaign_service.list_entities(
+                    session, q="captain"
+                )
+                return (
+                    ranked,
+                    by_details,
+                    by_tag,
+                    first,
+                    rest,
+                    after_update,
+                    after_delete,
+                )
+        finally:
+            await engine.dispose()
+
+    ranked, by_details, by_tag, first, rest, after_update, after_delete = asyncio.run(
+        _run()
+    )
+
+    # The name match outranks the description mention.
+    assert [item["name"] for item in ranked["items"]] == ["Captain Mira", "Harbor"]
+    assert [item["name"] for item in by_details["items"]] == ["Captain Mira"]
+    assert [item["name"] for item in by_tag["items"]] == ["Lantern Guild"]
+    assert first["total"] == 2
+    assert [item["name"] for item in first["items"] + rest["items"]] == [
+        "Harbor",
+        "Captain Mira",
+    ]
+    assert rest["next_cursor"] is None
+    assert after_update["total"] == 0
+    assert [item["name"] for item in after_delete["items"]] == ["Harbor"]
+
+
+def test_list_entities_search_splits_punctuated_terms_like_the_fts_tokenizer():
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_local = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        try:
+            async with session_local() as session:
+                await campaign_service.create_entity(
+                    session, entity_type="npc", name="Captain O'Brien"
+                )
+                await campaign_service.create_entity(
+                    session,
+                    entity_type="npc",
+                    name="Grask",
+                    details={"ancestry": "half-orc"},
+                )
+                return [
+                    [
+                        item["name"]
+                        for item in (
+                            await campaign_service.list_entities(session, q=q)
+                        )["items"]
+                    ]
+                    for q in ("NPC-0001", "o'brien", "half-orc", "brien")
+                ]
+        finally:
+            await engine.dispose()
+
+    by_key, by_apostrophe, by_hyphen, by_word = asyncio.run(_run())
+
+    assert by_key == ["Captain O'Brien"]
+    assert by_apostrophe == ["Captain O'Brien"]
+    assert by_hyphen == ["Grask"]
+    assert by_word == ["Captain O'Brien"]
@@ -0,0 +1,222 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.models.base import Base
+from backend.models.chunk import DocumentChunk
+from backend.models.document import Document
+from backend.services.embedding_reindex_service import EmbeddingReindexService
+from backend.services.embedding_service import embedding_service
+from backend.services.ingestion_service import ChunkStrategy, IngestionService
+
+
+def _create_in_memory_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    return engine, SessionLocal
+
+
+def _fake_provider(monkeypatch, provider="disabled"):
+    embedded = []
+
+    async def _fake_batch(texts):
+        if embedding_service.provider == "disabled":
+            return [None for _ in texts]
+        embedded.append(list(texts))
+        return [[1.0, float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embedding_service, "provider", provider)
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    monkeypatch.setattr(
+        "backend.services.embedding_reindex_service.settings."
+        "embedding_reindex_requests_per_minute",
+        0,
+    )
+    return embedded
+
+
+async def _ingest(session, service, count):
+    for index in range(count):
+        await service.ingest_document(
+            session,
+            title=f"Condition {index}",
+            kind="rule",
+            content=f"Condition {index} applies.\n\nIt ends after {index} rounds.",
+        )
+
+
+async def _models(session):
+    docs = (await session.execute(select(Document.embedding_model))).scalars().all()
+    chunks = (
+        (await session.execute(select(DocumentChunk.embedding_model))).scalars().all()
+    )
+    return set(docs), set(chunks)
+
+
+def test_reindex_embeds_legacy_rows_and_follows_model_changes(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    ingestion = IngestionService(chunk_strategy=ChunkStrategy(max_chars=30, overlap=5))
+    reindexer = EmbeddingReindexService()
+    embedded = _fake_provider(monkeypatch)
+    key = f"local:{embedding_service.model}"
+
+    async def _run():
+        async with SessionLocal() as session:
+            await _ingest(session, ingestion, 3)
+            assert await _models(session) == ({None}, {None})
+            assert (await reindexer.run(session))["status"] == "skipped"
+
+            monkeypatch.setattr(embedding_service, "provider", "local")
+            before = await reindexer.progress(session)
+            first = await reindexer.run(session)
+            first_calls = sum(len(batch) for batch in embedded)
+            models_after_first = await _models(session)
+            embedded.clear()
+
+            second = await reindexer.run(session)
+            second_calls = list(embedded)
+
+            monkeypatch.setattr(embedding_service, "model", "other-model")
+            third = await reindexer.run(session)
+            after = await reindexer.progress(session)
+            return (
+                before,
+                first,
+                first_calls,
+                models_after_first,
+                second,
+                second_calls,
+                third,
+                after,
+                await _models(session),
+            )
+
+    try:
+        (
+            before,
+            first,
+            first_calls,
+            models_after_first,
+            second,
+            second_calls,
+            third,
+            after,
+            models_after_third,
+        ) = asyncio.run(_run())
+        chunk_count = before["pending"]["stale_chunks"]
+        assert before["pending"]["stale_documents"] == 3
+        assert first["status"] == "completed"
+        assert first["counts"]["documents_embedded"] >= 3
+        assert first_calls == 3 + chunk_count
+        assert models_after_first == ({key}, {key})
+        # Nothing changed since the watermark: no provider calls at all.
+        assert second["status"] == "completed"
+        assert second_calls == []
+        assert third["model"] == "local:other-model"
+        assert third["counts"]["documents_embedded"] == 3
+        assert third["counts"]["chunks_embedded"] == chunk_count
+        assert models_after_third == ({"local:other-model"}, {"local:other-model"})
+        assert after["pending"] == {
+            "stale_documents": 0,
+            "stale_chunks": 0,
+            "changed_documents": 0,
+        }
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_reindex_picks_up_documents_changed_after_the_watermark(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    ingestion = IngestionService(chunk_strategy=ChunkStrategy(max_chars=30, overlap=5))
+    reindexer = EmbeddingReindexService()
+    embedded = _fake_provider(monkeypatch, provider="local")
+
+    async def _run():
+        async with SessionLocal() as session:
+            await _ingest(session, ingestion, 2)
+            await reindexer.run(session)
+            embedded.clear()
+
+            document = (
+                (await session.execute(select(Document).order_by(Document.id)))
+                .scalars()
+                .first()
+            )
+            document.summary = "Edited summary"
+            await session.commit()
+            pending = (await reindexer.progress(session))["pending"]
+            result = await reindexer.run(session)
+            await session.refresh(document)
+            return pending, result, list(embedded), document
+
+    try:
+        pending, result, calls, document = asyncio.run(_run())
+        assert pending["changed_documents"] == 1
+        assert pending["stale_documents"] == 0
+        # Only the edited document text misses the content cache.
+        assert len(calls) == 1
+        assert len(calls[0]) == 1
+        assert "Summary: Edited summary" in calls[0][0]
+        assert result["counts"]["documents_embedded"] == 1
+        assert result["watermark"]["id"] == document.id
+        assert document.embedding_array[1] == float(len(calls[0][0]))
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_reindex_resumes_from_saved_cursor_after_failure(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    ingestion = IngestionService(chunk_strategy=ChunkStrategy(max_chars=30, overlap=5))
+    reindexer = EmbeddingReindexService()
+    embedded = _fake_provider(monkeypatch)
+    monkeypatch.setattr(
+        "backend.services.embedding_reindex_service.settings."
+        "embedding_reindex_page_size",
+        1,
+    )
+    working_batch = embedding_service.generate_embeddings_batch
+
+    async def _run():
+        async with SessionLocal() as session:
+            await _ingest(session, ingestion, 3)
+            monkeypatch.setattr(embedding_service, "provider", "local")
+
+            async def _flaky(texts):
+                if len(embedded) == 2:
+                    raise RuntimeError("rate limited")
+                return await working_batch(texts)
+
+            monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _flaky)
+            failed = await reindexer.run(session)
+            failed_progress = await reindexer.progress(session)
+            embedded.clear()
+
+            monkeypatch.setattr(
+                embedding_service, "generate_embeddings_batch", working_batch
+            )
+            resumed = await reindexer.run(session)
+            return failed, failed_progress, list(embedded), resumed
+
+    try:
+        failed, failed_progress, resumed_calls, resumed = asyncio.run(_run())
+        assert failed["status"] == "failed"
+        assert failed["last_error"] == "rate limited"
+        assert failed["phase"] == "stale_documents"
+        assert failed["cursor"] == 2
+        assert failed["counts"]["documents_embedded"] == 2
+        assert failed_progress["pending"]["stale_documents"] == 1
+        # The resumed run starts after the committed cursor.
+        assert "Condition 0" not in resumed_calls[0][0]
+        assert "Condition 2" in resumed_calls[0][0]
+        assert resumed["status"] == "completed"
+        assert resumed["counts"]["documents_embedded"] >= 3
+        assert resumed["last_error"] is None
+    finally:
+        asyncio.run(engine.dispose())
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from backend.services.embedding_cache import QueryEmbeddingCache
+from backend.services.embedding_executor import EmbeddingExecutor
+from backend.services.embedding_service import EmbeddingService
+from backend.services.metrics_service import metrics_service
+
+
+class _FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return np.array([float(len(texts)), 1.0, 0.0], dtype=np.float32)
+        return np.array(
+            [[float(len(text)), 1.0, 0.0] for text in texts], dtype=np.float32
+        )
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _local_service(cache):
+    service = EmbeddingService()
+    service.provider = "local"
+    service.model = "fake-minilm"
+    service.sentence_transformer = _FakeEncoder()
+    service.query_cache = cache
+    return service
+
+
+def test_query_cache_serves_repeated_lookups_and_reports_metrics():
+    metrics_service.reset()
+    service = _local_service(QueryEmbeddingCache(max_entries=8, ttl_seconds=60))
+
+    async def _run():
+        first = await service.generate_embedding("Flat-footed")
+        again = await service.generate_embedding("  flat-footed ")
+        other = await service.generate_embedding("Frightened")
+        return first, again, other
+
+    first, again, other = asyncio.run(_run())
+
+    assert first == again
+    assert other != first
+    assert service.sentence_transformer.calls == [["Flat-footed"], ["Frightened"]]
+    operations = metrics_service.snapshot()["operations"]
+    assert operations["embeddings.cache.hit"]["count"] == 1
+    assert operations["embeddings.cache.miss"]["count"] == 2
+    assert operations["embeddings.generate"]["count"] == 2
+    assert operations["embeddings.cache.hit"]["models"] == {"fake-minilm": 1}
+
+
+def test_query_cache_is_keyed_by_provider_and_model():
+    cache = QueryEmbeddingCache(max_entries=8, ttl_seconds=60)
+    service = _local_service(cache)
+
+    asyncio.run(service.generate_embedding("grabbed"))
+    service.model = "fake-mpnet"
+    asyncio.run(service.generate_embedding("grabbed"))
+
+    assert len(service.sentence_transformer.calls) == 2
+    assert len(cache) == 2
+
+
+def test_query_cache_evicts_least_recent_and_expired_entries():
+    clock = _Clock()
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=30, clock=clock)
+    a, b, c = (cache.key(text, "local", "m") for text in ("a", "b", "c"))
+
+    cache.put(a, [1.0])
+    cache.put(b, [2.0])
+    assert cache.get(a) == [1.0]
+    cache.put(c, [3.0])
+    assert cache.get(b) is None
+    assert cache.get(a) == [1.0]
+
+    clock.now += 31
+    assert cache.get(a) is None
+    assert cache.get(c) is None
+    assert len(cache) == 0
+
+
+def test_query_cache_persists_across_restarts(tmp_path):
+    clock = _Clock()
+    path = tmp_path / "query-embeddings.json"
+    cache = QueryEmbeddingCache(max_entries=4, ttl_seconds=30, path=path, clock=clock)
+    key = cache.key("Grabbed", "openai", "text-embedding-3-small")
+    cache.put(key, [0.5, -0.25, 1.0])
+    cache.put(cache.key("stale", "openai", "text-embedding-3-small"), [1.0])
+    clock.now += 10
+    cache.put(cache.key("fresh", "openai", "text-embedding-3-small"), [2.0])
+
+    assert cache.save()
+    assert not cache.save()
+
+    clock.now += 25
+    restored = QueryEmbeddingCache(
+        max_entries=4, ttl_seconds=30, path=path, clock=clock
+    )
+    assert restored.get(key) is None
+    assert restored.get(restored.key("fresh", "openai", "text-embedding-3-small")) == [
+        2.0
+    ]
+    assert len(restored) == 1
+
+
+def test_disabled_provider_bypasses_query_cache():
+    metrics_service.reset()
+    service = EmbeddingService()
+    service.provider = "disabled"
+    service.query_cache = QueryEmbeddingCache(max_entries=8, ttl_seconds=60)
+
+    assert asyncio.run(service.generate_embedding("grabbed")) is None
+
+    operations = metrics_service.snapshot()["operations"]
+    assert "embeddings.cache.miss" not in operations
+    assert operations["embeddings.generate"]["count"] == 1
+
+
+def test_concurrent_queries_are_coalesced_off_the_event_loop(monkeypatch):
+    metrics_service.reset()
+    service = _local_service(QueryEmbeddingCache(max_entries=0, ttl_seconds=60))
+    encode_threads = []
+    original_encode = service.sentence_transformer.encode
+
+    def _slow_encode(texts, convert_to_numpy=True):
+        encode_threads.append(threading.get_ident())
+        time.sleep(0.05)
+        return original_encode(texts, convert_to_numpy=convert_to_numpy)
+
+    service.sentence_transformer.encode = _slow_encode
+    service.executor.max_batch_size = 3
+
+    async def _run():
+        ticks = 0
+
+        async def _heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        heartbeat = asyncio.create_task(_heartbeat())
+        texts = ["grabbed", "frightened", "flat-footed", "prone", "slowed"]
+        results = await asyncio.gather(*(service.generate_embedding(t) for t in texts))
+        heartbeat.cancel()
+        return results, ticks
+
+    try:
+        results, ticks = asyncio.run(_run())
+    finally:
+        service.executor.shutdown()
+
+    assert [r[0] for r in results] == [7.0, 10.0, 11.0, 5.0, 6.0]
+    # Five requests, batches of at most three: two provider calls.
+    assert [len(batch) for batch in service.sentence_transformer.calls] == [3, 2]
+    assert threading.get_ident() not in encode_threads
+    assert ticks >= 3
+    assert metrics_service.snapshot()["operations"]["embeddings.generate"]["count"] == 5
+
+
+def test_batch_embedding_respects_max_batch_size(monkeypatch):
+    service = _local_service(QueryEmbeddingCache(max_entries=0, ttl_seconds=60))
+    monkeypatch.setattr(
+        "backend.services.embedding_service.settings.max_embedding_batch_size", 2
+    )
+
+    embeddings = asyncio.run(
+        service.generate_embeddings_batch(["a", "", "bb", "ccc", "dddd", "eeeee"])
+    )
+    service.executor.shutdown()
+
+    assert embeddings[1] is None
+    assert [e[0] for e in embeddings if e is not None] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert service.sentence_transformer.calls == [
+        ["a", "bb"],
+        ["ccc", "dddd"],
+        ["eeeee"],
+    ]
+
+
+def test_batch_embedding_reads_and_fills_the_query_cache():
+    metrics_service.reset()
+    service = _local_service(QueryEmbeddingCache(max_entries=8, ttl_seconds=60))
+
+    async def _run():
+        query = await service.generate_embedding("Grabbed")
+        batch = await service.generate_embeddings_batch(["grabbed", "", "Prone"])
+        again = await service.generate_embedding("prone")
+        return query, batch, again
+
+    query, batch, again = asyncio.run(_run())
+    service.executor.shutdown()
+
+    assert batch == [query, None, again]
+    # Only the uncached text reaches the provider; its vector is then cached.
+    assert service.sentence_transformer.calls == [["Grabbed"], ["Prone"]]
+    operations = metrics_service.snapshot()["operations"]
+    assert operations["embeddings.cache.hit"]["count"] == 2
+    assert operations["embeddings.cache.miss"]["count"] == 2
+
+
+def test_executor_applies_backpressure_and_propagates_errors():
+    in_flight = []
+    peak = []
+
+    def _batch(items):
+        in_flight.extend(items)
+        peak.append(len(in_flight))
+        time.sleep(0.02)
+        del in_flight[: len(items)]
+        if "boom" in items:
+            raise RuntimeError("provider down")
+        return [item.upper() for item in items]
+
+    executor = EmbeddingExecutor(
+        _batch, max_workers=4, max_batch_size=1, window_ms=0, max_pending=2
+    )
+
+    async def _run():
+        ok = await asyncio.gather(*(executor.submit(t) for t in "abcdef"))
+        with pytest.raises(RuntimeError):
+            await executor.submit("boom")
+        return ok
+
+    try:
+        assert asyncio.run(_run()) == list("ABCDEF")
+    finally:
+        executor.shutdown()
+    assert max(peak) <= 2
@@ -1,12 +1,19 @@
 import asyncio
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.orm import selectinload
 
 from backend.models.base import Base
 from backend.models.document import Document
-from backend.services.ingestion_service import ChunkStrategy, IngestionService
+from backend.models.embedding_cache import EmbeddingCacheEntry
+from backend.services.embedding_service import embedding_service
+from backend.services.ingestion_service import (
+    ChunkStrategy,
+    DocumentInput,
+    IngestionService,
+)
 
 
 def _create_in_memory_db():
@@ -31,6 +38,185 @@ def test_chunk_strategy_respects_paragraphs_and_overlap():
     assert chunks[1].startswith(chunks[0][-strategy.overlap :].strip())
 
 
+def test_streamed_chunking_matches_whole_text_chunking():
+    strategy = ChunkStrategy(max_chars=30, overlap=5)
+    text = (
+        "Intro paragraph.\n\n\nSecond paragraph is a bit longer than the first."
+        "\n\n" + "A very long rules paragraph without breaks. " * 4 + "\n\nEnd."
+    )
+    expected = strategy.chunk(text)
+    for size in (1, 7, 64, len(text)):
+        parts = [text[i : i + size] for i in range(0, len(text), size)]
+        assert list(strategy.iter_chunks(parts)) == expected
+
+    # Without overlap, chunks no longer repeat the previous chunk.
+    assert ChunkStrategy(max_chars=20, overlap=0).chunk(
+        "First paragraph.\n\nSecond paragraph."
+    ) == ["First paragraph.", "Second paragraph."]
+
+
+def test_ingest_document_stream_embeds_and_inserts_in_batches(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    strategy = ChunkStrategy(max_chars=40, overlap=8)
+    service = IngestionService(chunk_strategy=strategy, chunk_batch_size=3)
+    text = "\n\n".join(f"Paragraph {i} of the bestiary text." for i in range(20))
+    batches = []
+
+    async def _fake_batch(texts):
+        batches.append(len(texts))
+        return [[1.0, float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+
+    async def _pipe():
+        for i in range(0, len(text), 50):
+            yield text[i : i + 50]
+
+    async def _run():
+        async with SessionLocal() as session:
+            document = await service.ingest_document_stream(
+                session,
+                title="Bestiary",
+                kind="rule",
+                parts=_pipe(),
+                store_content=True,
+            )
+            result = await session.execute(
+                select(Document)
+                .options(selectinload(Document.chunks))
+                .where(Document.id == document.id)
+            )
+            stored = result.scalar_one()
+            streamed_batches = list(batches)
+            textless = await service.ingest_document_stream(
+                session, title="Bestiary (chunks only)", kind="rule", parts=_pipe()
+            )
+            return stored, streamed_batches, textless
+
+    try:
+        stored, streamed_batches, textless = asyncio.run(_run())
+        chunks = sorted(stored.chunks, key=lambda c: c.chunk_index)
+        assert stored.content == text
+        # Keeping the joined text is opt-in.
+        assert textless.content is None
+        assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+        assert [c.content for c in chunks] == strategy.chunk(text)
+        assert all(c.embedding_array is not None for c in chunks)
+        # Chunk embeddings go out three at a time.
+        assert max(streamed_batches) == 3
+        assert sum(streamed_batches) == len(chunks)
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_ingest_document_does_not_read_its_chunks_back(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=8))
+    text = "\n\n".join(f"Paragraph {i} of the bestiary text." for i in range(20))
+    statements = []
+
+    async def _fake_batch(texts):
+        return [[1.0, float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    async def _run():
+        async with SessionLocal() as session:
+            document = await service.ingest_document(
+                session, title="Bestiary", kind="rule", content=text
+            )
+            await service.refresh_document(session, document)
+            return document
+
+    try:
+        document = asyncio.run(_run())
+        assert document.updated_at is not None
+        # The selectin load of ``Document.chunks`` filters on document_id IN.
+        assert not any(
+            "WHERE document_chunks.document_id IN" in statement
+            for statement in statements
+        )
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_ingest_documents_bulk_dedupes_urls_and_batches_embeddings(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    strategy = ChunkStrategy(max_chars=40, overlap=8)
+    service = IngestionService(chunk_strategy=strategy)
+    batches = []
+
+    async def _fake_batch(texts):
+        batches.append(len(texts))
+        return [[1.0, float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_service, "provider", "local")
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    monkeypatch.setattr(
+        "backend.services.ingestion_service.settings.max_embedding_batch_size", 4
+    )
+
+    def _entry(n, content):
+        return DocumentInput(
+            title=f"Room {n}", kind="campaign_index", content=content, url=f"room:{n}"
+        )
+
+    rooms = [
+        _entry(n, f"Room {n} holds a rusted gate.\n\nA ghoul waits in the dark.")
+        for n in range(5)
+    ]
+
+    async def _run():
+        async with SessionLocal() as session:
+            first = await service.ingest_documents_bulk(
+                session, rooms[:3], batch_size=2
+            )
+            batches.clear()
+            second = await service.ingest_documents_bulk(
+                session,
+                [
+                    rooms[0],
+                    _entry(1, "Room 1 was flooded.\n\nOnly eels remain here now."),
+                    rooms[3],
+                    rooms[4],
+                    _entry(4, "Room 4 is sealed."),
+                ],
+                batch_size=5,
+            )
+            result = await session.execute(
+                select(Document)
+                .options(selectinload(Document.chunks))
+                .order_by(Document.id)
+            )
+            return first, second, result.scalars().all()
+
+    try:
+        first, second, stored = asyncio.run(_run())
+        assert first == {"documents": 3, "created": 3, "updated": 0, "chunks": 6}
+        # Room 4 appears twice in one batch; the later copy wins.
+        assert second == {"documents": 5, "created": 2, "updated": 2, "chunks": 5}
+        assert [d.url for d in stored] == [f"room:{n}" for n in range(5)]
+        by_url = {d.url: d for d in stored}
+        assert by_url["room:1"].content.startswith("Room 1 was flooded.")
+        assert by_url["room:4"].content == "Room 4 is sealed."
+        for document in stored:
+            chunks = sorted(document.chunks, key=lambda c: c.chunk_index)
+            assert [c.content for c in chunks] == strategy.chunk(document.content)
+            assert all(c.embedding_array is not None for c in chunks)
+            assert document.embedding_array is not None
+            assert document.created_at is not None
+        # Unchanged texts come from the content cache; the three new document
+        # texts and four new chunks share provider calls of at most four.
+        assert batches == [4, 3]
+    finally:
+        asyncio.run(engine.dispose())
+
+
 def test_ingest_document_creates_chunks_and_persists():
     engine, SessionLocal = _create_in_memory_db()
     service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=8))
@@ -118,3 +304,125 @@ def test_ingest_document_can_refresh_existing_document_by_url():
         assert documents[0].rag_eligible is False
     finally:
         asyncio.run(engine.dispose())
+
+
+def test_ingest_document_stores_binary_float32_embeddings(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=200, overlap=0))
+
+    async def _fake_embedding(text):
+        return [0.25, -1.5, 3.0]
+
+    async def _fake_batch(texts):
+        return [[float(i), 0.5, -0.5] for i, _ in enumerate(texts)]
+
+    monkeypatch.setattr(
+        "backend.services.ingestion_service.embedding_service.generate_embedding",
+        _fake_embedding,
+    )
+    monkeypatch.setattr(
+        "backend.services.ingestion_service.embedding_service.generate_embeddings_batch",
+        _fake_batch,
+    )
+
+    async def _run():
+        async with SessionLocal() as session:
+            await service.ingest_document(
+                session, title="Grab", kind="rule", content="Grabbed creatures."
+            )
+        async with SessionLocal() as session:
+            result = await session.execute(
+                select(Document).options(selectinload(Document.chunks))
+            )
+            return result.scalars().first()
+
+    try:
+        stored = asyncio.run(_run())
+        assert stored.embedding is None
+        assert stored.embedding_dtype == "float32"
+        assert len(stored.embedding_vector) == 3 * 4
+        vector = stored.embedding_array
+        assert vector.dtype == np.float32
+        assert vector.base is not None and not vector.flags.writeable
+        assert vector.tolist() == [0.25, -1.5, 3.0]
+        assert stored.chunks[0].embedding_array.tolist() == [0.0, 0.5, -0.5]
+        assert stored.has_embedding
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_set_embedding_supports_float16_and_legacy_json_rows():
+    document = Document(title="Legacy", kind="rule", content="x")
+    document.embedding = [1.0, 2.0]
+    assert document.embedding_array.tolist() == [1.0, 2.0]
+
+    document.set_embedding([1.0, 2.0], dtype="float16")
+    assert document.embedding is None
+    assert len(document.embedding_vector) == 2 * 2
+    assert document.embedding_array.dtype.name == "float16"
+
+    document.set_embedding(None)
+    assert document.embedding_array is None
+    assert not document.has_embedding
+
+
+def test_rechunk_reuses_cached_embeddings_for_unchanged_text(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=30, overlap=0))
+    embedded = []
+
+    async def _fake_embedding(text):
+        embedded.append(text)
+        return [1.0, float(len(text))]
+
+    async def _fake_batch(texts):
+        embedded.extend(texts)
+        return [[1.0, float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embedding_service, "provider", "local")
+    monkeypatch.setattr(embedding_service, "generate_embedding", _fake_embedding)
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            document = await service.ingest_document(
+                session,
+                title="Grab",
+                kind="rule",
+                content="Grabbed creatures.\n\nThey are off-guard.",
+            )
+            first_pass = list(embedded)
+            embedded.clear()
+
+            document.content = "Grabbed creatures.\n\nThey are immobilized."
+            document.visibility_scope = "player_safe"
+            await service.refresh_document(session, document, rechunk=True)
+            second_pass = list(embedded)
+            embedded.clear()
+
+            document.rag_eligible = False
+            await service.refresh_document(session, document)
+            cached = await session.execute(select(EmbeddingCacheEntry))
+            return first_pass, second_pass, list(embedded), cached.scalars().all()
+
+    try:
+        first_pass, second_pass, third_pass, entries = asyncio.run(_run())
+        old_chunks = service.chunk_strategy.chunk(
+            "Grabbed creatures.\n\nThey are off-guard."
+        )
+        new_chunks = service.chunk_strategy.chunk(
+            "Grabbed creatures.\n\nThey are immobilized."
+        )
+        assert first_pass[:2] == old_chunks
+        assert len(first_pass) == 3
+        # Only the edited chunk and the document text reach the provider.
+        assert old_chunks[0] == new_chunks[0]
+        assert second_pass[0] == new_chunks[1]
+        assert len(second_pass) == 2
+        assert third_pass == []
+        assert len(entries) == 5
+        assert {entry.model for entry in entries} == {
+            f"local:{embedding_service.model}"
+        }
+    finally:
+        asyncio.run(engine.dispose())
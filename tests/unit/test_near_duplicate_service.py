@@ -0,0 +1,276 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.models.base import Base
+from backend.models.chunk import DocumentChunk
+from backend.models.document import Document
+from backend.services.ingestion_service import ChunkStrategy, IngestionService
+from backend.services.near_duplicate_service import (
+    FILTER_FIELDS,
+    hamming_distance,
+    near_duplicate_service,
+    simhash,
+    simhash_bands,
+)
+from backend.services.retrieval_service import SearchRequest, retrieval_service
+from backend.services.vector_index_service import SnapshotStore, vector_index_service
+
+GRAB_RULES = (
+    "Grabbed creatures are off-guard and immobilized. A grabbed creature can "
+    "attempt to Escape using its unarmed attack modifier, Acrobatics or "
+    "Athletics against the grabbing creature's Athletics DC. The condition ends "
+    "if the grabbing creature moves away or is no longer adjacent."
+)
+
+
+def _create_in_memory_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    return engine, SessionLocal
+
+
+def _use_vector_index(monkeypatch, path):
+    monkeypatch.setattr(vector_index_service, "enabled", True)
+    monkeypatch.setattr(vector_index_service, "store", SnapshotStore(path))
+    monkeypatch.setattr(vector_index_service, "_index", None)
+    monkeypatch.setattr(vector_index_service, "_stamp", None)
+
+    async def _fake_batch(texts):
+        return [[1.0, float(len(text)), 0.5] for text in texts]
+
+    monkeypatch.setattr(
+        "backend.services.ingestion_service.embedding_service.generate_embeddings_batch",
+        _fake_batch,
+    )
+
+
+async def _chunks(session, document_id):
+    stmt = (
+        select(DocumentChunk.id, DocumentChunk.canonical_chunk_id)
+        .where(DocumentChunk.document_id == document_id)
+        .order_by(DocumentChunk.chunk_index)
+    )
+    return [tuple(row) for row in (await session.execute(stmt)).all()]
+
+
+def test_simhash_ignores_formatting_and_bands_catch_close_hashes():
+    reformatted = f"  {GRAB_RULES.upper()}\n".replace(". ", ".\n\n")
+    unrelated = "Fireball explodes in a 20-foot-radius sphere of roaring flame."
+
+    assert simhash(GRAB_RULES) == simhash(reformatted)
+    assert hamming_distance(simhash(GRAB_RULES), simhash(unrelated)) > 3
+
+    # Any three flipped bits leave at least one 16-bit band unchanged.
+    value = simhash(GRAB_RULES)
+    for bits in ((0, 16, 32), (15, 31, 63), (5, 6, 7)):
+        flipped = value ^ sum(1 << bit for bit in bits)
+        assert hamming_distance(value, flipped) == 3
+        assert any(x == y for x, y in zip(simhash_bands(value), simhash_bands(flipped)))
+
+
+def test_ingested_copies_link_to_the_first_chunk(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=300))
+    _use_vector_index(monkeypatch, tmp_path)
+    content = f"{GRAB_RULES}\n\nShove pushes a creature 5 feet away from you."
+
+    async def _run():
+        async with SessionLocal() as session:
+            original = await service.ingest_document(
+                session, title="Grab", kind="rule", content=content
+            )
+            copy = await service.ingest_document(
+                session, title="Grab (vault)", kind="rule", content=content
+            )
+            linked = (
+                await _chunks(session, original.id),
+                await _chunks(session, copy.id),
+                vector_index_service.index.live_count,
+            )
+            results = await retrieval_service.search_documents_detailed(
+                "grabbed creature escape", session, top_k=2, include_chunks=2
+            )
+            await service.delete_document(session, original)
+            promoted = (
+                await _chunks(session, copy.id),
+                vector_index_service.index.live_count,
+            )
+            return original.id, linked, results, promoted
+
+    try:
+        original_id, linked, results, promoted = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    original_chunks, copy_chunks, indexed = linked
+    assert all(canonical is None for _, canonical in original_chunks)
+    assert [canonical for _, canonical in copy_chunks] == [
+        chunk_id for chunk_id, _ in original_chunks
+    ]
+    assert indexed == len(original_chunks)
+
+    # The copy's chunks give way to the originals they repeat.
+    returned = [chunk["id"] for result in results for chunk in result["chunks"]]
+    assert results[0]["document"]["id"] == original_id
+    assert sorted(returned) == sorted(chunk_id for chunk_id, _ in original_chunks)
+
+    copy_after, indexed_after = promoted
+    assert all(canonical is None for _, canonical in copy_after)
+    assert indexed_after == len(copy_after)
+
+
+def test_copies_only_link_within_the_same_retrieval_filters(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=300))
+    _use_vector_index(monkeypatch, tmp_path)
+    content = f"{GRAB_RULES}\n\nShove pushes a creature 5 feet away from you."
+
+    async def _run():
+        async with SessionLocal() as session:
+            player = await service.ingest_document(
+                session,
+                title="Grab (player)",
+                kind="rule",
+                content=content,
+                visibility_scope="player_safe",
+            )
+            gm = await service.ingest_document(
+                session, title="Grab", kind="rule", content=content
+            )
+            copy = await service.ingest_document(
+                session, title="Grab (vault)", kind="rule", content=content
+            )
+            before = (
+                await _chunks(session, player.id),
+                await _chunks(session, gm.id),
+                await _chunks(session, copy.id),
+            )
+
+            gm.visibility_scope = "player_safe"
+            await service.update_metadata(session, gm)
+            after = (
+                await _chunks(session, player.id),
+                await _chunks(session, gm.id),
+                await _chunks(session, copy.id),
+                vector_index_service.index.live_count,
+            )
+            results = await retrieval_service.search_documents_detailed(
+                "grabbed creature escape",
+                session,
+                top_k=1,
+                include_chunks=2,
+                visibility_scope="gm_only",
+            )
+            return copy.id, before, after, results
+
+    try:
+        copy_id, before, after, results = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    player_chunks, gm_chunks, copy_chunks = before
+    # The GM-only copies never point at the player-safe chunks.
+    assert all(canonical is None for _, canonical in player_chunks + gm_chunks)
+    assert [canonical for _, canonical in copy_chunks] == [
+        chunk_id for chunk_id, _ in gm_chunks
+    ]
+
+    # Once player-safe, the GM copy follows the older player-safe chunks and
+    # the vault copy becomes canonical for GM-only searches.
+    player_chunks, gm_chunks, copy_chunks, indexed = after
+    assert [canonical for _, canonical in gm_chunks] == [
+        chunk_id for chunk_id, _ in player_chunks
+    ]
+    assert all(canonical is None for _, canonical in copy_chunks)
+    assert indexed == len(player_chunks) + len(copy_chunks)
+    assert results[0]["document"]["id"] == copy_id
+    assert sorted(chunk["id"] for chunk in results[0]["chunks"]) == sorted(
+        chunk_id for chunk_id, _ in copy_chunks
+    )
+
+
+def test_copies_keep_apart_on_every_retrieval_filter(monkeypatch, tmp_path):
+    # Every filter retrieval applies must be a link key, or a filtered search
+    # could drop a copy whose canonical chunk that filter excludes.
+    assert set(FILTER_FIELDS) == set(SearchRequest("q").filters)
+
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=300))
+    _use_vector_index(monkeypatch, tmp_path)
+
+    async def _run():
+        async with SessionLocal() as session:
+            approved = await service.ingest_document(
+                session, title="Grab", kind="rule", content=GRAB_RULES
+            )
+            pending = await service.ingest_document(
+                session,
+                title="Grab (draft)",
+                kind="rule",
+                content=GRAB_RULES,
+                review_status="pending",
+            )
+            training = await service.ingest_document(
+                session,
+                title="Grab (training)",
+                kind="rule",
+                content=GRAB_RULES,
+                train_eligible=True,
+            )
+            return [
+                await _chunks(session, document.id)
+                for document in (approved, pending, training)
+            ]
+
+    try:
+        chunk_lists = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert all(canonical is None for chunks in chunk_lists for _, canonical in chunks)
+
+
+def test_backfill_links_chunks_stored_without_fingerprints():
+    engine, SessionLocal = _create_in_memory_db()
+
+    async def _run():
+        async with SessionLocal() as session:
+            for title in ("Grab", "Grab copy", "Grab again"):
+                document = Document(title=title, kind="rule", content=GRAB_RULES)
+                session.add(document)
+                await session.flush()
+                session.add(
+                    DocumentChunk(
+                        document_id=document.id, chunk_index=0, content=GRAB_RULES
+                    )
+                )
+            await session.commit()
+            linked = await near_duplicate_service.backfill(session, batch_size=2)
+            rows = (
+                await session.execute(
+                    select(DocumentChunk.id, DocumentChunk.canonical_chunk_id).order_by(
+                        DocumentChunk.id
+                    )
+                )
+            ).all()
+            return linked, [tuple(row) for row in rows]
+
+    try:
+        linked, rows = asyncio.run(_run())
+        assert linked == 2
+        first_id = rows[0][0]
+        assert rows == [
+            (first_id, None),
+            (first_id + 1, first_id),
+            (first_id + 2, first_id),
+        ]
+    finally:
+        asyncio.run(engine.dispose())
@@ -0,0 +1,61 @@
+import os
+import shutil
+
+import pytest
+
+from backend.services.pdf_text_extractor import PdfTextExtractor
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses a shell script")
+
+
+def _fake_pdftotext(tmp_path):
+    calls = tmp_path / "calls.log"
+    script = tmp_path / "pdftotext"
+    script.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> "{calls}"\n'
+        "printf 'Cover page\\fSecond page\\n'\n",
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return str(script), calls
+
+
+def test_extraction_runs_in_the_pool_and_is_cached_by_content(tmp_path):
+    binary, calls = _fake_pdftotext(tmp_path)
+    extractor = PdfTextExtractor(cache_dir=tmp_path / "cache", workers=1, binary=binary)
+    pdf = tmp_path / "guide.pdf"
+    pdf.write_bytes(b"%PDF-1.6 guide")
+
+    try:
+        first = extractor.extract(pdf)
+        # Same bytes under another name: served from the cache.
+        copy = tmp_path / "guide-copy.pdf"
+        shutil.copy(pdf, copy)
+        second = extractor.extract(copy)
+        assert first == second == "Cover page\fSecond page\n"
+        assert len(calls.read_text().splitlines()) == 1
+
+        # Other options or other content miss the cache.
+        raw = PdfTextExtractor(
+            cache_dir=tmp_path / "cache", workers=0, binary=binary, options=("-raw",)
+        )
+        raw.extract(pdf)
+        pdf.write_bytes(b"%PDF-1.6 guide, second printing")
+        extractor.extract(pdf)
+        assert len(calls.read_text().splitlines()) == 3
+        assert calls.read_text().splitlines()[1].startswith("-raw ")
+    finally:
+        extractor.shutdown()
+
+
+def test_extraction_errors_are_not_cached(tmp_path):
+    extractor = PdfTextExtractor(
+        cache_dir=tmp_path / "cache", workers=0, binary=str(tmp_path / "missing")
+    )
+    pdf = tmp_path / "guide.pdf"
+    pdf.write_bytes(b"%PDF-1.6 guide")
+
+    with pytest.raises(ValueError, match="pdftotext"):
+        extractor.extract(pdf)
+    assert not (tmp_path / "cache").exists()
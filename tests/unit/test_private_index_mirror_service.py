@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.models.base import Base
+from backend.models.document import Document
+from backend.services.embedding_service import embedding_service
+from backend.services.private_index_mirror_service import private_index_mirror_service
+
+
+def _create_in_memory_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    return engine, SessionLocal
+
+
+def _write_rows(path, rows):
+    path.write_text(
+        "\n".join(json.dumps(row) for row in rows) + "\n\n", encoding="utf-8"
+    )
+
+
+def test_mirror_only_ingests_changed_rows_and_removes_missing_ids(
+    monkeypatch, tmp_path
+):
+    engine, SessionLocal = _create_in_memory_db()
+    embedded = []
+
+    async def _fake_batch(texts):
+        embedded.extend(texts)
+        return [[1.0, float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", _fake_batch)
+    rag_path = tmp_path / "rag-documents.jsonl"
+    rooms = [
+        {
+            "external_id": f"room-a{n}",
+            "title": f"A{n}",
+            "content": f"Room A{n} is damp.",
+        }
+        for n in range(1, 4)
+    ]
+
+    async def _run():
+        async with SessionLocal() as session:
+            _write_rows(rag_path, rooms)
+            first = await private_index_mirror_service.mirror(session, rag_path)
+            embedded.clear()
+            second = await private_index_mirror_service.mirror(session, rag_path)
+            unchanged_calls = len(embedded)
+
+            _write_rows(
+                rag_path,
+                [rooms[0], {**rooms[1], "content": "Room A2 is flooded."}],
+            )
+            third = await private_index_mirror_service.mirror(session, rag_path)
+            result = await session.execute(select(Document).order_by(Document.url))
+            stored = [(d.url, d.content) for d in result.scalars().all()]
+            return first, second, unchanged_calls, third, stored
+
+    try:
+        first, second, unchanged_calls, third, stored = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert first == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+    assert second == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    assert unchanged_calls == 0
+    assert third == {"added": 0, "updated": 1, "removed": 1, "unchanged": 1}
+    assert stored == [
+        ("private-index:room-a1", "Room A1 is damp."),
+        ("private-index:room-a2", "Room A2 is flooded."),
+    ]
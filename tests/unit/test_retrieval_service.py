@@ -1,11 +1,19 @@
 import asyncio
 
+import numpy as np
+from sqlalchemy import event, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from backend.models.base import Base
 from backend.models.document import Document
 from backend.models.chunk import DocumentChunk
-from backend.services.retrieval_service import retrieval_service
+import backend.services.retrieval_service as retrieval_service_module
+from backend.services.keyword_index_service import keyword_index_service
+from backend.services.retrieval_service import (
+    SearchRequest,
+    _top_k_indices,
+    retrieval_service,
+)
 
 
 def _create_in_memory_db():
@@ -56,3 +64,395 @@ def test_retrieval_prefers_chunk_hits_when_embeddings_disabled():
         assert results[0]["document"]["id"] == doc_id
     finally:
         asyncio.run(engine.dispose())
+
+
+def test_vectorized_ranking_matches_reference_blend(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    query_emb = [1.0, 0.0, 0.0]
+    seeded = [
+        ("Grab rules", "Grabbed creatures are off-guard.", [0.9, 0.1, 0.0]),
+        ("Shove rules", "Shove pushes a creature back.", [0.2, 0.9, 0.1]),
+        ("Trip rules", "Trip knocks a creature prone.", None),
+        ("Mixed", "Grabbed and tripped.", [3.0, 0.0, 0.0, 0.0]),
+    ]
+
+    async def _fake_embedding(text):
+        return query_emb
+
+    monkeypatch.setattr(
+        "backend.services.retrieval_service.embedding_service.generate_embedding",
+        _fake_embedding,
+    )
+
+    async def _no_keyword_index(db):
+        return False
+
+    # The reference blend uses the substring fallback for keyword scores.
+    monkeypatch.setattr(keyword_index_service, "available", _no_keyword_index)
+
+    async def _seed():
+        async with SessionLocal() as session:
+            for title, content, emb in seeded:
+                doc = Document(title=title, kind="rule", content=content)
+                doc.embedding = emb
+                session.add(doc)
+                await session.flush()
+                chunk = DocumentChunk(
+                    document_id=doc.id, chunk_index=0, content=content, embedding=emb
+                )
+                chunk.document = doc
+                session.add(chunk)
+            await session.commit()
+
+    async def _run_search():
+        async with SessionLocal() as session:
+            return await retrieval_service.search_documents_detailed(
+                "grabbed creature", session, top_k=3, include_chunks=1
+            )
+
+    def _reference(title, content, emb):
+        terms = retrieval_service._expand_query("grabbed creature")
+        escore = retrieval_service_module.embedding_service.compute_similarity(
+            query_emb, emb or []
+        )
+        kdoc = retrieval_service._keyword_score(f"{title}\n\n{content}", terms)
+        kchunk = retrieval_service._keyword_score(content, terms)
+        cscore = 0.6 * escore + 0.4 * kchunk
+        return 0.7 * max(escore, cscore) + 0.3 * kdoc
+
+    try:
+        asyncio.run(_seed())
+        results = asyncio.run(_run_search())
+        expected = sorted(
+            ((_reference(*row), row[0]) for row in seeded),
+            key=lambda item: item[0],
+            reverse=True,
+        )[:3]
+        assert [r["document"]["title"] for r in results] == [t for _, t in expected]
+        for result, (score, _) in zip(results, expected):
+            assert abs(result["score"] - score) < 1e-5
+            assert len(result["chunks"]) == 1
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_top_k_indices_keeps_stable_order_for_ties():
+    scores = np.array([0.5, 0.9, 0.5, 0.0, 0.5, 0.7], dtype=np.float32)
+    assert _top_k_indices(scores, 3).tolist() == [1, 5, 0]
+    assert _top_k_indices(scores, 10).tolist() == [1, 5, 0, 2, 4]
+
+
+def test_bm25_keyword_index_tracks_edits_and_ranks_by_term_weight():
+    engine, SessionLocal = _create_in_memory_db()
+
+    async def _titles(session, query):
+        results = await retrieval_service.search_documents(query, session, top_k=5)
+        return [r["document"]["title"] for r in results]
+
+    async def _run():
+        async with SessionLocal() as session:
+            assert await keyword_index_service.available(session)
+            for title, content in (
+                (
+                    "Grapple",
+                    "Grabbing a foe. A grabbed foe is off-guard while grabbed.",
+                ),
+                ("Movement", "Stride, step and grab an edge when you fall."),
+                ("Spells", "Fireball deals fire damage in a burst."),
+            ):
+                session.add(Document(title=title, kind="rule", content=content))
+            await session.commit()
+            ranked = await _titles(session, "grabbed")
+
+            spells = (
+                await session.execute(
+                    select(Document).where(Document.title == "Spells")
+                )
+            ).scalar_one()
+            spells.content = "Cone of cold deals cold damage."
+            await session.commit()
+            after_edit = await _titles(session, "fireball")
+
+            await session.delete(spells)
+            await session.commit()
+            after_delete = await _titles(session, "cold")
+            return ranked, after_edit, after_delete
+
+    try:
+        ranked, after_edit, after_delete = asyncio.run(_run())
+        # Porter stemming matches "grab" in Movement; term frequency ranks Grapple first.
+        assert ranked == ["Grapple", "Movement"]
+        assert after_edit == []
+        assert after_delete == []
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_bm25_lone_weak_match_does_not_get_full_keyword_weight():
+    engine, SessionLocal = _create_in_memory_db()
+
+    async def _run():
+        async with SessionLocal() as session:
+            documents = [
+                Document(
+                    title=f"Grapple {i}",
+                    kind="rule",
+                    content="Grapple rules: a grapple holds a foe. Grapple again.",
+                )
+                for i in range(3)
+            ] + [
+                Document(
+                    title=f"Travel {i}",
+                    kind="rule",
+                    content="Travel rules for overland journeys and weather.",
+                )
+                for i in range(6)
+            ]
+            session.add_all(documents)
+            await session.commit()
+            terms = retrieval_service._expand_query("grapple rules")
+            match = keyword_index_service.match_expression(terms)
+            score = retrieval_service._document_keyword_scores
+            # Each document is the only candidate, as after strict filtering.
+            weak = await score(session, match, terms, [documents[-1].id])
+            strong = await score(session, match, terms, [documents[0].id])
+            return float(weak[0]), float(strong[0])
+
+    try:
+        weak, strong = asyncio.run(_run())
+        # "rules" is in every document; matching only it is weak evidence.
+        assert 0.0 < weak < 0.25
+        assert strong > 3 * weak
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_bm25_recall_reaches_documents_outside_recency_pool(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+
+    async def _run():
+        async with SessionLocal() as session:
+            session.add(
+                Document(title="Old ruling", kind="rule", content="Dispel magic rules.")
+            )
+            await session.flush()
+            session.add_all(
+                Document(title=f"Note {i}", kind="note", content="Unrelated text.")
+                for i in range(5)
+            )
+            await session.commit()
+            return await retrieval_service.search_documents("dispel", session, top_k=1)
+
+    # Shrink the recency window so the matching document falls outside it.
+    monkeypatch.setattr(retrieval_service, "recency_pool_size", 2)
+    try:
+        results = asyncio.run(_run())
+        assert [r["document"]["title"] for r in results] == ["Old ruling"]
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_chunks_are_loaded_only_for_the_coarse_stage_pool(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+
+    async def _seed():
+        async with SessionLocal() as session:
+            for i in range(6):
+                topic = "Grapple" if i in (1, 4) else "Travel"
+                doc = Document(
+                    title=f"{topic} {i}", kind="rule", content=f"{topic} rules."
+                )
+                session.add(doc)
+                await session.flush()
+                session.add_all(
+                    DocumentChunk(
+                        document_id=doc.id,
+                        chunk_index=j,
+                        content=f"{topic} section {j}: " + "filler " * 50,
+                    )
+                    for j in range(4)
+                )
+            await session.commit()
+
+    async def _run_search():
+        async with SessionLocal() as session:
+            return await retrieval_service.search_documents_detailed(
+                "grapple", session, top_k=2, include_chunks=1
+            )
+
+    loaded = []
+
+    def _on_load(target, context):
+        loaded.append(target)
+
+    monkeypatch.setattr(retrieval_service, "chunk_stage_size", 2)
+    try:
+        asyncio.run(_seed())
+        event.listen(Document, "load", _on_load)
+        event.listen(DocumentChunk, "load", _on_load)
+        try:
+            results = asyncio.run(_run_search())
+        finally:
+            event.remove(Document, "load", _on_load)
+            event.remove(DocumentChunk, "load", _on_load)
+        assert sorted(r["document"]["title"] for r in results) == [
+            "Grapple 1",
+            "Grapple 4",
+        ]
+        assert all(r["chunks"][0]["content"].startswith("Grapple") for r in results)
+        chunks = [obj for obj in loaded if isinstance(obj, DocumentChunk)]
+        documents = [obj for obj in loaded if isinstance(obj, Document)]
+        # Only the two pooled documents had chunk rows loaded, without content.
+        assert len(chunks) == 8
+        assert {c.document_id for c in chunks} == {r["document"]["id"] for r in results}
+        assert all("content" in inspect(c).unloaded for c in chunks)
+        assert all("content" in inspect(d).unloaded for d in documents)
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_batch_search_matches_single_queries_with_one_embedding_call(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    vectors = {
+        "grabbed creature": [1.0, 0.0, 0.0],
+        "shove": [0.0, 1.0, 0.0],
+        "prone": [0.2, 0.1, 0.9],
+    }
+    batch_calls = []
+
+    async def _fake_embedding(text):
+        return vectors[text]
+
+    async def _fake_batch(texts):
+        batch_calls.append(list(texts))
+        return [vectors[text] for text in texts]
+
+    embedding = retrieval_service_module.embedding_service
+    monkeypatch.setattr(embedding, "generate_embedding", _fake_embedding)
+    monkeypatch.setattr(embedding, "generate_embeddings_batch", _fake_batch)
+
+    async def _seed():
+        async with SessionLocal() as session:
+            for title, kind, content, emb in (
+                ("Grab", "rule", "Grabbed creatures are off-guard.", [0.9, 0.1, 0.0]),
+                ("Shove", "rule", "Shove pushes a creature back.", [0.1, 0.9, 0.1]),
+                ("Trip", "rule", "Trip knocks a creature prone.", [0.1, 0.2, 0.8]),
+                ("Ambush", "session", "The shove off the bridge.", [0.3, 0.7, 0.2]),
+            ):
+                doc = Document(title=title, kind=kind, content=content)
+                doc.embedding = emb
+                session.add(doc)
+                await session.flush()
+                chunk = DocumentChunk(
+                    document_id=doc.id, chunk_index=0, content=content, embedding=emb
+                )
+                chunk.document = doc
+                session.add(chunk)
+            await session.commit()
+
+    requests = [
+        SearchRequest("grabbed creature", top_k=2, include_chunks=1),
+        SearchRequest("shove", top_k=3, kind="rule"),
+        SearchRequest("prone", top_k=4, include_chunks=1),
+        SearchRequest("shove", top_k=1, kind="session"),
+    ]
+
+    async def _run():
+        async with SessionLocal() as session:
+            batch = await retrieval_service.search_documents_batch(requests, session)
+            single = [
+                await retrieval_service.search_documents_detailed(
+                    request.query,
+                    session,
+                    top_k=request.top_k,
+                    include_chunks=request.include_chunks,
+                    kind=request.kind,
+                )
+                for request in requests
+            ]
+            return batch, single
+
+    try:
+        asyncio.run(_seed())
+        batch, single = asyncio.run(_run())
+        assert batch_calls == [[request.query for request in requests]]
+        for batch_items, single_items in zip(batch, single):
+            # GEMM and GEMV may round the last float32 bit differently.
+            assert [r["document"] for r in batch_items] == [
+                r["document"] for r in single_items
+            ]
+            for got, want in zip(batch_items, single_items):
+                assert abs(got["score"] - want["score"]) < 1e-6
+                assert [c["id"] for c in got["chunks"]] == [
+                    c["id"] for c in want["chunks"]
+                ]
+        assert [r["document"]["title"] for r in batch[3]] == ["Ambush"]
+        assert batch[0][0]["chunks"][0]["content"].startswith("Grabbed")
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_progressive_search_yields_keyword_hits_before_the_embedding(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    state = {"cancelled": 0}
+
+    async def _slow_embedding(text):
+        try:
+            await state["release"].wait()
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return [1.0, 0.0]
+
+    embedding = retrieval_service_module.embedding_service
+    monkeypatch.setattr(embedding, "generate_embedding", _slow_embedding)
+
+    async def _seed():
+        async with SessionLocal() as session:
+            for title, content, emb in (
+                ("Grab", "Grabbed creatures are off-guard.", [0.1, 1.0]),
+                ("Hold", "A creature held fast cannot move.", [1.0, 0.1]),
+            ):
+                doc = Document(title=title, kind="rule", content=content)
+                doc.embedding = emb
+                session.add(doc)
+                await session.flush()
+                chunk = DocumentChunk(
+                    document_id=doc.id, chunk_index=0, content=content, embedding=emb
+                )
+                chunk.document = doc
+                session.add(chunk)
+            await session.commit()
+
+    async def _run():
+        state["release"] = asyncio.Event()
+        async with SessionLocal() as session:
+            phases = []
+            search = retrieval_service.search_documents_progressive(
+                "grabbed creature", session, top_k=2
+            )
+            async for phase, items in search:
+                phases.append((phase, [r["document"]["title"] for r in items]))
+                state["release"].set()
+            expected = await retrieval_service.search_documents_detailed(
+                "grabbed creature", session, top_k=2, include_chunks=0
+            )
+
+            state["release"] = asyncio.Event()
+            cancelled = retrieval_service.search_documents_progressive(
+                "grabbed creature", session, top_k=2
+            )
+            await cancelled.__anext__()
+            await cancelled.aclose()
+            await asyncio.sleep(0)
+            return phases, [r["document"]["title"] for r in expected]
+
+    try:
+        asyncio.run(_seed())
+        phases, expected = asyncio.run(_run())
+        # Only the keyword path can rank "Grab" first; the vectors favour "Hold".
+        assert phases == [("keyword", ["Grab", "Hold"]), ("final", expected)]
+        assert expected[0] == "Hold"
+        assert state["cancelled"] == 1
+    finally:
+        asyncio.run(engine.dispose())
@@ -0,0 +1,186 @@
+import asyncio
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.models.base import Base
+from backend.models.document import Document
+from backend.services.corpus_version_service import corpus_version_service
+from backend.services.ingestion_service import ChunkStrategy, IngestionService
+from backend.services.metrics_service import metrics_service
+from backend.services.retrieval_service import retrieval_service
+from backend.services.rules_service import RulesService
+
+
+def _create_in_memory_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    return engine, SessionLocal
+
+
+def _count_retrievals(monkeypatch):
+    calls = []
+    original = retrieval_service.search_documents_detailed
+
+    async def _counting(query, db, **kwargs):
+        calls.append(query)
+        return await original(query, db, **kwargs)
+
+    monkeypatch.setattr(retrieval_service, "search_documents_detailed", _counting)
+    return calls
+
+
+def test_answers_are_cached_until_a_rule_document_changes(monkeypatch):
+    metrics_service.reset()
+    engine, SessionLocal = _create_in_memory_db()
+    ingestion = IngestionService(chunk_strategy=ChunkStrategy(max_chars=200))
+    rules = RulesService(cache_size=8)
+    calls = _count_retrievals(monkeypatch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            grabbed = await ingestion.ingest_document(
+                session,
+                title="Grabbed",
+                kind="rule",
+                content="Grabbed creatures are off-guard and immobilized.",
+            )
+            first = await rules.answer_question("grabbed", session, strict=True)
+            repeat = await rules.answer_question("  GRABBED ", session, strict=True)
+            repeat["citations"].clear()
+            lenient = await rules.answer_question("grabbed", session)
+            after_repeat = len(calls)
+
+            await ingestion.ingest_document(
+                session, title="Session notes", kind="session", content="Grabbed."
+            )
+            unaffected = await rules.answer_question("grabbed", session, strict=True)
+            after_note = len(calls)
+
+            grabbed.content = "Grabbed creatures are off-guard and can't move."
+            await ingestion.refresh_document(session, grabbed, rechunk=True)
+            edited = await rules.answer_question("grabbed", session, strict=True)
+            after_edit = len(calls)
+
+            await ingestion.delete_document(session, grabbed)
+            deleted = await rules.answer_question("grabbed", session, strict=True)
+            return (
+                first,
+                lenient,
+                after_repeat,
+                unaffected,
+                after_note,
+                edited,
+                after_edit,
+                deleted,
+                len(calls),
+            )
+
+    try:
+        (
+            first,
+            lenient,
+            after_repeat,
+            unaffected,
+            after_note,
+            edited,
+            after_edit,
+            deleted,
+            final,
+        ) = asyncio.run(_run())
+        # Same normalized query hits the cache; strict=False is its own entry.
+        assert after_repeat == 2
+        assert lenient["strict_mode"] is False
+        # Callers get copies, so mutating one answer leaves the cache intact.
+        assert unaffected == first
+        assert after_note == 2
+        assert "can't move" in edited["citations"][0]["excerpt"]
+        assert after_edit == 3
+        assert deleted["citations"] == []
+        assert final == 4
+        operations = metrics_service.snapshot()["operations"]
+        assert operations["rules.cache.hit"]["count"] == 2
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_answer_cache_is_scoped_to_the_database(monkeypatch):
+    rules = RulesService(cache_size=8)
+    ingestion = IngestionService()
+    calls = _count_retrievals(monkeypatch)
+
+    async def _ask(SessionLocal, content):
+        async with SessionLocal() as session:
+            await ingestion.ingest_document(
+                session, title="Prone", kind="rule", content=content
+            )
+            return await rules.answer_question("prone", session)
+
+    first_engine, first_db = _create_in_memory_db()
+    second_engine, second_db = _create_in_memory_db()
+    try:
+        first = asyncio.run(_ask(first_db, "Prone creatures are off-guard."))
+        second = asyncio.run(_ask(second_db, "Prone creatures crawl 5 feet."))
+        assert len(calls) == 2
+        assert "off-guard" in first["citations"][0]["excerpt"]
+        assert "crawl" in second["citations"][0]["excerpt"]
+    finally:
+        asyncio.run(first_engine.dispose())
+        asyncio.run(second_engine.dispose())
+
+
+def test_answer_cache_sees_rule_writes_from_other_processes(monkeypatch):
+    engine, SessionLocal = _create_in_memory_db()
+    ingestion = IngestionService()
+    rules = RulesService(cache_size=8)
+    calls = _count_retrievals(monkeypatch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            await ingestion.ingest_document(
+                session,
+                title="Grabbed",
+                kind="rule",
+                content="Grabbed creatures are off-guard and immobilized.",
+            )
+            first = await rules.answer_question("grabbed", session, strict=True)
+            statements.clear()
+            respelled = await rules.answer_question("GRABBED", session, strict=True)
+            hit_statements = list(statements)
+            # Another process, like a CLI import, bumps the version it writes.
+            async with SessionLocal() as other:
+                await other.execute(
+                    insert(Document).values(
+                        title="Grabbed errata", kind="rule", content="Grabbed: errata."
+                    )
+                )
+                await corpus_version_service.bump(other, "rule")
+                await other.commit()
+            after_import = await rules.answer_question("grabbed", session, strict=True)
+            return first, respelled, hit_statements, after_import
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    try:
+        first, respelled, hit_statements, after_import = asyncio.run(_run())
+        # The respelled question hits the cache; the import forces a retrieval.
+        assert len(calls) == 2
+        # A hit costs one primary-key read of the rule corpus version.
+        assert len(hit_statements) == 1
+        assert "corpus_versions" in hit_statements[0]
+        # Cached answers quote the caller's own wording.
+        assert "'grabbed'" in first["answer"]
+        assert "'GRABBED'" in respelled["answer"]
+        assert after_import["strict_mode"] is True
+    finally:
+        asyncio.run(engine.dispose())
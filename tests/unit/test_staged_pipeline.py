@@ -0,0 +1,70 @@
+import asyncio
+
+from backend.services.staged_pipeline import PipelineStage, StagedPipeline
+
+
+def test_pipeline_bounds_queues_limits_concurrency_and_batches():
+    running = {"parse": 0}
+    peaks = {"parse": 0}
+    fed = []
+    persisted = []
+
+    def _source():
+        for n in range(60):
+            fed.append(n)
+            yield n
+
+    async def _parse(items):
+        running["parse"] += 1
+        peaks["parse"] = max(peaks["parse"], running["parse"])
+        await asyncio.sleep(0.001)
+        running["parse"] -= 1
+        return [n * 10 for n in items if n != 7]
+
+    async def _persist(items):
+        # Two queues of two, three parse workers each holding an item and a
+        # result, this batch and the feeder's pending put: the source never
+        # runs further ahead of persist than that.
+        done = sum(len(batch) for batch in persisted) + (len(fed) > 7)
+        assert len(fed) - done <= 2 + 2 + 3 * 2 + 4 + 1
+        await asyncio.sleep(0.002)
+        persisted.append(sorted(items))
+        return items
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage("parse", _parse, concurrency=3),
+            PipelineStage("persist", _persist, batch_size=4),
+        ],
+        queue_size=2,
+        metrics_prefix="test.pipeline",
+    )
+    stats = asyncio.run(pipeline.run(_source()))
+
+    assert peaks["parse"] == 3
+    assert sorted(n for batch in persisted for n in batch) == [
+        n * 10 for n in range(60) if n != 7
+    ]
+    assert max(len(batch) for batch in persisted) <= 4
+    assert stats["parse"]["items_in"] == 60
+    assert stats["parse"]["items_out"] == 59
+    assert stats["persist"]["items_in"] == 59
+    assert stats["persist"]["batches"] == len(persisted)
+    assert stats["persist"]["items_per_second"] > 0
+
+
+def test_pipeline_stop_stops_feeding_new_items():
+    seen = []
+
+    async def _handle(items):
+        seen.extend(items)
+        if 3 in items:
+            pipeline.stop()
+        return items
+
+    pipeline = StagedPipeline([PipelineStage("handle", _handle)], queue_size=1)
+    asyncio.run(pipeline.run(range(100)))
+
+    assert pipeline.stopped
+    assert seen[:4] == [0, 1, 2, 3]
+    assert len(seen) < 10
@@ -0,0 +1,424 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.models.base import Base
+from backend.services.ingestion_service import (
+    ChunkStrategy,
+    DocumentInput,
+    IngestionService,
+)
+from backend.services.retrieval_service import retrieval_service
+from backend.services.vector_index_service import (
+    IndexEntry,
+    SnapshotStore,
+    VectorIndex,
+    vector_index_service,
+)
+
+
+def _create_in_memory_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def _init():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    SessionLocal = asyncio.run(_init())
+    return engine, SessionLocal
+
+
+def _entry(chunk_id, document_id, vector, kind="rule", rag=True, vis="gm_only"):
+    return IndexEntry(
+        chunk_id=chunk_id,
+        document_id=document_id,
+        embedding=vector,
+        kind=kind,
+        rag_eligible=rag,
+        visibility_scope=vis,
+    )
+
+
+def test_flat_index_filters_and_removes_documents():
+    index = VectorIndex()
+    index.upsert(
+        [
+            _entry(1, 10, [1.0, 0.0, 0.0]),
+            _entry(2, 10, [0.9, 0.1, 0.0]),
+            _entry(3, 20, [1.0, 0.0, 0.0], kind="lore"),
+            _entry(4, 30, [0.0, 1.0, 0.0], vis="player_safe"),
+        ]
+    )
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    hits = index.search(query, 2, kind="rule")
+    assert [hit.chunk_id for hit in hits] == [1, 2]
+    assert index.search(query, 5, visibility_scope="player_safe")[0].chunk_id == 4
+
+    index.update_document_metadata(
+        20, kind="rule", rag_eligible=True, visibility_scope="gm_only"
+    )
+    assert {hit.chunk_id for hit in index.search(query, 3, kind="rule")} == {1, 2, 3}
+
+    assert index.remove_document(10) == 2
+    assert [hit.chunk_id for hit in index.search(query, 5, kind="rule")] == [3, 4]
+
+
+def test_trained_index_recalls_nearest_neighbours():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(1500, 16)).astype(np.float32)
+    index = VectorIndex(nprobe=6, train_threshold=1000)
+    index.upsert(_entry(i + 1, i + 1, vectors[i]) for i in range(len(vectors)))
+    assert index.centroids is not None
+
+    found = sum(
+        index.search(vectors[i], 1)[0].chunk_id == i + 1 for i in range(0, 1500, 15)
+    )
+    assert found >= 95
+
+    index.remove_document(1)
+    assert index.live_count == 1499
+    assert index.search(vectors[42], 1)[0].chunk_id == 43
+
+
+def _use_snapshot_dir(monkeypatch, path):
+    monkeypatch.setattr(vector_index_service, "enabled", True)
+    monkeypatch.setattr(vector_index_service, "store", SnapshotStore(path))
+    monkeypatch.setattr(vector_index_service, "_index", None)
+    monkeypatch.setattr(vector_index_service, "_stamp", None)
+
+
+def _fake_embeddings(monkeypatch):
+    async def _fake_batch(texts):
+        return [[1.0, float(len(text)), 0.5] for text in texts]
+
+    monkeypatch.setattr(
+        "backend.services.ingestion_service.embedding_service.generate_embeddings_batch",
+        _fake_batch,
+    )
+
+
+def test_ingestion_keeps_index_in_sync(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            document = await service.ingest_document(
+                session,
+                title="Grab",
+                kind="rule",
+                content="First paragraph of rules.\n\nSecond paragraph of rules.",
+            )
+            indexed = vector_index_service.index.live_count
+            document.visibility_scope = "player_safe"
+            await service.refresh_document(session, document)
+            query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+            filtered = vector_index_service.search(
+                query, visibility_scope="player_safe"
+            )
+            await service.delete_document(session, document)
+            return indexed, filtered, vector_index_service.index.live_count
+
+    try:
+        indexed, filtered, remaining = asyncio.run(_run())
+        assert indexed == 2
+        assert len(filtered) == 2
+        assert remaining == 0
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_bulk_ingest_updates_the_index_only_after_committing(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    def _rules(visibility_scope):
+        return [
+            DocumentInput(
+                title="Grab",
+                kind="rule",
+                content="First paragraph of rules.\n\nSecond paragraph of rules.",
+                url="rules:grab",
+                visibility_scope=visibility_scope,
+            ),
+            DocumentInput(title="Shove", kind="rule", content="Shove pushes 5 feet."),
+        ]
+
+    async def _run():
+        async with SessionLocal() as session:
+            await service.ingest_documents_bulk(session, _rules("gm_only")[:1])
+            before = vector_index_service.search(query, visibility_scope="gm_only")
+
+            async def _failing_commit():
+                raise RuntimeError("disk full")
+
+            monkeypatch.setattr(session, "commit", _failing_commit)
+            with pytest.raises(RuntimeError):
+                await service.ingest_documents_bulk(session, _rules("player_safe"))
+            await session.rollback()
+            after_failure = (
+                vector_index_service.search(query, visibility_scope="gm_only"),
+                vector_index_service.index.live_count,
+            )
+            return before, after_failure
+
+    try:
+        before, (gm_hits, live_count) = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    # The rolled-back batch neither retagged Grab nor indexed Shove.
+    assert len(before) == 2
+    assert [hit.chunk_id for hit in gm_hits] == [hit.chunk_id for hit in before]
+    assert live_count == 2
+
+
+def test_snapshot_is_memory_mapped_and_refreshed_incrementally(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+
+    async def _ingest(session, title):
+        return await service.ingest_document(
+            session,
+            title=title,
+            kind="rule",
+            # Distinct text per document; identical chunks would be linked as
+            # near-duplicates and left out of the snapshot.
+            content=f"First {title} paragraph.\n\nSecond {title} paragraph.",
+        )
+
+    async def _run():
+        async with SessionLocal() as session:
+            first = await _ingest(session, "Grab")
+            built = await vector_index_service.build_snapshot(session)
+            unchanged = await vector_index_service.refresh_snapshot(session)
+
+            await _ingest(session, "Shove")
+            appended = await vector_index_service.refresh_snapshot(session)
+
+            await service.delete_document(session, first)
+            pruned = await vector_index_service.refresh_snapshot(session)
+            return built, unchanged, appended, pruned
+
+    try:
+        built, unchanged, appended, pruned = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert built["status"] == "ok" and built["vectors"] == 2
+    assert unchanged["status"] == "unchanged"
+    assert appended["segments"] == 2 and appended["vectors"] == 4
+    # Half the snapshot is tombstoned, so the refresh rebuilds it compactly.
+    assert pruned["segments"] == 1 and pruned["vectors"] == 2
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["generation"] == pruned["generation"]
+    assert sorted(p.name for p in tmp_path.glob("vectors-*.npy")) == [
+        f"vectors-{manifest['segments'][0]['name']}.npy"
+    ]
+    assert not (tmp_path / "snapshot.lock").exists()
+
+    # A separate worker maps the same files read-only.
+    worker = SnapshotStore(tmp_path).load()
+    assert worker is not None and worker.live_count == 2
+    assert isinstance(worker.segments[0].vectors, np.memmap)
+    assert not worker.segments[0].vectors.flags.writeable
+
+
+def test_snapshot_refresh_records_document_metadata_changes(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            document = await service.ingest_document(
+                session,
+                title="Grab",
+                kind="rule",
+                content="First paragraph of rules.\n\nSecond paragraph of rules.",
+            )
+            await vector_index_service.build_snapshot(session)
+            document.kind = "lore"
+            document.visibility_scope = "player_safe"
+            await session.commit()
+            return await vector_index_service.refresh_snapshot(session)
+
+    try:
+        refreshed = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert refreshed["status"] == "ok" and refreshed["segments"] == 1
+    # Another worker never saw the edit; the snapshot it maps carries it.
+    worker = SnapshotStore(tmp_path).load()
+    assert worker is not None
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    assert worker.search(query, 5, kind="rule") == []
+    assert (
+        len(worker.search(query, 5, kind="lore", visibility_scope="player_safe")) == 2
+    )
+
+
+def test_snapshot_reload_keeps_local_ingests(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+
+    async def _run():
+        async with SessionLocal() as session:
+            await service.ingest_document(
+                session, title="Grab", kind="rule", content="Grab rules."
+            )
+            await vector_index_service.build_snapshot(session)
+            # Another worker rebuilt the snapshot; this one ingested meanwhile.
+            monkeypatch.setattr(vector_index_service, "_stamp", None)
+            await service.ingest_document(
+                session, title="Shove", kind="rule", content="Shove rules."
+            )
+            await vector_index_service.build_snapshot(session)
+            index = vector_index_service.index
+            return index.live_count, len(index.segments), index.delta_entries()
+
+    try:
+        live, segments, delta = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert live == 2
+    assert segments == 1
+    assert delta == []
+
+
+def test_snapshot_lock_rejects_concurrent_writers(tmp_path):
+    store = SnapshotStore(tmp_path)
+    with store.lock():
+        with pytest.raises(RuntimeError):
+            with store.lock():
+                pass
+    with store.lock():
+        pass
+
+
+def test_retrieval_scores_chunks_from_snapshot(monkeypatch, tmp_path):
+    engine, SessionLocal = _create_in_memory_db()
+    service = IngestionService(chunk_strategy=ChunkStrategy(max_chars=40, overlap=0))
+    _use_snapshot_dir(monkeypatch, tmp_path)
+    _fake_embeddings(monkeypatch)
+
+    async def _query_embedding(text):
+        return [1.0, 20.0, 0.5]
+
+    monkeypatch.setattr(
+        "backend.services.retrieval_service.embedding_service.generate_embedding",
+        _query_embedding,
+    )
+
+    async def _search(session):
+        results = await retrieval_service.search_documents_detailed(
+            "grab rules", session, top_k=2, include_chunks=1
+        )
+        return [(r["document"]["title"], round(r["score"], 5)) for r in results]
+
+    async def _run():
+        async with SessionLocal() as session:
+            await service.ingest_document(
+                session, title="Grab", kind="rule", content="Grab a creature."
+            )
+            await service.ingest_document(
+                session,
+                title="Shove",
+                kind="rule",
+                content="Shove a creature back a long way across the room.",
+            )
+            await vector_index_service.build_snapshot(session)
+        async with SessionLocal() as session:
+            from_snapshot = await _search(session)
+        monkeypatch.setattr(vector_index_service, "enabled", False)
+        async with SessionLocal() as session:
+            from_database = await _search(session)
+        return from_snapshot, from_database
+
+    try:
+        from_snapshot, from_database = asyncio.run(_run())
+    finally:
+        asyncio.run(engine.dispose())
+
+    assert len(from_snapshot) == 2
+    assert from_snapshot == from_database
+
+
+def _clustered_vectors(seed, count, dim=64, clusters=20):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    picks = rng.integers(0, clusters, count)
+    return (centers[picks] + 0.6 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode,nbytes_per_row", [("int8", 64 + 4), ("binary", 8)])
+def test_quantized_search_reranks_exactly_and_keeps_recall(mode, nbytes_per_row):
+    sample = _clustered_vectors(3, 2040)
+    vectors, queries = sample[:2000], sample[2000:]
+    exact = VectorIndex(train_threshold=10**6)
+    quantized = VectorIndex(train_threshold=10**6, quantization=mode)
+    for index in (exact, quantized):
+        index.upsert(_entry(i + 1, i + 1, v) for i, v in enumerate(vectors))
+
+    recall = []
+    for query in queries / np.linalg.norm(queries, axis=1, keepdims=True):
+        expected = exact.search(query, 10)
+        hits = quantized.search(query, 10)
+        recall.append(
+            len({h.chunk_id for h in hits} & {h.chunk_id for h in expected}) / 10
+        )
+        # Returned scores are exact cosine, not the quantized estimate.
+        by_id = {h.chunk_id: h.score for h in expected}
+        for hit in hits:
+            if hit.chunk_id in by_id:
+                assert hit.score == pytest.approx(by_id[hit.chunk_id], abs=1e-6)
+    assert np.mean(recall) >= 0.9
+    assert quantized.quantized_nbytes == 2000 * nbytes_per_row
+    assert quantized.vector_nbytes == 2000 * 64 * 4
+
+    # Rows ingested later are quantized incrementally and found.
+    quantized.upsert([_entry(5000, 5000, -vectors[0])])
+    assert (
+        quantized.search(-vectors[0] / np.linalg.norm(vectors[0]), 1)[0].chunk_id
+        == 5000
+    )
+    assert quantized.quantized_nbytes == 2001 * nbytes_per_row
+
+
+def test_quantized_search_over_memory_mapped_snapshot(tmp_path):
+    vectors = _clustered_vectors(5, 300, dim=32)
+    exact = VectorIndex()
+    exact.upsert(_entry(i + 1, i + 1, v) for i, v in enumerate(vectors))
+    store = SnapshotStore(tmp_path)
+    tmp_path.mkdir(exist_ok=True)
+    segment = exact.delta
+    segment.name = "000001-000"
+    np.save(store.vectors_path(segment.name), segment.vectors[: segment.size])
+    store.write_meta(segment)
+    store.write_manifest(
+        {"generation": 1, "segments": [{"name": segment.name, "count": 300}]}
+    )
+
+    loaded = store.load(quantization="binary", rerank_factor=8)
+    assert isinstance(loaded.segments[0].vectors, np.memmap)
+    query = vectors[7] / np.linalg.norm(vectors[7])
+    assert loaded.search(query, 1)[0].chunk_id == 8
+    assert loaded.quantized_nbytes == 300 * 4